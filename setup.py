@@ -30,7 +30,9 @@ setup(
         'numpy==1.19.5',
         'arrow',
         "pydantic",
-        "Jinja2"
+        "Jinja2",
+        'ijson',
+        'pyarrow'
     ],
     extras_require={
         'dev': [
@@ -41,16 +43,18 @@ setup(
         'console_scripts': [
             'stationverification = \
                 stationverification.bin.stationverification:main',
+            'batchverification = \
+                stationverification.bin.batchverification:main',
             'stationverificationlatency = \
                 stationverification.bin.stationverification_latency:main',
             'uploadreport = \
                 stationverification.bin.upload_report_to_gitlab:main',
             'fetchStationXml = \
                 stationverification.bin.fetch_station_xml:main',
-            # These will not work with the current version of
-            # stationverification, they will need refactoring
-            # 'dailyverification = \
-            #     stationverification.bin.dailyverification:main',
+            'dailyverification = \
+                stationverification.bin.dailyverification:main',
+            # This will not work with the current version of
+            # stationverification, it will need refactoring
             # 'pushtonagios = \
             #     stationverification.bin.pushtonagios:main'
         ]
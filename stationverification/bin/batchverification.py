@@ -0,0 +1,136 @@
+'''
+Python script used to validate a batch of new EEW stations, such as a whole
+deployment, in one run. The latency, ISPAQ and report stages of the stations
+share one pool of processes, each stage being limited to a number of
+concurrent stations.
+
+usage: batchverification [-h] (--stations STATION [STATION ...] |
+                         --station_list STATIONLIST) -d STARTDATE -e ENDDATE
+                         -T TYPEOFINSTRUMENT [--batch_workers BATCHWORKERS]
+                         [--latency_limit LATENCYLIMIT]
+                         [--ispaq_limit ISPAQLIMIT]
+                         [--report_limit REPORTLIMIT]
+                         [--batch_directory BATCHDIRECTORY]
+                         [the other arguments of stationverification]
+
+optional arguments:
+    --stations STATION [STATION ...]
+                        The stations to validate, as NETWORK.STATION or
+                        NETWORK.STATION.LOCATION. Ex. QW.QCC02 QW.QCN08.00
+    --station_list STATIONLIST
+                        Path to a file listing the stations to validate, one
+                        per line
+    --batch_workers BATCHWORKERS
+                        The number of processes running the stages of the
+                        stations. Default: 4
+    --latency_limit LATENCYLIMIT
+                        The number of stations reading their latency files at
+                        the same time. Default: 2
+    --ispaq_limit ISPAQLIMIT
+                        The number of stations running ISPAQ at the same
+                        time. Default: 2
+    --report_limit REPORTLIMIT
+                        The number of stations generating their report at
+                        the same time. Default: 2
+    --batch_directory BATCHDIRECTORY
+                        The directory holding the working directories of the
+                        stations. Default: batchverification
+
+The other arguments are those of stationverification, and apply to all the
+stations of the batch.
+
+Functions:
+----------
+main()
+    The main fuction, which validates the stations of the batch
+'''
+import logging
+import sys
+
+from stationverification.config import get_default_parameters
+from stationverification.utilities.batch_runner import read_station_list, \
+    run_batch
+from stationverification.utilities.fetch_arguments import \
+    get_arguments_parser, get_user_inputs
+
+
+def main():
+    '''
+    The Main function.
+
+    Returns
+    -------
+    {station}_results.json
+        A json file containing the results of the stationvalidation tests,
+        for each station of the batch
+    '''
+    default_parameters = get_default_parameters()
+    argsparser = get_arguments_parser(station_required=False)
+    stations_group = argsparser.add_mutually_exclusive_group(required=True)
+    stations_group.add_argument(
+        '--stations',
+        help='The stations to validate, as NETWORK.STATION or \
+NETWORK.STATION.LOCATION. I.e: QW.QCC02 QW.QCN08.00',
+        nargs='+',
+        type=str
+    )
+    stations_group.add_argument(
+        '--station_list',
+        help='Path to a file listing the stations to validate, one per line',
+        type=str
+    )
+    argsparser.add_argument(
+        '--batch_workers',
+        help='The number of processes running the stages of the stations. \
+Default: 4',
+        type=int,
+        default=default_parameters.BATCH_WORKERS
+    )
+    argsparser.add_argument(
+        '--latency_limit',
+        help='The number of stations reading their latency files at the same \
+time. Default: 2',
+        type=int,
+        default=default_parameters.BATCH_LATENCY_LIMIT
+    )
+    argsparser.add_argument(
+        '--ispaq_limit',
+        help='The number of stations running ISPAQ at the same time. \
+Default: 2',
+        type=int,
+        default=default_parameters.BATCH_ISPAQ_LIMIT
+    )
+    argsparser.add_argument(
+        '--report_limit',
+        help='The number of stations generating their report at the same \
+time. Default: 2',
+        type=int,
+        default=default_parameters.BATCH_REPORT_LIMIT
+    )
+    argsparser.add_argument(
+        '--batch_directory',
+        help='The directory holding the working directories of the \
+stations. Default: batchverification',
+        type=str,
+        default=default_parameters.BATCH_DIRECTORY
+    )
+    args = argsparser.parse_args()
+    stations = args.stations if args.stations is not None \
+        else read_station_list(args.station_list)
+
+    results = run_batch(
+        user_inputs=get_user_inputs(args),
+        stations=stations,
+        workers=args.batch_workers,
+        stage_limits={'latency': args.latency_limit,
+                      'ispaq': args.ispaq_limit,
+                      'report': args.report_limit},
+        directory=args.batch_directory)
+
+    failed_stations = [station for station, error in results.items()
+                       if error is not None]
+    logging.info(f'{len(results) - len(failed_stations)} of {len(results)} \
+stations validated')
+    if failed_stations:
+        logging.error(f'Failed stations: {", ".join(failed_stations)}')
+        sys.exit(1)
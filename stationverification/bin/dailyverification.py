@@ -1,152 +1,199 @@
-# '''
-# This module is designed to do a daily, one-day Ispaq check on every station in
-# the verification facility so that the results can be injected into Ispaq
-# '''
-# import argparse
-# from stationverification import ISPAQ_PREF
-# from stationverification import CONFIG
-# from stationverification import STATION_XML
-# from stationverification.utilities.generate_report import gather_stats
-# # from stationverification.utilities.generate_report import bulk_report
-# import logging
-# import os
-# import subprocess
-# from datetime import date, timedelta
-# import tempfile
+'''
+This module is designed to do a daily, one-day check on every station in
+the verification facility. ISPAQ is run once for all the stations of the
+stationXML, and the report of each station is written to the dated archive
+of the validations, {outputdir}/{network}/{station}/{day}/.
 
-# flake8: noqa
+The station-days with a report already are skipped, so the job can be run
+again after a failure at little cost.
 
-# def main():
-#     argsparser = argparse.ArgumentParser()
-#     argsparser.add_argument(
-#         '-i',
-#         '--ispaqlocation',
-#         default='ispaq',
-#         help='If ispaq is not installed as a package, specify the location of \
-# run_ispaq.py Default: ispaq',
-#         type=str
-#     )
-#     argsparser.add_argument(
-#         '-P',
-#         '--preference_file',
-#         default=ISPAQ_PREF,
-#         help=f'Declare what ISPAQ preference file to use when running ISPAQ. \
-# Default is eew_preferences.txt. Default: {ISPAQ_PREF}',
-#         type=str
-#     )
-#     argsparser.add_argument(
-#         '-L',
-#         '--logfile',
-#         default=None,
-#         help='To log to a file instead of stdout, specify the filename.',
-#         type=str
-#     )
-#     argsparser.add_argument(
-#         '-v',
-#         '--verbose',
-#         action='store_true',
-#         help='Sets logging level to DEBUG'
-#     )
-#     argsparser.add_argument(
-#         '-t',
-#         '--thresholds',
-#         default=CONFIG,
-#         help=f'The path to the preference file containing the thresholds to \
-# test the metrics against. Default: {CONFIG}',
-#         type=str
-#     )
-#     argsparser.add_argument(
-#         '-l',
-#         '--HDF5',
-#         help='The directory containing HDF5 sniffwave files. Default: \
-# /data/sniffwave',
-#         type=str,
-#         default='/data/sniffwave'
-#     )
-#     argsparser.add_argument(
-#         '-a',
-#         '--archive',
-#         type=str,
-#         help='The path to the miniseed archive. Default: /data/miniseed',
-#         default='/data/miniseed'
-#     )
-#     argsparser.add_argument(
-#         '-f',
-#         '--fdsnws',
-#         help='Specity a FDSNWS to use for waveform data instead of a miniseed \
-# archive.',
-#         type=str,
-#         default=None
-#     )
-#     argsparser.add_argument(
-#         '-o',
-#         '--outputdirectory',
-#         type=str,
-#         default='./dailyverification',
-#         help='The directory to archive daily verification reports. Default: \
-# ./dailyverification'
-#     )
-#     args = argsparser.parse_args()
+usage: dailyverification [-h] -T TYPEOFINSTRUMENT [-d DAY] [-s STATIONXML]
+                         [-i ISPAQLOCATION] [-P PREFERENCEFILE]
+                         [-M METRICS] [-t THRESHOLDS] [-l LATENCY]
+                         [-m MINISEEDARCHIVE] [-H SOHARCHIVE]
+                         [-o OUTPUTDIR] [-w WORKERS] [-L LOGFILE] [-v]
 
-#     # If a logfile is specified, set up logging to use it
-#     if args.logfile is not None:
-#         logging.basicConfig(
-#             format='%(asctime)s:%(levelname)s:%(message)s',
-#             datefmt="%Y-%m-%d %H:%M:%S",
-#             level=logging.DEBUG if args.verbose else logging.INFO,
-#             filename=args.logfile, filemode='w')
-#     else:
-#         logging.basicConfig(
-#             format='%(asctime)s:%(levelname)s:%(message)s',
-#             datefmt="%Y-%m-%d %H:%M:%S",
-#             level=logging.DEBUG if args.verbose else logging.INFO)
+Functions:
+----------
+main()
+    The main fuction, which validates the stations for the day
+'''
+import argparse
+import logging
+import sys
 
-#     startdate = date.today() + timedelta(days=-1)
-#     enddate = date.today()
+from configparser import ConfigParser
+from datetime import date, timedelta
 
-#     ispaqloc = args.ispaqlocation
+from dateutil import parser as dateparser  # type: ignore
 
-#     metrics = 'eew_no_psd'
+from stationverification import CONFIG, ISPAQ_PREF, STATION_XML
+from stationverification.config import get_default_parameters
+from stationverification.utilities.daily_verification import \
+    run_daily_verification
+from stationverification.utilities.metadata_cache import MetadataCache
 
-#     pfile = args.preference_file
-#     # fdsnws = args.fdsnws
 
-#     temppref = tempfile.NamedTemporaryFile('w+b')
-#     with open(pfile, "r") as preffile:
-#         contents = preffile.readlines()
-#     linenum = contents.index('Data_Access:\n') + 2
-#     contents[linenum] = f'  dataselect_url:  {args.archive}/\n'
-#     contents[linenum+1] = f'  station_url:  {STATION_XML}\n'
-#     contents[linenum+2] = '  event_url:  IRIS\n'
-#     contents[linenum+3] = '  resp_dir:  \n'
-#     contents = "".join(contents)
-#     temppref.write(contents.encode())
-#     temppref.seek(0, os.SEEK_CUR)
+def main():
+    default_parameters = get_default_parameters()
+    argsparser = argparse.ArgumentParser()
+    argsparser.add_argument(
+        '-d',
+        '--day',
+        help='The day to validate, in YYYY-MM-DD format. Default: yesterday',
+        type=str,
+    )
+    argsparser.add_argument(
+        '-H',
+        '--soh_archive',
+        help='Path to the state of health files',
+        type=str,
+    )
+    argsparser.add_argument(
+        '-i',
+        '--ispaqlocation',
+        default=default_parameters.ISPAQ_LOCATION,
+        help=f'Specifies the path or alias for the ispaq cmdline tool. \
+Default: {default_parameters.ISPAQ_LOCATION}',
+        type=str
+    )
+    argsparser.add_argument(
+        '-l',
+        '--latency',
+        help='The directory containing the latency data.',
+        type=str,
+    )
+    argsparser.add_argument(
+        '-L',
+        '--logfile',
+        default=None,
+        help='To log to a file instead of stdout, specify the filename.',
+        type=str
+    )
+    argsparser.add_argument(
+        '-m',
+        '--miniseedarchive',
+        help='The parent directory of the miniseed archive.',
+        type=str,
+    )
+    argsparser.add_argument(
+        '--metadata_cache',
+        default=default_parameters.METADATA_CACHE_DIRECTORY,
+        help='Directory in which to cache the stationXML converted for ISPAQ. \
+Default: ~/.cache/stationverification/metadata',
+        type=str
+    )
+    argsparser.add_argument(
+        '-M',
+        '--metrics',
+        default=default_parameters.DAILY_METRICS,
+        help='Select the group of metrics from the ispaq preference file to \
+run with. Default: eew_no_psd',
+        type=str
+    )
+    argsparser.add_argument(
+        '-o',
+        '--outputdir',
+        default=default_parameters.OUTPUT_DIRECTORY,
+        help='The root of the dated archive of the daily reports. Default: \
+/validation',
+        type=str
+    )
+    argsparser.add_argument(
+        '-P',
+        '--preference_file',
+        default=ISPAQ_PREF,
+        help=f'Declare what ISPAQ preference file to use when running ISPAQ. \
+Default: {ISPAQ_PREF}',
+        type=str
+    )
+    argsparser.add_argument(
+        '-s',
+        '--station_xml',
+        default=STATION_XML,
+        help=f'The stationXML file of the stations to validate. Default: \
+{STATION_XML}',
+        type=str
+    )
+    argsparser.add_argument(
+        '-t',
+        '--thresholds',
+        default=CONFIG,
+        help=f'The path to the preference file containing the thresholds to \
+test the metrics against. Default: {CONFIG}',
+        type=str
+    )
+    argsparser.add_argument(
+        '-T',
+        '--typeofinstrument',
+        help='type of instrument used, APOLLO or GURALP',
+        required=True,
+        type=str
+    )
+    argsparser.add_argument(
+        '-v',
+        '--verbose',
+        action='store_true',
+        help='Sets logging level to DEBUG'
+    )
+    argsparser.add_argument(
+        '-w',
+        '--workers',
+        default=default_parameters.DAILY_WORKERS,
+        help='The number of processes generating the reports of the \
+stations. Default: 1',
+        type=int
+    )
+    args = argsparser.parse_args()
 
-#     cmd = f'{ispaqloc} -M {metrics} -S all --starttime={startdate} \
-# --endtime={enddate} -P {temppref.name}'
+    # If a logfile is specified, set up logging to use it
+    if args.logfile is not None:
+        logging.basicConfig(
+            format='%(asctime)s:%(levelname)s:%(message)s',
+            datefmt="%Y-%m-%d %H:%M:%S",
+            level=logging.DEBUG if args.verbose else logging.INFO,
+            filename=args.logfile, filemode='w')
+    else:
+        logging.basicConfig(
+            format='%(asctime)s:%(levelname)s:%(message)s',
+            datefmt="%Y-%m-%d %H:%M:%S",
+            level=logging.DEBUG if args.verbose else logging.INFO)
 
-#     proc = subprocess.Popen(
-#         cmd,
-#         shell=True,
-#         # stdout=subprocess.PIPE,
-#         # stderr=subprocess.PIPE
-#     )
-#     proc.wait()
+    day = dateparser.parse(args.day, yearfirst=True).date() \
+        if args.day is not None else date.today() + timedelta(days=-1)
+    apollo = args.typeofinstrument == "APOLLO"
+    latencyFiles = args.latency if args.latency is not None \
+        else default_parameters.APOLLO_LATENCY_ARCHIVE if apollo \
+        else default_parameters.GURALP_LATENCY_ARCHIVE
+    miniseedarchive = args.miniseedarchive \
+        if args.miniseedarchive is not None \
+        else default_parameters.APOLLO_MINISEED_ARCHIVE if apollo \
+        else default_parameters.GURALP_MINISEED_ARCHIVE
+    soharchive = args.soh_archive if args.soh_archive is not None \
+        else default_parameters.APOLLO_SOH_ARCHIVE if apollo \
+        else default_parameters.GURALP_SOH_ARCHIVE
+    thresholds = ConfigParser()
+    thresholds.read(args.thresholds)
 
-#     stationmetricdata = gather_stats(
-#         start=startdate,
-#         stop=enddate,
-#         metrics=metrics
-#     )
+    results = run_daily_verification(
+        ispaqloc=args.ispaqlocation,
+        metrics=args.metrics,
+        day=day,
+        pfile=args.preference_file,
+        thresholds=thresholds,
+        typeofinstrument=args.typeofinstrument,
+        miniseedarchive=miniseedarchive,
+        latencyFiles=latencyFiles,
+        soharchive=soharchive,
+        station_xml=args.station_xml,
+        outputdir=args.outputdir,
+        metadata_cache=MetadataCache(args.metadata_cache),
+        workers=args.workers)
 
-#     bulk_report(
-#         stationmetricdata,
-#         args.HDF5,
-#         args.outputdirectory,
-#         startdate
-#     )
-
-
-# # if __name__ == "__main__":
-# #     main()
+    failed_stations = [station for station, error in results.items()
+                       if error is not None]
+    logging.info(f'{len(results) - len(failed_stations)} of {len(results)} \
+stations validated for {day}')
+    if failed_stations:
+        logging.error(f'Failed stations: {", ".join(failed_stations)}')
+        sys.exit(1)
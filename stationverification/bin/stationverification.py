@@ -47,6 +47,32 @@ default ispaq config file.
                         Which 'directory' in S3 to save to
     -c STATIONCONFIG, --stationconfig STATIONCONFIG
                         Path to the file that contains station information.
+    -w LATENCYWORKERS, --latency_workers LATENCYWORKERS
+                        The number of processes used to read the latency
+                        files in parallel. Default: 1
+    --soh_workers SOHWORKERS
+                        The number of processes used to read the SOH files
+                        in parallel. Default: 1
+    --plot_workers PLOTWORKERS
+                        The number of processes used to draw the plots in
+                        parallel. Default: 1
+    --ispaq_workers ISPAQWORKERS
+                        The number of ISPAQ processes run at a time, each
+                        over a shard of the verification period. Default: 1
+    --ispaq_shard_days ISPAQSHARDDAYS
+                        The number of days of the shards of the verification
+                        period ISPAQ is run over. Default: 1
+    --latency_cache LATENCYCACHE
+                        Directory in which to cache the latency files already
+                        read, so that only the new or changed files are read
+                        on the next runs. Default: no cache
+    --metadata_cache METADATACACHE
+                        Directory in which to cache the stationXML converted
+                        for ISPAQ, so that it is only converted again once
+                        changed. Default: ~/.cache/stationverification/metadata
+    --station_resp_only
+                        Only write the RESP files of the channels of the
+                        station, rather than those of all the stations
 
 
 Functions:
@@ -57,20 +83,11 @@ main()
 '''
 import logging
 from multiprocessing import Process, Queue
-from datetime import timedelta
-from stationverification.utilities.cleanup_directory import cleanup_directory
 from stationverification.utilities.fetch_arguments import fetch_arguments
 from stationverification.utilities.generate_latency_results import \
     generate_latency_results
-from stationverification.utilities.generate_plots import (PlotParameters,
-                                                          plot_metrics)
-from stationverification.utilities.generate_report import gather_stats, report
-from stationverification.utilities.handle_running_ispaq_command import \
-    handle_running_ispaq_command
-from stationverification.utilities.upload_results_to_s3 import \
-    upload_results_to_s3
-from stationverification.utilities.timely_availability_plot import \
-    timely_availability_plot
+from stationverification.utilities.validation_stages import \
+    run_ispaq_stage, run_report_stage
 
 
 def main():
@@ -102,109 +119,22 @@ def main():
                                                          fallback=3),
                                                user_inputs.location,
                                                queue,
+                                               user_inputs.latency_workers,
+                                               user_inputs.latency_cache,
+                                               user_inputs.plot_workers,
                                                ))
     process_one.start()
     # Run ISPAQ
     logging.info("Process 2: Generating ISPAQ results..")
-    process_two = Process(
-        target=handle_running_ispaq_command, args=(
-            user_inputs.ispaqloc,
-            user_inputs.metrics,
-            user_inputs.startdate,
-            user_inputs.enddate,
-            user_inputs.pfile,
-            user_inputs.pdfinterval,
-            user_inputs.miniseedarchive,
-            user_inputs.network,
-            user_inputs.station,
-            user_inputs.location,
-            user_inputs.station_url,
-            user_inputs.stationconf,
-        ))
+    process_two = Process(target=run_ispaq_stage, args=(user_inputs,))
     process_two.start()
-    latency_results = queue.get()
-    combined_latency_dataframe_for_all_days_dataframe,\
-        array_of_daily_latency_dataframes_all_latencies = latency_results
+    # The latencies are shared through a store of memory-mapped arrays, of
+    # which only the directory is sent through the queue
+    latency_store_directory = queue.get()
     process_one.join()
     logging.info("Finished Process 1: Generating Latency results")
     process_two.join()
     logging.info("Finished Process 2: Generating ISPAQ results")
 
-    # Read the files generated from ISPAQ and populate the dictionary object
-    if user_inputs.stationconf is None:
-        if user_inputs.location is None:
-            snlc = f'{user_inputs.network}.{user_inputs.station}.x.Hxx'
-        else:
-            snlc = f'{user_inputs.network}.\
-{user_inputs.station}.{user_inputs.location}.Hxx'
-    else:
-        snlc = f'{user_inputs.station}'
-
-    stationMetricData = gather_stats(
-        snlc=snlc,
-        start=user_inputs.startdate,
-        stop=user_inputs.enddate,
-        metrics=user_inputs.metrics)
-
-    for channel in stationMetricData.get_channels(
-        network=user_inputs.network,
-        station=user_inputs.station
-    ):
-        plot_metrics(
-            PlotParameters(network=user_inputs.network,
-                           station=user_inputs.station,
-                           location=user_inputs.location,
-                           channel=channel,
-                           stationMetricData=stationMetricData,
-                           start=user_inputs.startdate,
-                           stop=user_inputs.enddate)
-        )
-    logging.info("Generating timely availability plot..")
-    timely_availability_plot(
-        latencies=array_of_daily_latency_dataframes_all_latencies,
-        stationMetricData=stationMetricData,
-        station=user_inputs.station,
-        startdate=user_inputs.startdate,
-        enddate=user_inputs.enddate,
-        network=user_inputs.network,
-        timely_threshold=user_inputs.thresholds
-        .getfloat('thresholds',
-                  'data_timeliness',
-                  fallback=3),
-        location=user_inputs.location
-    )
-    logging.info("Generating report..")
-
-    report(
-        combined_latency_dataframe_for_all_days_dataframe=combined_latency_dataframe_for_all_days_dataframe,  # noqa
-        typeofinstrument=user_inputs.typeofinstrument,
-        network=user_inputs.network,
-        station=user_inputs.station,
-        location=user_inputs.location,
-        stationmetricdata=stationMetricData,
-        start=user_inputs.startdate,
-        end=user_inputs.enddate,
-        thresholds=user_inputs.thresholds,
-        soharchive=user_inputs.soharchive,
-    )
-
-    # Delete temporary files and links and package the output in a tarball
-    logging.info("Cleaning up directory..")
-    cleanup_directory(
-        network=user_inputs.network,
-        station=user_inputs.station,
-        startdate=user_inputs.startdate,
-        enddate=user_inputs.enddate,
-        outputdir=user_inputs.outputdir)
-
-    if user_inputs.uploadresultstos3 is True:
-        if user_inputs.startdate == user_inputs.enddate - timedelta(days=1):
-            validation_output_directory = f'{user_inputs.outputdir}/{user_inputs.network}/{user_inputs.station}/\
-    {user_inputs.startdate}'
-        else:
-            validation_output_directory = f'{user_inputs.outputdir}/{user_inputs.network}/{user_inputs.station}/\
-    {user_inputs.startdate}-{user_inputs.enddate}'
-
-        upload_results_to_s3(path_of_folder_to_upload=validation_output_directory,  # noqa
-                             bucketName=user_inputs.bucketName,
-                             s3directory=user_inputs.s3directory)
+    # Plot, check the SOH channels and write the report
+    run_report_stage(user_inputs, latency_store_directory)
@@ -31,6 +31,16 @@ optional arguments:
                         To which bucket to upload in S3
     -B S3PATHTOSAVETO, --s3bucketpathtosaveto S3PATHTOSAVETO
                         Which 'directory' in S3 to save to
+    -w LATENCYWORKERS, --latency_workers LATENCYWORKERS
+                        The number of processes used to read the latency
+                        files in parallel. Default: 1
+    --plot_workers PLOTWORKERS
+                        The number of processes used to draw the plots in
+                        parallel. Default: 1
+    --latency_cache LATENCYCACHE
+                        Directory in which to cache the latency files already
+                        read, so that only the new or changed files are read
+                        on the next runs. Default: no cache
 Functions:
 ----------
 main()
@@ -73,7 +83,10 @@ def main():
                              timely_threshold=user_inputs.thresholds
                              .getfloat(
                                  'thresholds', 'data_timeliness',
-                                 fallback=3))
+                                 fallback=3),
+                             workers=user_inputs.latency_workers,
+                             cache=user_inputs.latency_cache,
+                             plot_workers=user_inputs.plot_workers)
     logging.info("Cleaning up directory..")
 
     cleanup_directory_after_latency_call(startdate=user_inputs.startdate,
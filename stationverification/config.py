@@ -1,5 +1,6 @@
 # flake8:noqa
 from functools import lru_cache
+from pathlib import Path
 from typing import Any
 from pydantic import BaseSettings
 from stationverification import CONFIG, ISPAQ_PREF
@@ -24,6 +25,32 @@ class BaseAppSettings(BaseSettings):
     S3_BUCKET_NAME: str = "eew-validation-data"
     S3_DIRECTORY: str = "validation_results"
     OUTPUT_DIRECTORY: str = "/validation"
+    LATENCY_WORKERS: int = 1
+    SOH_WORKERS: int = 1
+    # The plots are drawn by PLOT_WORKERS processes
+    PLOT_WORKERS: int = 1
+    # ISPAQ is run in shards of ISPAQ_SHARD_DAYS days, ISPAQ_WORKERS at a
+    # time, when given more than one worker
+    ISPAQ_WORKERS: int = 1
+    ISPAQ_SHARD_DAYS: int = 1
+    # The batches of stations, the stages of which share a pool of processes
+    BATCH_WORKERS: int = 4
+    BATCH_LATENCY_LIMIT: int = 2
+    BATCH_ISPAQ_LIMIT: int = 2
+    BATCH_REPORT_LIMIT: int = 2
+    BATCH_DIRECTORY: str = "batchverification"
+    # The daily validation of all the stations
+    DAILY_METRICS: str = "eew_no_psd"
+    DAILY_WORKERS: int = 1
+    # The latency cache is only used when given a directory
+    LATENCY_CACHE_DIRECTORY: Any = None
+    LATENCY_CACHE_SIZE: int = 1024 ** 3
+    # The stationXML converted for ISPAQ, keyed by its content
+    METADATA_CACHE_DIRECTORY: str = str(
+        Path.home() / '.cache' / 'stationverification' / 'metadata')
+    # Whether to write the RESP files of the validated station only, rather
+    # than those of all the stations of the stationXML
+    STATION_RESP_ONLY: bool = False
 
     # Default Config Files
 
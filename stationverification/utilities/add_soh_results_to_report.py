@@ -15,24 +15,32 @@ def add_soh_results_to_report(network: str,
                               directory: str,
                               typeofinstrument: str,
                               json_dict: dict,
-                              thresholds: ConfigParser):
+                              thresholds: ConfigParser,
+                              workers: int = 1,
+                              output_directory: str =
+                              './stationvalidation_output'):
     clock_locked_data = None
     clock_offset_data = None
+    # The SOH files of all the channels are found in one pass over the archive
+    sohfiles = sohmetrics.getsohfiles_by_channel(
+        network=network,
+        station=station,
+        location=location,
+        startdate=startdate,
+        enddate=enddate,
+        channels=["LCE", "GST", "LCQ", "GNS"],
+        directory=directory)
+    # The days of all the channels are decoded in parallel, a channel with a
+    # day that could not be read holding the StreamError raised. The timing
+    # quality and the satellites are not plotted from their samples, so only
+    # their statistics are read
+    soh_data = sohmetrics.read_soh_channels_data(
+        sohfiles, workers=workers, stats_only=['LCQ', 'GNS'])
     try:
-        clock_offset_sohfiles = sohmetrics.getsohfiles(network=network,
-                                                       station=station,
-                                                       location=location,
-                                                       startdate=startdate,
-                                                       enddate=enddate,
-                                                       channel="LCE",
-                                                       directory=directory)
-        clock_offset_merged_streams =\
-            sohmetrics.get_list_of_streams_from_list_of_files(
-                clock_offset_sohfiles)
-        clock_offset_data = sohmetrics.get_list_of_data_from_list_of_streams(
-            clock_offset_merged_streams)
+        clock_offset_data = sohmetrics.pick_soh_channel_data(
+            soh_data, 'LCE')
         clock_offset_results = sohmetrics.check_clock_offset(
-            list_of_streams=clock_offset_merged_streams,
+            list_of_streams=clock_offset_data,
             threshold=thresholds.getfloat(
                 'thresholds', 'clock_offset', fallback=1),
             startdate=startdate)
@@ -50,21 +58,10 @@ def add_soh_results_to_report(network: str,
             'LCE data does not exist. Skipping clock offset metric.')
 
     try:
-        check_clock_locked_sohfiles = \
-            sohmetrics.getsohfiles(network=network,
-                                   station=station,
-                                   location=location,
-                                   startdate=startdate,
-                                   enddate=enddate,
-                                   channel="GST",
-                                   directory=directory)
-        check_clock_locked_merged_streams =\
-            sohmetrics.get_list_of_streams_from_list_of_files(
-                check_clock_locked_sohfiles)
-        clock_locked_data = sohmetrics.get_list_of_data_from_list_of_streams(
-            check_clock_locked_merged_streams)
+        clock_locked_data = sohmetrics.pick_soh_channel_data(
+            soh_data, 'GST')
         clock_locked_results = sohmetrics.check_clock_locked(
-            list_of_streams=check_clock_locked_merged_streams,
+            list_of_streams=clock_locked_data,
             threshold=thresholds.getfloat(
                 'thresholds', 'clock_locked', fallback=6),
             startdate=startdate
@@ -86,31 +83,25 @@ def add_soh_results_to_report(network: str,
                           station=station,
                           startdate=startdate,
                           enddate=enddate,
-                          results=(clock_locked_data, clock_offset_data),
+                          results=(clock_locked_data.get_days(),
+                                   clock_offset_data.get_days()),
                           threshold=thresholds.getfloat(
                               'thresholds', 'clock_offset', fallback=1),
-                          location=location
+                          location=location,
+                          output_directory=output_directory
                           )
 
     try:
-        timing_quality_sohfiles = sohmetrics.getsohfiles(network=network,
-                                                         station=station,
-                                                         location=location,
-                                                         startdate=startdate,
-                                                         enddate=enddate,
-                                                         channel="LCQ",
-                                                         directory=directory)
-        timing_quality_merged_streams =\
-            sohmetrics.get_list_of_streams_from_list_of_files(
-                timing_quality_sohfiles)
+        timing_quality_data = sohmetrics.pick_soh_channel_data(
+            soh_data, 'LCQ')
         results = sohmetrics.check_timing_quality(
-            list_of_streams=timing_quality_merged_streams,
+            list_of_streams=timing_quality_data,
             threshold=thresholds.getfloat(
                 'thresholds', 'timing_quality', fallback=70.0),
             startdate=startdate, enddate=enddate, network=network,
             station=station,
-            location=location
-
+            location=location,
+            output_directory=output_directory
         )
 
         if results is not None:
@@ -127,19 +118,10 @@ def add_soh_results_to_report(network: str,
             'LCQ data does not exist. Skipping timing quality metric.')
 
     try:
-        check_number_of_satellites_sohfiles = \
-            sohmetrics.getsohfiles(network=network,
-                                   station=station,
-                                   location=location,
-                                   startdate=startdate,
-                                   enddate=enddate,
-                                   channel="GNS",
-                                   directory=directory)
-        check_number_of_satellites_merged_streams =\
-            sohmetrics.get_list_of_streams_from_list_of_files(
-                check_number_of_satellites_sohfiles)
+        number_of_satellites_data = sohmetrics.pick_soh_channel_data(
+            soh_data, 'GNS')
         results = sohmetrics.check_number_of_satellites(
-            list_of_streams=check_number_of_satellites_merged_streams,
+            list_of_streams=number_of_satellites_data,
             threshold=thresholds.getfloat(
                 'thresholds', 'satellites_locked', fallback=6),
             startdate=startdate
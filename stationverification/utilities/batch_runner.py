@@ -0,0 +1,227 @@
+'''
+A module that validates a batch of stations, such as a whole deployment of
+new stations, in one run.
+
+The stages of the validation of every station, see validation_stages, are
+run as tasks on one bounded pool of processes. Each stage has its own limit
+of concurrent tasks, so that the ISPAQ runs, for instance, do not
+oversubscribe the host while the latency and report stages of other stations
+keep the rest of the pool busy.
+
+The stages write their outputs to paths relative to the current directory,
+so the tasks of each station run in a working directory of their own.
+'''
+import logging
+import os
+import shutil
+import threading
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, \
+    ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from stationverification.utilities.fetch_arguments import UserInput
+from stationverification.utilities.latency_store import LatencyStore
+from stationverification.utilities.validation_stages import \
+    run_ispaq_stage, run_latency_stage, run_report_stage
+
+STAGES = ['latency', 'ispaq', 'report']
+# The inputs holding paths, made absolute before changing directory
+PATH_INPUTS = ['pfile', 'latencyFiles', 'miniseedarchive', 'soharchive',
+               'station_url', 'stationconf', 'ispaqloc']
+
+
+class StageScheduler:
+    '''
+    Submits the tasks of the stages to an executor, keeping the number of
+    concurrent tasks of each stage under its limit
+
+    Parameters
+    ----------
+    executor: Executor
+        The pool running the tasks
+    limits: dict
+        The maximum number of concurrent tasks of each stage, the stages
+        without a limit only being limited by the pool
+    '''
+
+    def __init__(self, executor: Executor, limits: Dict[str, int]):
+        self.executor = executor
+        self.semaphores = {stage: threading.BoundedSemaphore(max(limit, 1))
+                           for stage, limit in limits.items()}
+
+    def submit(self, stage: str, function: Callable, *args) -> Future:
+        '''
+        Submits a task of a stage, waiting for the stage to be under its
+        limit
+
+        Returns
+        -------
+        Future
+            The future of the task
+        '''
+        semaphore = self.semaphores.get(stage)
+        if semaphore is None:
+            return self.executor.submit(function, *args)
+        semaphore.acquire()
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            semaphore.release()
+            raise
+        future.add_done_callback(lambda _: semaphore.release())
+        return future
+
+
+def read_station_list(path: str) -> List[str]:
+    '''
+    Reads a station list file, with one NETWORK.STATION or
+    NETWORK.STATION.LOCATION per line. Blank lines and lines starting with #
+    are ignored
+    '''
+    with open(path) as station_list:
+        return [line.strip() for line in station_list
+                if line.strip() and not line.strip().startswith('#')]
+
+
+def get_station_inputs(user_inputs: UserInput, station: str) -> UserInput:
+    '''
+    Returns the inputs of the validation of a station of the batch
+
+    Parameters
+    ----------
+    user_inputs: UserInput
+        The inputs shared by all the stations of the batch
+    station: str
+        NETWORK.STATION or NETWORK.STATION.LOCATION
+
+    Returns
+    -------
+    UserInput
+        The inputs of the station, with absolute paths
+    '''
+    codes = station.split('.')
+    if len(codes) not in (2, 3) or not all(codes[:2]):
+        raise ValueError(
+            f'{station} is not NETWORK.STATION or NETWORK.STATION.LOCATION')
+    station_inputs = UserInput(user_inputs)
+    station_inputs['network'], station_inputs['station'] = codes[:2]
+    station_inputs['location'] = codes[2] if len(codes) == 3 and codes[2] \
+        else user_inputs.location
+    for name in PATH_INPUTS:
+        path = station_inputs.get(name)
+        if path is not None and os.path.exists(path):
+            station_inputs[name] = os.path.abspath(path)
+    station_inputs['outputdir'] = os.path.abspath(user_inputs.outputdir)
+    return station_inputs
+
+
+@contextmanager
+def working_directory(directory: str) -> Iterator[str]:
+    '''
+    Changes the current directory for the time of a task
+    '''
+    previous_directory = os.getcwd()
+    os.chdir(directory)
+    try:
+        yield directory
+    finally:
+        os.chdir(previous_directory)
+
+
+def run_in_directory(directory: str, function: Callable, *args):
+    '''
+    Runs a stage of a station in its working directory, in a process of the
+    pool
+    '''
+    with working_directory(directory):
+        return function(*args)
+
+
+def prepare_working_directory(directory: str) -> str:
+    '''
+    Creates the working directory of a station. The relative paths to the
+    data of the package, such as the default stationXML, are resolved
+    through a link to the package directory of the current directory
+    '''
+    os.makedirs(directory, exist_ok=True)
+    package_directory = os.path.abspath('stationverification')
+    link = os.path.join(directory, 'stationverification')
+    if os.path.isdir(package_directory) and not os.path.lexists(link):
+        os.symlink(package_directory, link)
+    return directory
+
+
+def run_batch(user_inputs: UserInput,
+              stations: List[str],
+              workers: int,
+              stage_limits: Dict[str, int],
+              directory: str) -> Dict[str, Optional[str]]:
+    '''
+    Validates a batch of stations
+
+    Parameters
+    ----------
+    user_inputs: UserInput
+        The inputs shared by all the stations
+    stations: list
+        The stations, as NETWORK.STATION or NETWORK.STATION.LOCATION
+    workers: int
+        The number of processes of the pool running the stages
+    stage_limits: dict
+        The maximum number of concurrent tasks of each of STAGES
+    directory: str
+        The directory holding the working directories of the stations
+
+    Returns
+    -------
+    dict
+        None for each station validated, or the error that stopped its
+        validation
+    '''
+    results: Dict[str, Optional[str]] = {}
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as pool, \
+            ThreadPoolExecutor(max_workers=max(len(stations), 1)) as threads:
+        scheduler = StageScheduler(pool, stage_limits)
+        pipelines = {
+            station: threads.submit(
+                validate_station, scheduler, user_inputs, station,
+                os.path.join(os.path.abspath(directory), station))
+            for station in stations}
+        for station, pipeline in pipelines.items():
+            try:
+                pipeline.result()
+                results[station] = None
+                logging.info(f'{station} validated')
+            except Exception as e:
+                logging.error(f'The validation of {station} failed: {e}')
+                results[station] = str(e) or type(e).__name__
+    return results
+
+
+def validate_station(scheduler: StageScheduler,
+                     user_inputs: UserInput,
+                     station: str,
+                     directory: str):
+    '''
+    Runs the stages of the validation of a station, the latency and ISPAQ
+    stages side by side, then the report stage
+    '''
+    station_inputs = get_station_inputs(user_inputs, station)
+    prepare_working_directory(directory)
+    latency = scheduler.submit('latency', run_in_directory, directory,
+                               run_latency_stage, station_inputs)
+    ispaq = scheduler.submit('ispaq', run_in_directory, directory,
+                             run_ispaq_stage, station_inputs)
+    try:
+        latency_store_directory = latency.result()
+    finally:
+        ispaq.exception()
+    if ispaq.exception() is not None:
+        LatencyStore(latency_store_directory).delete()
+        raise ispaq.exception()
+    scheduler.submit('report', run_in_directory, directory,
+                     run_report_stage, station_inputs,
+                     latency_store_directory).result()
+    shutil.rmtree(directory, ignore_errors=True)
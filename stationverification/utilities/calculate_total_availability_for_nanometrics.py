@@ -2,10 +2,14 @@
 
 import json
 import math
+from typing import List, Optional
 from stationverification.utilities import exceptions
 
 
-def calculate_total_availability_for_nanometrics(files: list) -> float:
+def calculate_total_availability_for_nanometrics(
+        files: list,
+        network: Optional[str] = None,
+        station: Optional[str] = None) -> float:
     '''
     Calculates the total availability percentage from a list Nanometric
     latency files
@@ -14,18 +18,18 @@ def calculate_total_availability_for_nanometrics(files: list) -> float:
     ---------
     files: list
         List of file paths to nanometric latency jsons
+    network: str
+        The network code of the station to average the channels of. Default:
+        the channels of every station in the files
+    station: str
+        The station code of the station to average the channels of. Default:
+        the channels of every station in the files
 
     Outputs
     -------
     Total Availability Percentage to two decimal places
     '''
-    # The sum of the average percent availability of all files, to be divided by the number of files to get the final average percent availiablity
-    total_sum_of_percent_availability_for_all_files = 0.
-    # The number of latency files. Used to get the average percent availability
-    number_of_latency_files = len(files)
-    # final_average_percent_availability_for_all_files = total_sum_of_percent_availability_for_all_files / number_of_latency_files
-    final_average_percent_availability_for_all_files = 0.
-
+    array_of_daily_percent_availability: List[dict] = []
     for file in files:
         # Getting the average percent availability for each file
         json_latency_file = open(file)
@@ -34,24 +38,87 @@ def calculate_total_availability_for_nanometrics(files: list) -> float:
         except json.decoder.JSONDecodeError:
             raise exceptions.LatencyFileError(
                 f'Problem detected in latency file: {file}')
-        array_of_channels_in_current_latency_file = latency_dict["availability"]
-        number_of_channels = len(latency_dict["availability"])
-        sum_of_percent_availability_for_all_channels = 0.
-        # Iterating over each channel, HNN, HNZ, and HNE, and getting the average percent availability
-        for current_channel in array_of_channels_in_current_latency_file:
-            sum_of_current_channels_percent_availability = 0
-            number_of_latency_objects_in_current_channel = \
-                len(current_channel["intervals"])
-            average_percent_availability_for_current_channel = 0.
-            for latency_object in current_channel["intervals"]:
-                sum_of_current_channels_percent_availability += \
-                    latency_object["percentAvailability"]
-            average_percent_availability_for_current_channel = sum_of_current_channels_percent_availability / \
+        json_latency_file.close()
+        availability = latency_dict["availability"]
+        # Only the channels of the station are averaged, as done by the
+        # validation
+        if network is not None and station is not None:
+            availability = [
+                current_channel for current_channel in availability
+                if is_station_id(current_channel["id"], network, station)]
+        array_of_daily_percent_availability.append(
+            get_percent_availability_per_channel(availability))
+    return calculate_total_availability_from_daily_percent_availability(
+        array_of_daily_percent_availability)
+
+
+def is_station_id(current_id: str, network: str, station: str) -> bool:
+    '''
+    Whether an availability id, "QW.QCC01.HNN" or "QW.QCC01.00.HNN" when it
+    has a location code, belongs to the network and station
+    '''
+    id_split = current_id.split('.')
+    return len(id_split) in (3, 4) and id_split[0] == network and \
+        id_split[1] == station
+
+
+def get_percent_availability_per_channel(availability: list) -> dict:
+    '''
+    Calculates the average percent availability of each channel of a
+    Nanometric latency file
+
+    Parameters
+    ---------
+    availability: list
+        The "availability" array of the latency json, holding the "id" and the
+        "intervals" of each channel
+
+    Outputs
+    -------
+    A dictionary of the average percent availability keyed by channel id
+    '''
+    percent_availability_per_channel = {}
+    # Iterating over each channel, HNN, HNZ, and HNE, and getting the average percent availability
+    for current_channel in availability:
+        number_of_latency_objects_in_current_channel = \
+            len(current_channel["intervals"])
+        sum_of_current_channels_percent_availability = sum(
+            latency_object["percentAvailability"]
+            for latency_object in current_channel["intervals"])
+        if number_of_latency_objects_in_current_channel > 0:
+            percent_availability_per_channel[current_channel["id"]] = \
+                sum_of_current_channels_percent_availability / \
                 number_of_latency_objects_in_current_channel
-            sum_of_percent_availability_for_all_channels += average_percent_availability_for_current_channel
+        else:
+            percent_availability_per_channel[current_channel["id"]] = 0.
+    return percent_availability_per_channel
+
+
+def calculate_total_availability_from_daily_percent_availability(
+        array_of_daily_percent_availability: List[dict]) -> float:
+    '''
+    Calculates the total availability percentage from the average percent
+    availability of the channels of each latency file
+
+    Parameters
+    ---------
+    array_of_daily_percent_availability: list
+        For each latency file, the dictionary returned by
+        get_percent_availability_per_channel
+
+    Outputs
+    -------
+    Total Availability Percentage to two decimal places
+    '''
+    # The sum of the average percent availability of all files, to be divided by the number of files to get the final average percent availiablity
+    total_sum_of_percent_availability_for_all_files = 0.
+    # The number of latency files. Used to get the average percent availability
+    number_of_latency_files = len(array_of_daily_percent_availability)
+    for percent_availability_per_channel in array_of_daily_percent_availability:
+        number_of_channels = len(percent_availability_per_channel)
         if number_of_channels > 0:
-            average_percent_availability_for_file = sum_of_percent_availability_for_all_channels / \
-                number_of_channels
+            average_percent_availability_for_file = sum(
+                percent_availability_per_channel.values()) / number_of_channels
         else:
             average_percent_availability_for_file = 0
         total_sum_of_percent_availability_for_all_files += average_percent_availability_for_file
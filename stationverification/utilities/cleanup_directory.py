@@ -7,6 +7,28 @@ from stationverification.utilities.change_name_of_ISPAQ_files \
     import change_name_of_ISPAQ_files
 
 
+def get_validation_output_directory(outputdir: str,
+                                    network: str,
+                                    station: str,
+                                    startdate: date,
+                                    enddate: date) -> str:
+    '''
+    Returns the directory the outputs of a validation are placed in,
+    {outputdir}/{network}/{station}/{startdate} for a single day, and
+    {outputdir}/{network}/{station}/{startdate}-{last day} otherwise
+
+    Parameters
+    ----------
+    enddate: date
+        The end date of the validation, non-inclusive
+    '''
+    if startdate == enddate - timedelta(days=1):
+        period = f'{startdate}'
+    else:
+        period = f'{startdate}-{enddate - timedelta(days=1)}'
+    return os.path.join(outputdir, network, station, period)
+
+
 def cleanup_directory(
     network: str,
     station: str,
@@ -36,12 +58,9 @@ def cleanup_directory(
 
     '''
     # Create the final directory that the data will be placed in
-    if startdate == enddate - timedelta(days=1):
-        validation_output_directory = f'{outputdir}/{network}/{station}/\
-{startdate}'
-    else:
-        validation_output_directory = f'{outputdir}/{network}/{station}/\
-{startdate}-{enddate - timedelta(days=1)}'
+    validation_output_directory = get_validation_output_directory(
+        outputdir=outputdir, network=network, station=station,
+        startdate=startdate, enddate=enddate)
     # Create the directory if it doesn't already exist
     if not os.path.isdir(validation_output_directory):
         subprocess.getoutput(
@@ -74,12 +93,9 @@ def cleanup_directory_after_latency_call(startdate: date,
                                          network: str,
                                          station: str,
                                          ):
-    if startdate == enddate - timedelta(days=1):
-        validation_output_directory = f'{outputdir}/{network}/{station}/\
-{startdate}'
-    else:
-        validation_output_directory = f'{outputdir}/{network}/{station}/\
-{startdate}-{enddate - timedelta(days=1)}'
+    validation_output_directory = get_validation_output_directory(
+        outputdir=outputdir, network=network, station=station,
+        startdate=startdate, enddate=enddate)
     # Create the directory if it doesn't already exist
     if not os.path.isdir(validation_output_directory):
         subprocess.getoutput(
@@ -10,6 +10,10 @@ def convert_array_of_latency_objects_into_array_of_dataframes(
                'startTime', 'data_latency')
     array_of_latency_dataframes: List[DataFrame] = []
     for latency_object in array_of_latencies:
+        # The latency readers already hand out dataframes for each day
+        if isinstance(latency_object, DataFrame):
+            array_of_latency_dataframes.append(latency_object)
+            continue
         array_of_latency_dataframes.append(pd.DataFrame(
             data=latency_object, index=columns).T)
     return array_of_latency_dataframes
@@ -0,0 +1,292 @@
+'''
+A module that validates a whole fleet of stations for a single day, as done
+every day for the stations of the verification facility.
+
+ISPAQ is run once for all the stations of the stationXML that have no report
+for the day yet, and the metrics of all the stations are loaded at once. The
+reports of the stations are then generated from that single load, each
+station being handed its own rows, and written to the dated archive layout
+of the validations, {outputdir}/{network}/{station}/{day}/. The station-days
+with a report already are skipped, so that the job can be run again cheaply
+after a failure.
+'''
+import logging
+import os
+import subprocess
+import tempfile
+
+from configparser import ConfigParser
+from datetime import date, timedelta
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from obspy import read_inventory
+
+from stationverification.utilities.generate_report import \
+    StationMetricData, gather_stats, get_report_filename, report
+from stationverification.utilities.get_latencies import get_latencies
+from stationverification.utilities.get_latency_files import get_latency_files
+from stationverification.utilities.metadata_cache import MetadataCache
+from stationverification.utilities.pool_map import pool_map
+from stationverification.utilities.prepare_ispaq import \
+    redirect_ispaq_outputs
+
+# The alias of the stations of the fleet in the ISPAQ preference file, which
+# is part of the names of the ISPAQ csv files
+FLEET_ALIAS = 'dailyverification'
+
+
+def get_fleet_stations(station_xml: str) -> List[Tuple[str, str]]:
+    '''
+    Returns the (network, station) of each station of a stationXML file
+    '''
+    inventory = read_inventory(station_xml)
+    return list(dict.fromkeys(
+        (network.code, station.code)
+        for network in inventory for station in network))
+
+
+def get_daily_report_directory(outputdir: str,
+                               network: str,
+                               station: str,
+                               day: date) -> str:
+    '''
+    Returns the directory of the results of a station for a day, as laid out
+    by cleanup_directory
+    '''
+    return f'{outputdir}/{network}/{station}/{day}'
+
+
+def is_station_day_completed(outputdir: str,
+                             network: str,
+                             station: str,
+                             day: date) -> bool:
+    '''
+    Whether the report of a station for a day was already written
+    '''
+    return os.path.isfile(
+        f'{get_daily_report_directory(outputdir, network, station, day)}/'
+        f'{get_report_filename(network, station, day, day + timedelta(1))}')
+
+
+def prepare_fleet_preference_file(pfile: str,
+                                  stations: List[Tuple[str, str]],
+                                  miniseedarchive: str,
+                                  station_xml: str,
+                                  resp_dir: str,
+                                  tempfolder: str) -> str:
+    '''
+    Writes an ISPAQ preference file for the stations of the fleet, under the
+    alias FLEET_ALIAS, with the outputs of ISPAQ in the temporary folder
+
+    Parameters
+    ----------
+    pfile: str
+        The path to the base preference file
+    stations: list
+        The (network, station) of the stations to run ISPAQ for
+    miniseedarchive: str
+        The path to the miniseed archive
+    station_xml: str
+        The path to the stationXML file of the stations
+    resp_dir: str
+        The directory of the RESP files of the stations
+    tempfolder: str
+        The folder in which to write the preference file and the outputs of
+        ISPAQ
+
+    Returns
+    -------
+    str:
+        The path to the preference file
+    '''
+    # Read in the preference file as a template
+    with open(pfile, "r") as preffile:
+        contents = preffile.readlines()
+
+    # Insert the alias of the fleet right after the line "SNCLs:"
+    linenum = contents.index('SNCLs:\n') + 1
+    snlcs = ', '.join(f'{network}.{station}.*.H??'
+                      for network, station in stations)
+    contents.insert(linenum, f'  {FLEET_ALIAS}: {snlcs}\n')
+
+    # Configure ispaq to use local files.
+    linenum = contents.index('Data_Access:\n') + 2
+    contents[linenum] = f'  dataselect_url:  {miniseedarchive}\n'
+    contents[linenum+1] = f'  station_url:  {station_xml}\n'
+    contents[linenum+2] = '  event_url:  IRIS\n'
+    contents[linenum+3] = f'  resp_dir:  {resp_dir}\n'
+
+    # Write the outputs of ISPAQ to the temporary folder
+    contents = redirect_ispaq_outputs(contents, tempfolder)
+
+    with open(f'{tempfolder}/pref.txt', 'w+') as temppref:
+        temppref.write("".join(contents))
+    return f'{tempfolder}/pref.txt'
+
+
+def run_fleet_ispaq(ispaqloc: str,
+                    metrics: str,
+                    day: date,
+                    pfile: str,
+                    miniseedarchive: str,
+                    station_xml: str,
+                    stations: List[Tuple[str, str]],
+                    tempfolder: str,
+                    metadata_cache: MetadataCache) -> StationMetricData:
+    '''
+    Runs ISPAQ once for all the stations for a day, and loads the metrics of
+    all the stations at once
+
+    Returns
+    -------
+    StationMetricData:
+        The metrics of all the stations
+    '''
+    preffile = prepare_fleet_preference_file(
+        pfile=pfile,
+        stations=stations,
+        miniseedarchive=miniseedarchive,
+        station_xml=station_xml,
+        resp_dir=metadata_cache.get_resp_directory(station_xml),
+        tempfolder=tempfolder)
+    cmd = f'{ispaqloc} -M {metrics} -S {FLEET_ALIAS} --starttime={day} \
+--endtime={day + timedelta(days=1)} -P {preffile}'
+    print("ISPAQ:", cmd)
+    proc = subprocess.Popen(
+        cmd,
+        shell=True
+    )
+    proc.wait()
+    return gather_stats(start=day,
+                        snlc=FLEET_ALIAS,
+                        stop=day + timedelta(days=1),
+                        metrics=metrics,
+                        ispaq_output_directory=tempfolder)
+
+
+def report_station_day(station: Tuple[str, str, StationMetricData],
+                       typeofinstrument: str,
+                       day: date,
+                       latencyFiles: str,
+                       soharchive: str,
+                       thresholds: ConfigParser,
+                       outputdir: str) -> Optional[str]:
+    '''
+    Writes the report of a station for a day, from its own metric data
+
+    Returns
+    -------
+    str:
+        None once the report is written, or the error that stopped it
+    '''
+    network, code, stationmetricdata = station
+    enddate = day + timedelta(days=1)
+    # The station-day is left pending, to be validated on the next run
+    if stationmetricdata.results.empty:
+        logging.error(f'No ISPAQ results for {network}.{code} for {day}')
+        return 'No ISPAQ results'
+    try:
+        try:
+            latencies, _, _ = get_latencies(
+                typeofinstrument=typeofinstrument,
+                files=get_latency_files(
+                    typeofinstrument=typeofinstrument, network=network,
+                    path=latencyFiles, station=code, startdate=day,
+                    enddate=enddate),
+                network=network,
+                station=code,
+                startdate=day,
+                enddate=enddate)
+        except FileNotFoundError as e:
+            logging.error(e)
+            latencies = None
+        report(combined_latency_dataframe_for_all_days_dataframe=latencies,
+               typeofinstrument=typeofinstrument,
+               network=network,
+               station=code,
+               stationmetricdata=stationmetricdata,
+               start=day,
+               end=enddate,
+               thresholds=thresholds,
+               soharchive=soharchive,
+               output_directory=get_daily_report_directory(
+                   outputdir, network, code, day))
+    except Exception as e:
+        logging.error(f'The report of {network}.{code} for {day} failed: {e}')
+        return str(e) or type(e).__name__
+    return None
+
+
+def run_daily_verification(ispaqloc: str,
+                           metrics: str,
+                           day: date,
+                           pfile: str,
+                           thresholds: ConfigParser,
+                           typeofinstrument: str,
+                           miniseedarchive: str,
+                           latencyFiles: str,
+                           soharchive: str,
+                           station_xml: str,
+                           outputdir: str,
+                           metadata_cache: MetadataCache,
+                           workers: int = 1) -> Dict[str, Optional[str]]:
+    '''
+    Validates the stations of a stationXML file for a day
+
+    Parameters
+    ----------
+    day: date
+        The day to validate, usually yesterday
+    station_xml: str
+        The path to the stationXML file of the fleet
+    outputdir: str
+        The root of the dated archive of the reports
+    metadata_cache: MetadataCache
+        The cache of the RESP files converted from the stationXML
+    workers: int
+        The number of processes generating the reports of the stations
+
+    Returns
+    -------
+    dict:
+        For each NETWORK.STATION validated, None if its report was written,
+        or the error that stopped it. The stations with a report already are
+        not included
+    '''
+    stations = get_fleet_stations(station_xml)
+    pending = [(network, station) for network, station in stations
+               if not is_station_day_completed(outputdir, network, station,
+                                               day)]
+    logging.info(f'{len(stations) - len(pending)} of {len(stations)} \
+stations already validated for {day}')
+    if not pending:
+        return {}
+
+    with tempfile.TemporaryDirectory(prefix='dailyverification') as \
+            tempfolder:
+        stationmetricdata = run_fleet_ispaq(
+            ispaqloc=ispaqloc,
+            metrics=metrics,
+            day=day,
+            pfile=pfile,
+            miniseedarchive=miniseedarchive,
+            station_xml=station_xml,
+            stations=pending,
+            tempfolder=tempfolder,
+            metadata_cache=metadata_cache)
+
+    # Each station is handed its own rows of the metrics of the fleet
+    errors = pool_map(
+        partial(report_station_day,
+                typeofinstrument=typeofinstrument,
+                day=day,
+                latencyFiles=latencyFiles,
+                soharchive=soharchive,
+                thresholds=thresholds,
+                outputdir=outputdir),
+        [(network, station, stationmetricdata.select(network, station))
+         for network, station in pending],
+        workers=workers)
+    return {f'{network}.{station}': error
+            for (network, station), error in zip(pending, errors)}
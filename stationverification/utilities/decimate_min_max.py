@@ -0,0 +1,63 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def decimate_min_max(x: np.ndarray,
+                     y: np.ndarray,
+                     buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Reduces the points of a line to the first, last, min and max points of
+    each of a number of buckets of equal width along the x axis, as done by
+    the M4 aggregation. With a bucket per pixel, the line drawn from the
+    reduced points covers the same pixels as the line drawn from all of them,
+    and as the max of every bucket is kept, every value above a threshold
+    remains visible.
+
+    Parameters
+    ----------
+    x: np.ndarray
+        The x values, numbers or datetime64
+    y: np.ndarray
+        The y values
+    buckets: int
+        The number of buckets, usually the width of the plot in pixels
+
+    Returns
+    -------
+    tuple
+        The x and y values of the points kept, in their original order
+    '''
+    y = np.asarray(y)
+    # Lines with at most 4 points per bucket are kept as they are
+    if len(y) <= 4 * max(buckets, 1):
+        return x, y
+    positions = np.asarray(x)
+    if np.issubdtype(positions.dtype, np.datetime64):
+        positions = positions.astype('datetime64[ns]').astype(np.int64)
+    positions = positions.astype(float)
+    start = positions.min()
+    span = positions.max() - start
+    if span > 0:
+        bucket = np.minimum(
+            ((positions - start) / span * buckets).astype(np.int64),
+            buckets - 1)
+    else:
+        bucket = np.zeros(len(y), dtype=np.int64)
+
+    # The first and last point of each bucket
+    _, first = np.unique(bucket, return_index=True)
+    _, last = np.unique(bucket[::-1], return_index=True)
+    last = len(y) - 1 - last
+    # The min and max point of each bucket, the points being sorted by
+    # bucket then value. NaN are sorted last for the min and first for the
+    # max, so they are only picked in buckets holding no number
+    missing = np.isnan(y.astype(float))
+    order = np.lexsort((np.where(missing, np.inf, y), bucket))
+    bounds = np.flatnonzero(np.diff(bucket[order])) + 1
+    lowest = order[np.concatenate(([0], bounds))]
+    order = np.lexsort((np.where(missing, -np.inf, y), bucket))
+    highest = order[np.concatenate((bounds - 1, [len(y) - 1]))]
+
+    kept = np.unique(np.concatenate((first, last, lowest, highest)))
+    return np.asarray(x)[kept], y[kept]
@@ -36,3 +36,17 @@ class MissingConfigOrStationxml(Exception):
     Exception to be raised if either the stationXML or stationconfig file
     are not included
     '''
+
+
+class MSeedRecordError(Exception):
+    '''
+    Exception raised for the miniSEED records the SOH record reader does not
+    support, the files holding them being read with obspy instead
+    '''
+
+
+class MetadataConversionError(Exception):
+    '''
+    Exception raised if a stationXML file could not be converted to the
+    dataless SEED the RESP files of ISPAQ are written from
+    '''
@@ -1,10 +1,14 @@
 import argparse
+import os
 from configparser import ConfigParser
+from typing import Optional
 
 from dateutil import parser as dateparser  # type: ignore
 
 from stationverification.utilities import exceptions
 from stationverification.config import get_default_parameters
+from stationverification.utilities.latency_cache import LatencyCache
+from stationverification.utilities.metadata_cache import MetadataCache
 
 
 class UserInput(dict):
@@ -88,8 +92,58 @@ class UserInput(dict):
     def stationconf(self) -> list:
         return self["stationconf"]
 
+    @property
+    def latency_workers(self) -> int:
+        return self["latency_workers"]
+
+    @property
+    def soh_workers(self) -> int:
+        return self["soh_workers"]
+
+    @property
+    def plot_workers(self) -> int:
+        return self["plot_workers"]
+
+    @property
+    def ispaq_workers(self) -> int:
+        return self["ispaq_workers"]
+
+    @property
+    def ispaq_shard_days(self) -> int:
+        return self["ispaq_shard_days"]
+
+    @property
+    def latency_cache(self) -> Optional[LatencyCache]:
+        return self["latency_cache"]
+
+    @property
+    def metadata_cache(self) -> MetadataCache:
+        return self["metadata_cache"]
+
+    @property
+    def station_resp_only(self) -> bool:
+        return self["station_resp_only"]
+
 
 def fetch_arguments() -> UserInput:
+    return get_user_inputs(get_arguments_parser().parse_args())
+
+
+def get_arguments_parser(station_required: bool = True) -> \
+        argparse.ArgumentParser:
+    '''
+    Returns the parser of the arguments of a validation
+
+    Parameters
+    ----------
+    station_required: bool
+        Whether the network and station are required, which they are not for
+        the batches of stations
+
+    Returns
+    -------
+    argparse.ArgumentParser
+    '''
     # Create argparse object to handle user arguments
     argsparser = argparse.ArgumentParser()
     argsparser.add_argument(
@@ -177,7 +231,7 @@ Default: eew_test',
         '-N',
         '--network',
         help='The network code. I.e: QW',
-        required=True,
+        required=station_required,
         type=str,
     )
     argsparser.add_argument(
@@ -211,7 +265,7 @@ span',
         '-S',
         '--station',
         help='The station code. I.e: QCC02',
-        required=True,
+        required=station_required,
         type=str,
     )
     argsparser.add_argument(
@@ -227,6 +281,58 @@ span',
         required=True,
         type=str
     )
+    argsparser.add_argument(
+        '-w',
+        '--latency_workers',
+        help='The number of processes used to read the latency files in \
+parallel. Default: 1',
+        type=int
+    )
+    argsparser.add_argument(
+        '--soh_workers',
+        help='The number of processes used to read the SOH files in \
+parallel. Default: 1',
+        type=int
+    )
+    argsparser.add_argument(
+        '--plot_workers',
+        help='The number of processes used to draw the plots in parallel. \
+Default: 1',
+        type=int
+    )
+    argsparser.add_argument(
+        '--ispaq_workers',
+        help='The number of ISPAQ processes run at a time, each over a shard \
+of the verification period. Default: 1',
+        type=int
+    )
+    argsparser.add_argument(
+        '--ispaq_shard_days',
+        help='The number of days of the shards of the verification period \
+ISPAQ is run over, when run by more than one worker. Default: 1',
+        type=int
+    )
+    argsparser.add_argument(
+        '--latency_cache',
+        help='Directory in which to cache the latency files already read, \
+so that only the new or changed files are read on the next runs. Default: no \
+cache',
+        type=str
+    )
+    argsparser.add_argument(
+        '--metadata_cache',
+        help='Directory in which to cache the stationXML converted for ISPAQ, \
+so that it is only converted again once changed. Default: \
+~/.cache/stationverification/metadata',
+        type=str
+    )
+    argsparser.add_argument(
+        '--station_resp_only',
+        help='Only write the RESP files of the channels of the station, \
+rather than those of all the stations of the stationXML',
+        action='store_true',
+        default=None
+    )
     argsparser.add_argument(
         '-U',
         '--uploadresultstos3',
@@ -234,8 +340,14 @@ span',
         automatically uploaded to s3 bucket',
         type=bool
     )
+    return argsparser
+
 
-    args = argsparser.parse_args()
+def get_user_inputs(args: argparse.Namespace) -> UserInput:
+    '''
+    Returns the inputs of a validation, from the parsed arguments and the
+    default parameters
+    '''
     default_parameters = get_default_parameters()
 
     # Parameters required on every script call, with no default values
@@ -288,6 +400,35 @@ span',
         else default_parameters.PDF_INTERVAL
     bucketName = args.s3bucketname if args.s3bucketname is not None\
         else default_parameters.S3_BUCKET_NAME
+    latency_workers = args.latency_workers \
+        if args.latency_workers is not None\
+        else default_parameters.LATENCY_WORKERS
+    soh_workers = args.soh_workers \
+        if args.soh_workers is not None\
+        else default_parameters.SOH_WORKERS
+    plot_workers = args.plot_workers \
+        if args.plot_workers is not None\
+        else default_parameters.PLOT_WORKERS
+    ispaq_workers = args.ispaq_workers \
+        if args.ispaq_workers is not None\
+        else default_parameters.ISPAQ_WORKERS
+    ispaq_shard_days = args.ispaq_shard_days \
+        if args.ispaq_shard_days is not None\
+        else default_parameters.ISPAQ_SHARD_DAYS
+    latency_cache_directory = args.latency_cache \
+        if args.latency_cache is not None\
+        else default_parameters.LATENCY_CACHE_DIRECTORY
+    latency_cache = LatencyCache(
+        directory=latency_cache_directory,
+        max_size=default_parameters.LATENCY_CACHE_SIZE) \
+        if latency_cache_directory is not None else None
+
+    metadata_cache = MetadataCache(directory=os.path.abspath(
+        args.metadata_cache if args.metadata_cache is not None
+        else default_parameters.METADATA_CACHE_DIRECTORY))
+    station_resp_only = args.station_resp_only \
+        if args.station_resp_only is not None\
+        else default_parameters.STATION_RESP_ONLY
 
     # Optional parameters, with no default value
     uploadresultstos3 = args.uploadresultstos3
@@ -319,4 +460,12 @@ the enddate to the day after the startdate')
                      uploadresultstos3=uploadresultstos3,
                      bucketName=bucketName,
                      s3directory=s3directory,
-                     stationconf=stationconf)
+                     stationconf=stationconf,
+                     latency_workers=latency_workers,
+                     soh_workers=soh_workers,
+                     plot_workers=plot_workers,
+                     ispaq_workers=ispaq_workers,
+                     ispaq_shard_days=ispaq_shard_days,
+                     latency_cache=latency_cache,
+                     metadata_cache=metadata_cache,
+                     station_resp_only=station_resp_only)
@@ -5,14 +5,15 @@ from typing import Any, Optional
 from pandas.core.frame import DataFrame
 from stationverification.utilities.\
     calculate_total_availability_for_nanometrics import \
-    calculate_total_availability_for_nanometrics
-from stationverification.utilities.\
-    convert_array_of_latency_objects_into_array_of_dataframes import \
-    convert_array_of_latency_objects_into_array_of_dataframes
+    calculate_total_availability_from_daily_percent_availability
 from stationverification.utilities.generate_CSV_from_failed_latencies import \
     generate_CSV_from_failed_latencies
 from stationverification.utilities.get_latencies import get_latencies
+from stationverification.utilities.get_latencies_from_apollo import \
+    get_latencies_and_availability_from_apollo
 from stationverification.utilities.get_latency_files import get_latency_files
+from stationverification.utilities.latency_cache import LatencyCache
+from stationverification.utilities.latency_store import LatencyStore
 from stationverification.utilities.latency_line_plot import latency_line_plot
 from stationverification.utilities.latency_log_plot import latency_log_plot
 
@@ -31,7 +32,11 @@ def generate_latency_results(typeofinstrument: str,
                              path: str,
                              timely_threshold: float,
                              location: Optional[str] = None,
-                             queue: Optional[Any] = False,) -> DataFrame:
+                             queue: Optional[Any] = False,
+                             workers: int = 1,
+                             cache: Optional[LatencyCache] = None,
+                             plot_workers: int = 1) -> \
+        DataFrame:
     logging.info("Fetching latency files..")
     try:
         files = get_latency_files(typeofinstrument=typeofinstrument,
@@ -41,39 +46,58 @@ def generate_latency_results(typeofinstrument: str,
                                   enddate=enddate)
         logging.info("Populating latency data..")
 
-        # Gather the latency information for the station
-        combined_latency_dataframe_for_all_days_dataframe, \
-            array_of_daily_latency_objects_max_latency_only, \
-            array_of_daily_latency_objects_all_latencies = get_latencies(
-                typeofinstrument=typeofinstrument,
-                files=files,
-                network=network,
-                station=station,
-                startdate=startdate,
-                enddate=enddate)
+        # Gather the latency information for the station. Apollo files hold
+        # the availability as well, which is collected in the same pass
+        if typeofinstrument == "APOLLO":
+            combined_latency_dataframe_for_all_days_dataframe, \
+                array_of_daily_latency_objects_max_latency_only, \
+                array_of_daily_latency_objects_all_latencies, \
+                array_of_daily_percent_availability = \
+                get_latencies_and_availability_from_apollo(
+                    files=files,
+                    network=network,
+                    station=station,
+                    workers=workers,
+                    cache=cache)
+        else:
+            combined_latency_dataframe_for_all_days_dataframe, \
+                array_of_daily_latency_objects_max_latency_only, \
+                array_of_daily_latency_objects_all_latencies = get_latencies(
+                    typeofinstrument=typeofinstrument,
+                    files=files,
+                    network=network,
+                    station=station,
+                    startdate=startdate,
+                    enddate=enddate,
+                    workers=workers,
+                    cache=cache)
         # Produce latency plots
         total_availability = None
+        packet = None
         if typeofinstrument == "APOLLO":
             logging.info("Calculating total availability..")
-            total_availability = calculate_total_availability_for_nanometrics(
-                files)
-            logging.info("Generating daily latencies..")
-            array_of_daily_latency_dataframes_max_latency_only = \
-                convert_array_of_latency_objects_into_array_of_dataframes(
-                    array_of_latencies=array_of_daily_latency_objects_max_latency_only)  # noqa
-            logging.info("Generating all latencies dataframe..")
-            array_of_daily_latency_dataframes_all_latencies = \
-                convert_array_of_latency_objects_into_array_of_dataframes(
-                    array_of_latencies=array_of_daily_latency_objects_all_latencies)  # noqa
-        else:
-            array_of_daily_latency_dataframes_max_latency_only = \
-                array_of_daily_latency_objects_all_latencies
-            array_of_daily_latency_dataframes_all_latencies = \
-                array_of_daily_latency_objects_all_latencies
+            total_availability = \
+                calculate_total_availability_from_daily_percent_availability(
+                    array_of_daily_percent_availability)
+            # The packet of each latency is the last part of its key
+            packet = \
+                combined_latency_dataframe_for_all_days_dataframe.index.str\
+                .rsplit('.', n=1).str[-1]
+
+        # The latencies are moved to a store of memory-mapped arrays, the
+        # plots, the CSV and the report being handed views of the store
+        # rather than their own copies of the latencies
+        logging.info("Storing latencies..")
+        latency_store = LatencyStore.create(
+            latencies=combined_latency_dataframe_for_all_days_dataframe,
+            packet=packet)
+        del combined_latency_dataframe_for_all_days_dataframe, \
+            array_of_daily_latency_objects_max_latency_only, \
+            array_of_daily_latency_objects_all_latencies, packet
 
         logging.info("Generating latency log plots..")
 
-        latency_log_plot(latencies=combined_latency_dataframe_for_all_days_dataframe,  # noqa
+        latency_log_plot(latencies=latency_store.statistics(),
                          station=station,
                          startdate=startdate,
                          enddate=enddate,
@@ -86,16 +110,17 @@ def generate_latency_results(typeofinstrument: str,
         logging.info("Generating latency line plots..")
 
         latency_line_plot(
-            latencies=array_of_daily_latency_dataframes_max_latency_only,
+            latencies=latency_store.daily_latencies(max_only=True),
             station=station,
             network=network,
             timely_threshold=timely_threshold,
-            location=location
+            location=location,
+            workers=plot_workers
         )
         logging.info("Generating CSV of failed latencies..")
 
         generate_CSV_from_failed_latencies(
-            latencies=combined_latency_dataframe_for_all_days_dataframe,
+            latencies=latency_store.latencies(above=timely_threshold),
             station=station,
             network=network,
             startdate=startdate,
@@ -103,12 +128,14 @@ def generate_latency_results(typeofinstrument: str,
             timely_threshold=timely_threshold,
             location=location
         )
-        tuple_of_data_to_return = [
-            combined_latency_dataframe_for_all_days_dataframe,
-            array_of_daily_latency_dataframes_all_latencies]
+        latencies_for_report = latency_store.latencies(
+            columns=['network', 'station', 'channel', 'data_latency'])
         if queue:
-            queue.put(tuple_of_data_to_return)
-        return combined_latency_dataframe_for_all_days_dataframe
+            # The process receiving the store is the one deleting it
+            queue.put(latency_store.directory)
+        else:
+            latency_store.delete()
+        return latencies_for_report
 
     except FileNotFoundError as e:
         logging.error(e)
@@ -1,6 +1,10 @@
 '''
 This module generates plots to be used in the station verification process
 
+The plots of the metrics are described by plot specs, built from the metric
+data by the *_plot_spec functions, and drawn by plot_metrics on a pool of
+processes, see plot_renderer.
+
 Functions
 ---------
 
@@ -36,6 +40,7 @@ from configparser import ConfigParser
 import logging
 import os
 from datetime import date, timedelta
+from typing import List, Optional
 import numpy as np
 
 import matplotlib
@@ -46,6 +51,7 @@ import matplotlib.dates as mdates
 
 
 from .generate_report import StationMetricData
+from .plot_renderer import PlotSpec, render_plot, render_plots
 from stationverification import CONFIG
 
 
@@ -85,21 +91,170 @@ class PlotParameters(dict):
         return thresholds
 
 
-def plot_metrics(plotParameters: PlotParameters):
+def get_channel_snlc(plotParameters: PlotParameters) -> str:
+    if plotParameters.location is None:
+        return f'{plotParameters.network}.{plotParameters.station}..\
+{plotParameters.channel}'
+    return f'{plotParameters.network}.{plotParameters.station}.\
+{plotParameters.location}.{plotParameters.channel}'
+
+
+def get_plot_filename(plotParameters: PlotParameters, suffix: str) -> str:
+    '''
+    Returns the path of the file of a plot of the metrics of a channel
+    '''
+    start = plotParameters.start
+    stop = plotParameters.stop
+    snlc = get_channel_snlc(plotParameters)
+    if start == stop - timedelta(days=1):
+        plot_filename = f'{snlc}.{start}.{suffix}'
+    else:
+        plot_filename = f'{snlc}.{start}_\
+{(stop + timedelta(days=-1))}.{suffix}'
+    return f'stationvalidation_output/{plot_filename}.png'
+
+
+def get_metric_plot_specs(plotParameters: PlotParameters) -> List[PlotSpec]:
+    '''
+    Returns the specs of the plots of the metrics of a channel, leaving out
+    the metrics without a value for each day
+    '''
+    specs = [ADC_plot_spec(plotParameters),
+             max_gap_plot_spec(plotParameters),
+             num_gaps_plot_spec(plotParameters),
+             num_overlaps_plot_spec(plotParameters),
+             spikes_plot_spec(plotParameters),
+             # percent_availability_plot_spec(plotParameters),
+             pct_above_nhnm_plot_spec(plotParameters),
+             pct_below_nlnm_plot_spec(plotParameters)]
+    # dead_channel_lin_plot_spec(plotParameters)
+    # dead_channel_gsn_plot_spec(plotParameters)
+    return [spec for spec in specs if spec is not None]
+
+
+def plot_metrics(plotParameters: PlotParameters, workers: int = 1):
     if not os.path.isdir("./stationvalidation_output"):
         os.mkdir('./stationvalidation_output')
-    ADC_plot(plotParameters)
-    max_gap_plot(plotParameters)
-    num_gaps_plot(plotParameters)
-    num_overlaps_plot(plotParameters)
+    render_plots(get_metric_plot_specs(plotParameters), workers=workers)
+
+
+def format_day_axis(ax, start: date):
+    '''
+    Formats the x axis values, the days since the start date, to be dates,
+    rotating them 90 degrees
+    '''
+    # Function for formatting the x values to actually be dates
+    def timeTicks(x, pos):
+        date = start + timedelta(days=x)
+        return str(date.isoformat())
+
+    formatter = matplotlib.ticker.FuncFormatter(timeTicks)
+    ax.xaxis.set_major_formatter(formatter)
+    locator = mdates.DayLocator()
+    ax.xaxis.set_major_locator(locator)
+    plt.xticks(rotation=90)
+
+
+def get_metric_bar_plot_spec(plotParameters: PlotParameters,
+                             metric: str,
+                             suffix: str,
+                             title: str,
+                             ylabel: str,
+                             ylim: int,
+                             ytick_base: float,
+                             threshold: int,
+                             threshold_label: str,
+                             threshold_linewidth: str,
+                             percent: bool = False) -> Optional[PlotSpec]:
+    '''
+    Returns the spec of the bar plot of the daily values of a metric of a
+    channel against its threshold, or None if the metric does not have a
+    value for each day
+
+    Parameters
+    ----------
+    metric: str
+        The name of the metric
+    suffix: str
+        The last part of the name of the plot file
+    ylim: int
+        The top of the y axis
+    ytick_base: float
+        The step of the ticks of the y axis
+    percent: bool
+        Whether the values are percentages, rounded to one decimal
+
+    Returns
+    -------
+    PlotSpec
+        The spec, drawn by render_metric_bar_plot
+    '''
+    values = plotParameters.stationMetricData.get_values(
+        metric, plotParameters.network, plotParameters.station,
+        plotParameters.channel)
+    if len(values) != (plotParameters.stop - plotParameters.start).days:
+        return None
+    if percent:
+        values = list(map(lambda value: float(round(value, 1)), values))
+    return PlotSpec(render=render_metric_bar_plot,
+                    filename=get_plot_filename(plotParameters, suffix),
+                    start=plotParameters.start,
+                    values=list(values),
+                    title=f'{get_channel_snlc(plotParameters)} - {title}',
+                    ylabel=ylabel,
+                    ylim=ylim,
+                    ytick_base=ytick_base,
+                    threshold=threshold,
+                    threshold_label=threshold_label,
+                    threshold_linewidth=threshold_linewidth,
+                    percent=percent)
+
+
+def render_metric_bar_plot(spec: PlotSpec):
+    '''
+    Draws the spec of a bar plot of the daily values of a metric
+    '''
+    # Generatre x-axis values as days since startdate
+    x_axis = np.arange(0, len(spec['values']), 1)
 
-    spikes_plot(plotParameters)
-    # percent_availability_plot(plotParameters)
-    pct_above_nhnm_plot(plotParameters)
-    pct_below_nlnm_plot(plotParameters)
+    # Create plot
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    # this locator puts ticks at regular intervals in setps of "base"
+    loc = plticker.MultipleLocator(base=spec['ytick_base'])
+    ax.yaxis.set_major_locator(loc)
+    ax.set_ylim([0, spec['ylim']])
 
-    # dead_channel_lin_plot(plotParameters)
-    # dead_channel_gsn_plot(plotParameters)
+    bars = ax.bar(x_axis, spec['values'], 0.1)
+    ax.bar_label(bars)
+    format_day_axis(ax, spec['start'])
+
+    ax.set_title(spec['title'], pad=20)
+    plt.ylabel(spec['ylabel'])
+    if spec['percent']:
+        ax.yaxis.set_major_formatter(ticker.PercentFormatter(xmax=100))
+
+    # Add a grid to the plot to make the symmetry more obvious
+    ax.set_axisbelow(True)
+    plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
+    # Adding the threshold line
+    ax.axhline(spec['threshold'], color='r',
+               linewidth=spec['threshold_linewidth'], linestyle='--',
+               label=spec['threshold_label'])
+
+    legend = ax.legend(bbox_to_anchor=(1, 1),
+                       loc='upper right', fontsize="9")
+    # Write the plot to the output directory, and then close it so the next
+    # channel's metrics aren't plotted on the same plot
+    plt.savefig(spec.filename,
+                dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
+    logging.info(f'{os.path.basename(spec.filename)[:-4]} created.')
+    plt.close()
+
+
+def plot_spec(spec: Optional[PlotSpec]):
+    if spec is not None:
+        render_plot(spec)
 
 # Function to graph the ADC plot for visual representation
 # Since what values are normal for these metrics seems to differ from one
@@ -109,578 +264,216 @@ def plot_metrics(plotParameters: PlotParameters):
 # way to represent this would be to generate a plot of these values
 
 
-def ADC_plot(
-    plotParameters: PlotParameters
-):
+def ADC_plot_spec(plotParameters: PlotParameters) -> Optional[PlotSpec]:
     network = plotParameters.network
     station = plotParameters.station
-    location = plotParameters.location
     channel = plotParameters.channel
     stationMetricData = plotParameters.stationMetricData
-    start = plotParameters.start
-    stop = plotParameters.stop
 
-    if location is None:
-        snlc = f'{network}.{station}..{channel}'
-    else:
-        snlc = f'{network}.{station}.{location}.{channel}'
+    size_of_metric_data = len(stationMetricData.get_values(
+        'sample_max', network, station, channel))
+    if size_of_metric_data != \
+            (plotParameters.stop - plotParameters.start).days:
+        return None
+    sample_mean = stationMetricData.get_values(
+        'sample_mean', network, station, channel)
+    # The min, max and median normalized to the mean. This makes it easier to
+    # see how symmetrical it is.
+    series = [
+        (np.subtract(stationMetricData.get_values(
+            'sample_max', network, station, channel), sample_mean),
+         'ADC Counts: max deviation from mean'),
+        (np.subtract(stationMetricData.get_values(
+            'sample_min', network, station, channel), sample_mean),
+         'ADC Counts: min deviation from mean'),
+        (np.subtract(stationMetricData.get_values(
+            'sample_median', network, station, channel), sample_mean),
+         'ADC Counts: median deviation from mean'),
+        (np.asarray(stationMetricData.get_values(
+            'sample_rms', network, station, channel)),
+         'Sample RMS')]
+    return PlotSpec(render=render_ADC_plot,
+                    filename=get_plot_filename(plotParameters, 'adc_count'),
+                    start=plotParameters.start,
+                    days=size_of_metric_data,
+                    series=series,
+                    title=f'{get_channel_snlc(plotParameters)} - \
+ADC Count (range: [0, +/- 8,388,608])')
+
 
+def render_ADC_plot(spec: PlotSpec):
     # Generatre x-axis values as days since startdate
-    difference = stop - start
-    x_axis = np.arange(0, difference.days, 1)
+    x_axis = np.arange(0, spec['days'], 1)
 
     # Create plot
     fig = plt.figure()
     ax = fig.add_subplot(111)
-
-    # Plot the min, max and median normalized to the mean. This makes it
-    # easier to see how symmetrical it is.
-    size_of_x_axis = x_axis.size
-    size_of_metric_data = len(stationMetricData.get_values(
-        'sample_max', network, station, channel))
-    if size_of_metric_data == size_of_x_axis:
-        ax.scatter(
-            x_axis, np.subtract(
-                stationMetricData.get_values(
-                    'sample_max', network, station, channel),
-                stationMetricData.get_values(
-                    'sample_mean', network, station, channel)),
-            marker='o', label='ADC Counts: max deviation from mean')
-        ax.scatter(
-            x_axis, np.subtract(
-                stationMetricData.get_values(
-                    'sample_min', network, station, channel),
-                stationMetricData.get_values(
-                    'sample_mean', network, station, channel)),
-            marker='o', label='ADC Counts: min deviation from mean')
-        ax.scatter(
-            x_axis, np.subtract(
-                stationMetricData.get_values(
-                    'sample_median', network, station, channel),
-                stationMetricData.get_values(
-                    'sample_mean', network, station, channel)),
-            marker='o', label='ADC Counts: median deviation from mean')
-        ax.scatter(
-            x_axis, stationMetricData.get_values(
-                'sample_rms', network, station, channel),
-            marker='o', label='Sample RMS')
-
-        legend = plt.legend(fancybox=True, framealpha=0.2,
-                            bbox_to_anchor=(1.4, 1.0),
-                            loc='upper right', fontsize="9")
-
-        # Function for formatting the x values to actually be dates
-        def timeTicks(x, pos):
-            date = start + timedelta(days=x)
-            return str(date.isoformat())
-
-        # Format the x axis values to be dates and rotate them 90 degrees
-        formatter = matplotlib.ticker.FuncFormatter(timeTicks)
-        ax.xaxis.set_major_formatter(formatter)
-        locator = mdates.DayLocator()
-        ax.xaxis.set_major_locator(locator)
-        plt.xticks(rotation=90)
-        plt.title(
-            f'{snlc} - \
-ADC Count (range: [0, +/- 8,388,608])')
-        plt.ylabel('Amplitude value')
-        ax.set_axisbelow(True)
-        plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
-
-        # Save the plot to file and then close it so the next channel's metrics
-        # aren't plotted on the same plot
-        if start == stop - timedelta(days=1):
-            plot_filename = f'{snlc}.{start}.adc_count'
-        else:
-            plot_filename = f'{snlc}.{start}_\
-{(stop + timedelta(days=-1))}.adc_count'
-        # Write the plot to the output directory
-        plt.savefig(f'stationvalidation_output/{plot_filename}.png',
-                    dpi=300,
-                    bbox_extra_artists=(legend,),
-                    bbox_inches='tight')
+    for values, label in spec['series']:
+        ax.scatter(x_axis, values, marker='o', label=label)
+
+    legend = plt.legend(fancybox=True, framealpha=0.2,
+                        bbox_to_anchor=(1.4, 1.0),
+                        loc='upper right', fontsize="9")
+    format_day_axis(ax, spec['start'])
+    plt.title(spec['title'])
+    plt.ylabel('Amplitude value')
+    ax.set_axisbelow(True)
+    plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
+
+    # Write the plot to the output directory, and then close it so the next
+    # channel's metrics aren't plotted on the same plot
+    plt.savefig(spec.filename,
+                dpi=300,
+                bbox_extra_artists=(legend,),
+                bbox_inches='tight')
     plt.close()
 
 
-def num_overlaps_plot(
+def ADC_plot(
     plotParameters: PlotParameters
 ):
-    network = plotParameters.network
-    station = plotParameters.station
-    location = plotParameters.location
-    channel = plotParameters.channel
-    stationMetricData = plotParameters.stationMetricData
-    start = plotParameters.start
-    stop = plotParameters.stop
-    thresholds = plotParameters.thresholds
-    number_overlaps_threshold = thresholds.getint(
-        'thresholds', 'num_overlaps', fallback=0)
-    if location is None:
-        snlc = f'{network}.{station}..{channel}'
-    else:
-        snlc = f'{network}.{station}.{location}.{channel}'
+    plot_spec(ADC_plot_spec(plotParameters))
 
-    # Generatre x-axis values as days since startdate
-    difference = stop - start
-    x_axis = np.arange(0, difference.days, 1)
 
-    # Create plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111)
-    loc = plticker.MultipleLocator(base=1)
-    ax.yaxis.set_major_locator(loc)
-    ax.set_ylim([0, 10])
-    size_of_x_axis = x_axis.size
-    size_of_metric_data = len(stationMetricData.get_values(
-        'num_overlaps', network, station, channel))
-    if size_of_metric_data == size_of_x_axis:
-        bars = ax.bar(
-            x_axis, stationMetricData.get_values(
-                'num_overlaps', network, station, channel), 0.1)
-        ax.bar_label(bars)
-        # Function for formatting the x values to actually be dates
-
-        def timeTicks(x, pos):
-            date = start + timedelta(days=x)
-            return str(date.isoformat())
-
-        # Format the x axis values to be dates and rotate them 90 degrees
-        formatter = matplotlib.ticker.FuncFormatter(timeTicks)
-        ax.xaxis.set_major_formatter(formatter)
-        locator = mdates.DayLocator()
-        ax.xaxis.set_major_locator(locator)
-        plt.xticks(rotation=90)
-
-        ax.set_title(f'{snlc} - Number of overlaps', pad=20)
-        plt.ylabel('Overlaps')
-
-        # Add a grid to the plot to make the symmetry more obvious
-        ax.set_axisbelow(True)
-        plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
-        ax.axhline(number_overlaps_threshold, color='r', linewidth="2",
-                   linestyle='--',
-                   label=f"Maximum number of overlaps threshold: \
-{number_overlaps_threshold} overlaps")
-
-        legend = ax.legend(bbox_to_anchor=(1, 1),
-                           loc='upper right', fontsize="9")
-        # Save the plot to file and then close it so the next channel's metrics
-        # aren't plotted on the same plot
-        if start == stop - timedelta(days=1):
-            plot_filename = f'{snlc}.{start}\
-.num_overlaps'
-        else:
-            plot_filename = f'{snlc}.{start}_\
-{(stop + timedelta(days=-1))}.num_overlaps'
-
-        # Write the plot to the output directory
-        plt.savefig(f'stationvalidation_output/{plot_filename}.png',
-                    dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
-        logging.info(f'{plot_filename} created.')
-    plt.close()
+def num_overlaps_plot_spec(plotParameters: PlotParameters) -> \
+        Optional[PlotSpec]:
+    number_overlaps_threshold = plotParameters.thresholds.getint(
+        'thresholds', 'num_overlaps', fallback=0)
+    return get_metric_bar_plot_spec(
+        plotParameters,
+        metric='num_overlaps',
+        suffix='num_overlaps',
+        title='Number of overlaps',
+        ylabel='Overlaps',
+        ylim=10,
+        ytick_base=1,
+        threshold=number_overlaps_threshold,
+        threshold_label=f"Maximum number of overlaps threshold: \
+{number_overlaps_threshold} overlaps",
+        threshold_linewidth="2")
 
 
-def num_gaps_plot(
+def num_overlaps_plot(
     plotParameters: PlotParameters
 ):
-    network = plotParameters.network
-    station = plotParameters.station
-    location = plotParameters.location
-    channel = plotParameters.channel
-    stationMetricData = plotParameters.stationMetricData
-    start = plotParameters.start
-    stop = plotParameters.stop
-    thresholds = plotParameters.thresholds
-    num_gaps_threshold = thresholds.getint(
+    plot_spec(num_overlaps_plot_spec(plotParameters))
+
+
+def num_gaps_plot_spec(plotParameters: PlotParameters) -> \
+        Optional[PlotSpec]:
+    num_gaps_threshold = plotParameters.thresholds.getint(
         'thresholds', 'num_gaps', fallback=10)
-    if location is None:
-        snlc = f'{network}.{station}..{channel}'
-    else:
-        snlc = f'{network}.{station}.{location}.{channel}'
+    return get_metric_bar_plot_spec(
+        plotParameters,
+        metric='num_gaps',
+        suffix='num_gaps',
+        title='Number of Gaps',
+        ylabel='Gaps',
+        ylim=20,
+        ytick_base=1,
+        threshold=num_gaps_threshold,
+        threshold_label=f"Maximum number of gaps threshold: \
+{num_gaps_threshold} gaps",
+        threshold_linewidth="1")
 
-    # Generatre x-axis values as days since startdate
-    difference = stop - start
-    x_axis = np.arange(0, difference.days, 1)
 
-    # Create plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111)
-    # this locator puts ticks at regular intervals in setps of "base"
-    loc = plticker.MultipleLocator(base=1)
-    ax.yaxis.set_major_locator(loc)
-    ax.set_ylim([0, 20])
+def num_gaps_plot(
+    plotParameters: PlotParameters
+):
+    plot_spec(num_gaps_plot_spec(plotParameters))
 
-    size_of_x_axis = x_axis.size
-    size_of_metric_data = len(stationMetricData.get_values(
-        'num_gaps', network, station, channel))
-    if size_of_metric_data == size_of_x_axis:
-        bars = ax.bar(
-            x_axis, stationMetricData.get_values(
-                'num_gaps', network, station, channel), 0.1)
-        ax.bar_label(bars)
-
-        # Function for formatting the x values to actually be dates
-
-        def timeTicks(x, pos):
-            date = start + timedelta(days=x)
-            return str(date.isoformat())
-
-        # Format the x axis values to be dates and rotate them 90 degrees
-        formatter = matplotlib.ticker.FuncFormatter(timeTicks)
-        ax.xaxis.set_major_formatter(formatter)
-        plt.xticks(rotation=90)
-        locator = mdates.DayLocator()
-        ax.xaxis.set_major_locator(locator)
-        ax.set_title(f'{snlc} - Number of Gaps', pad=20)
-        plt.ylabel('Gaps')
-
-        # Add a grid to the plot to make the symmetry more obvious
-        ax.set_axisbelow(True)
-        plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
-        # Adding the threshold line
-        ax.axhline(num_gaps_threshold, color='r', linewidth="1",
-                   linestyle='--',
-                   label=f"Maximum number of gaps threshold: \
-{num_gaps_threshold} gaps")
-
-        legend = ax.legend(bbox_to_anchor=(1, 1),
-                           loc='upper right', fontsize="9")
-        # Save the plot to file and then close it so the next channel's metrics
-        # aren't plotted on the same plot
-        if start == stop - timedelta(days=1):
-            plot_filename = f'{snlc}.{start}.num_gaps'
-        else:
-            plot_filename = f'{snlc}.{start}_\
-{(stop + timedelta(days=-1))}.num_gaps'
-        # Write the plot to the output directory
-        plt.savefig(f'stationvalidation_output/{plot_filename}.png',
-                    dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
-        logging.info(f'{plot_filename} created.')
-    plt.close()
+
+def max_gap_plot_spec(plotParameters: PlotParameters) -> Optional[PlotSpec]:
+    size_of_gaps_threshold = plotParameters.thresholds.getint(
+        'thresholds', 'max_gap', fallback=2)
+    return get_metric_bar_plot_spec(
+        plotParameters,
+        metric='max_gap',
+        suffix='max_gap',
+        title='Max Gaps',
+        ylabel='Gap size (Seconds)',
+        ylim=10,
+        ytick_base=1,
+        threshold=size_of_gaps_threshold,
+        threshold_label=f"Maximum size of gaps: \
+{size_of_gaps_threshold} seconds",
+        threshold_linewidth="1")
 
 
 def max_gap_plot(
     plotParameters: PlotParameters
 ):
-    network = plotParameters.network
-    station = plotParameters.station
-    location = plotParameters.location
-    channel = plotParameters.channel
-    stationMetricData = plotParameters.stationMetricData
-    start = plotParameters.start
-    stop = plotParameters.stop
-    thresholds = plotParameters.thresholds
-    size_of_gaps_threshold = thresholds.getint(
-        'thresholds', 'max_gap', fallback=2)
-    if location is None:
-        snlc = f'{network}.{station}..{channel}'
-    else:
-        snlc = f'{network}.{station}.{location}.{channel}'
-    # Generatre x-axis values as days since startdate
-    difference = stop - start
-    x_axis = np.arange(0, difference.days, 1)
+    plot_spec(max_gap_plot_spec(plotParameters))
 
-    # Create plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111)
-    # this locator puts ticks at regular intervals in setps of "base"
-    loc = plticker.MultipleLocator(base=1)
-    ax.yaxis.set_major_locator(loc)
-    ax.set_ylim([0, 10])
 
-    size_of_x_axis = x_axis.size
-    size_of_metric_data = len(stationMetricData.get_values(
-        'max_gap', network, station, channel))
-    if size_of_metric_data == size_of_x_axis:
-        bars = ax.bar(
-            x_axis, stationMetricData.get_values(
-                'max_gap', network, station, channel), 0.1)
-        # Function for formatting the x values to actually be dates
-        ax.bar_label(bars)
-
-        def timeTicks(x, pos):
-            date = start + timedelta(days=x)
-            return str(date.isoformat())
-
-        # Format the x axis values to be dates and rotate them 90 degrees
-        formatter = matplotlib.ticker.FuncFormatter(timeTicks)
-        ax.xaxis.set_major_formatter(formatter)
-        locator = mdates.DayLocator()
-        ax.xaxis.set_major_locator(locator)
-        plt.xticks(rotation=90)
-
-        ax.set_title(f'{snlc} - Max Gaps', pad=20)
-        plt.ylabel('Gap size (Seconds)')
-
-        # Add a grid to the plot to make the symmetry more obvious
-        ax.set_axisbelow(True)
-        plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
-        ax.axhline(size_of_gaps_threshold, color='r', linewidth="1",
-                   linestyle='--',
-                   label=f"Maximum size of gaps: \
-{size_of_gaps_threshold} seconds")
-
-        legend = ax.legend(bbox_to_anchor=(1, 1),
-                           loc='upper right', fontsize="9")
-        # Save the plot to file and then close it so the next channel's metrics
-        # aren't plotted on the same plot
-        if start == stop - timedelta(days=1):
-            plot_filename = f'{snlc}.{start}.max_gap'
-        else:
-            plot_filename = f'{snlc}.{start}_\
-{(stop + timedelta(days=-1))}.max_gap'
-        # Write the plot to the output directory
-        plt.savefig(f'stationvalidation_output/{plot_filename}.png',
-                    dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
-        logging.info(f'{plot_filename} created.')
-    plt.close()
+def spikes_plot_spec(plotParameters: PlotParameters) -> Optional[PlotSpec]:
+    spikes_threshold = plotParameters.thresholds.getint(
+        'thresholds', 'spikes', fallback=0)
+    return get_metric_bar_plot_spec(
+        plotParameters,
+        metric='spikes',
+        suffix='spikes',
+        title='Spikes',
+        ylabel='Spikes',
+        ylim=10,
+        ytick_base=1.0,
+        threshold=spikes_threshold,
+        threshold_label=f"Maximum number of spikes threshold: \
+{spikes_threshold} spikes",
+        threshold_linewidth="2")
 
 
 def spikes_plot(
     plotParameters: PlotParameters
 ):
-    thresholds = ConfigParser()
-    thresholds.read(CONFIG)
-    spikes_threshold = thresholds.getint(
-        'thresholds', 'spikes', fallback=0)
-    network = plotParameters.network
-    station = plotParameters.station
-    location = plotParameters.location
-    channel = plotParameters.channel
-    stationMetricData = plotParameters.stationMetricData
-    start = plotParameters.start
-    stop = plotParameters.stop
-    if location is None:
-        snlc = f'{network}.{station}..{channel}'
-    else:
-        snlc = f'{network}.{station}.{location}.{channel}'
-    # Generatre x-axis values as days since startdate
-    difference = stop - start
-    x_axis = np.arange(0, difference.days, 1)
+    plot_spec(spikes_plot_spec(plotParameters))
 
-    # Create plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111)
-    # this locator puts ticks at regular intervals in setps of "base"
-    loc = plticker.MultipleLocator(base=1.0)
-    ax.yaxis.set_major_locator(loc)
-    ax.set_ylim([0, 10])
 
-    size_of_x_axis = x_axis.size
-    size_of_metric_data = len(stationMetricData.get_values(
-        'spikes', network, station, channel))
-    if size_of_metric_data == size_of_x_axis:
-        bars = ax.bar(
-            x_axis, stationMetricData.get_values(
-                'spikes', network, station, channel), 0.1)
-        ax.bar_label(bars)
-
-        ax.axhline(spikes_threshold, color='r', linewidth="2",
-                   linestyle='--',
-                   label=f"Maximum number of spikes threshold: \
-{spikes_threshold} spikes")
-
-        legend = ax.legend(bbox_to_anchor=(1, 1),
-                           loc='upper right', fontsize="9")
-        # Function for formatting the x values to actually be dates
-
-        def timeTicks(x, pos):
-            date = start + timedelta(days=x)
-            return str(date.isoformat())
-
-        # Format the x axis values to be dates and rotate them 90 degrees
-        formatter = matplotlib.ticker.FuncFormatter(timeTicks)
-        ax.xaxis.set_major_formatter(formatter)
-        locator = mdates.DayLocator()
-        ax.xaxis.set_major_locator(locator)
-        plt.xticks(rotation=90)
-
-        ax.set_title(f'{snlc} - Spikes', pad=20)
-        plt.ylabel('Spikes')
-
-        # Add a grid to the plot to make the symmetry more obvious
-        ax.set_axisbelow(True)
-        plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
-
-        # Save the plot to file and then close it so the next channel's metrics
-        # aren't plotted on the same plot
-        if start == stop - timedelta(days=1):
-            plot_filename = f'{snlc}.{start}.spikes'
-        else:
-            plot_filename = f'{snlc}.{start}_\
-{(stop + timedelta(days=-1))}.spikes'
-        # Write the plot to the output directory
-        plt.savefig(f'stationvalidation_output/{plot_filename}.png',
-                    dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
-        logging.info(f'{plot_filename} created.')
-    plt.close()
+def pct_above_nhnm_plot_spec(plotParameters: PlotParameters) -> \
+        Optional[PlotSpec]:
+    pct_above_nhnm_threshold = plotParameters.thresholds.getint(
+        'thresholds', 'pct_above_nhnm', fallback=40)
+    return get_metric_bar_plot_spec(
+        plotParameters,
+        metric='pct_above_nhnm',
+        suffix='pct_above_nhnm',
+        title='Percent above New High Noise Model',
+        ylabel='Percentage',
+        ylim=100,
+        ytick_base=10.0,
+        threshold=pct_above_nhnm_threshold,
+        threshold_label=f"Percent Above New High Noise Modal threshold: \
+{pct_above_nhnm_threshold}%",
+        threshold_linewidth="1",
+        percent=True)
 
 
 def pct_above_nhnm_plot(
     plotParameters: PlotParameters
 ):
-    network = plotParameters.network
-    station = plotParameters.station
-    location = plotParameters.location
-    channel = plotParameters.channel
-    stationMetricData = plotParameters.stationMetricData
-    start = plotParameters.start
-    stop = plotParameters.stop
-    thresholds = plotParameters.thresholds
-    pct_above_nhnm_threshold = thresholds.getint(
-        'thresholds', 'pct_above_nhnm', fallback=40)
-    if location is None:
-        snlc = f'{network}.{station}..{channel}'
-    else:
-        snlc = f'{network}.{station}.{location}.{channel}'
-    # Generatre x-axis values as days since startdate
-    difference = stop - start
-    x_axis = np.arange(0, difference.days, 1)
+    plot_spec(pct_above_nhnm_plot_spec(plotParameters))
 
-    # Create plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111)
-    # this locator puts ticks at regular intervals in setps of "base"
-    loc = plticker.MultipleLocator(base=10.0)
-    ax.yaxis.set_major_locator(loc)
-    ax.set_ylim([0, 100])
 
-    size_of_x_axis = x_axis.size
-    size_of_metric_data = len(stationMetricData.get_values(
-        'pct_above_nhnm', network, station, channel))
-    y_axis = stationMetricData.get_values(
-        'pct_above_nhnm', network, station, channel)
-    y_axis_rounded = list(map(lambda value: float(round(value, 1)), y_axis))
-    if size_of_metric_data == size_of_x_axis:
-        bars = ax.bar(
-            x_axis, y_axis_rounded, width=0.1)
-        ax.bar_label(bars)
-
-        # legend = plt.legend(fancybox=True, framealpha=0.2,
-        #                     loc='upper right', fontsize="9")
-        # Function for formatting the x values to actually be dates
-
-        def timeTicks(x, pos):
-            date = start + timedelta(days=x)
-            return str(date.isoformat())
-
-        # Format the x axis values to be dates and rotate them 90 degrees
-        formatter = matplotlib.ticker.FuncFormatter(timeTicks)
-        ax.xaxis.set_major_formatter(formatter)
-        locator = mdates.DayLocator()
-        ax.xaxis.set_major_locator(locator)
-        plt.xticks(rotation=90)
-
-        ax.set_title(
-            f'{snlc} - \
-Percent above New High Noise Model', pad=20)
-        plt.ylabel('Percentage')
-        ax.yaxis.set_major_formatter(ticker.PercentFormatter(xmax=100))
-        # Add a grid to the plot to make the symmetry more obvious
-        ax.set_axisbelow(True)
-        plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
-        ax.axhline(pct_above_nhnm_threshold, color='r', linewidth="1",
-                   linestyle='--',
-                   label=f"Percent Above New High Noise Modal threshold: \
-{pct_above_nhnm_threshold}%")
-
-        legend = ax.legend(bbox_to_anchor=(1, 1),
-                           loc='upper right', fontsize="9")
-        # Save the plot to file and then close it so the next channel's metrics
-        # aren't plotted on the same plot
-        if start == stop - timedelta(days=1):
-            plot_filename = f'{snlc}.{start}\
-.pct_above_nhnm'
-        else:
-            plot_filename = f'{snlc}.{start}_\
-{(stop + timedelta(days=-1))}.pct_above_nhnm'
-        # Write the plot to the output directory
-        plt.savefig(f'stationvalidation_output/{plot_filename}.png',
-                    dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
-        logging.info(f'{plot_filename} created.')
-    plt.close()
+def pct_below_nlnm_plot_spec(plotParameters: PlotParameters) -> \
+        Optional[PlotSpec]:
+    below_nlnm_threshold = plotParameters.thresholds.getint(
+        'thresholds', 'pct_below_nlnm', fallback=0)
+    return get_metric_bar_plot_spec(
+        plotParameters,
+        metric='pct_below_nlnm',
+        suffix='pct_below_nlnm',
+        title='Percent below New Low Noise Model',
+        ylabel='Percentage',
+        ylim=100,
+        ytick_base=10.0,
+        threshold=below_nlnm_threshold,
+        threshold_label=f"Percent Below New Low Noise Modal threshold: \
+{below_nlnm_threshold}%",
+        threshold_linewidth="2",
+        percent=True)
 
 
 def pct_below_nlnm_plot(
     plotParameters: PlotParameters
 ):
-    thresholds = ConfigParser()
-    thresholds.read(CONFIG)
-    below_nlnm_threshold = thresholds.getint(
-        'thresholds', 'pct_below_nlnm', fallback=0)
-    network = plotParameters.network
-    station = plotParameters.station
-    location = plotParameters.location
-    channel = plotParameters.channel
-    stationMetricData = plotParameters.stationMetricData
-    start = plotParameters.start
-    stop = plotParameters.stop
-    if location is None:
-        snlc = f'{network}.{station}..{channel}'
-    else:
-        snlc = f'{network}.{station}.{location}.{channel}'
-    # Generatre x-axis values as days since startdate
-    difference = stop - start
-    x_axis = np.arange(0, difference.days, 1)
-
-    # Create plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111)
-    # this locator puts ticks at regular intervals in setps of "base"
-    loc = plticker.MultipleLocator(base=10.0)
-    ax.yaxis.set_major_locator(loc)
-    ax.set_ylim([0, 100])
-
-    size_of_x_axis = x_axis.size
-    size_of_metric_data = len(stationMetricData.get_values(
-        'pct_below_nlnm', network, station, channel))
-    y_axis = stationMetricData.get_values(
-        'pct_below_nlnm', network, station, channel)
-    y_axis_rounded = list(map(lambda value: float(round(value, 1)), y_axis))
-
-    if size_of_metric_data == size_of_x_axis:
-        bars = ax.bar(
-            x_axis, y_axis_rounded, 0.1)
-        ax.bar_label(bars)
-        ax.axhline(below_nlnm_threshold, color='r', linewidth="2",
-                   linestyle='--',
-                   label=f"Percent Below New Low Noise Modal threshold: \
-{below_nlnm_threshold}%")
-
-        legend = ax.legend(bbox_to_anchor=(1, 1),
-                           loc='upper right', fontsize="9")
-        # Function for formatting the x values to actually be dates
-
-        def timeTicks(x, pos):
-            date = start + timedelta(days=x)
-            return str(date.isoformat())
-
-        # Format the x axis values to be dates and rotate them 90 degrees
-        formatter = matplotlib.ticker.FuncFormatter(timeTicks)
-        ax.xaxis.set_major_formatter(formatter)
-        locator = mdates.DayLocator()
-        ax.xaxis.set_major_locator(locator)
-        plt.xticks(rotation=90)
-
-        ax.set_title(
-            f'{snlc} - \
-Percent below New Low Noise Model', pad=20)
-        plt.ylabel('Percentage')
-        ax.yaxis.set_major_formatter(ticker.PercentFormatter(xmax=100))
-        # Add a grid to the plot to make the symmetry more obvious
-        ax.set_axisbelow(True)
-        plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
-
-        # Save the plot to file and then close it so the next channel's metrics
-        # aren't plotted on the same plot
-        if start == stop - timedelta(days=1):
-            plot_filename = f'{snlc}.{start}\
-.pct_below_nlnm'
-        else:
-            plot_filename = f'{snlc}.{start}_\
-{(stop + timedelta(days=-1))}.pct_below_nlnm'
-        # Write the plot to the output directory
-        plt.savefig(f'stationvalidation_output/{plot_filename}.png',
-                    dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
-        logging.info(f'{plot_filename} created.')
-    plt.close()
+    plot_spec(pct_below_nlnm_plot_spec(plotParameters))
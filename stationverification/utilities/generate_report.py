@@ -24,10 +24,12 @@ import os
 from stationverification.utilities.add_soh_results_to_report \
     import add_soh_results_to_report
 
-from .metric_handler import metric_handler, check_metric_exists
+from .metric_handler import check_metric_exists, evaluate_metrics, \
+    get_metric_limits
 import json
-from typing import Optional
+from typing import List, Optional
 import logging
+import numpy as np
 import pandas as pd
 from pandas.core.frame import DataFrame
 from .latency import latencyreport
@@ -35,6 +37,12 @@ from configparser import ConfigParser
 from typing import Any, Dict
 
 
+# The columns of the ISPAQ csv files that are read, and their types, the
+# start date being parsed
+ISPAQ_CSV_COLUMNS = ['target', 'start', 'metricName', 'value']
+ISPAQ_CSV_DTYPES = {'target': str, 'metricName': str, 'value': np.float64}
+
+
 class StationMetricData():
     '''
     This class is used to retrieve metric data from the csv files that are
@@ -53,6 +61,8 @@ class StationMetricData():
         Initialize the class by passing it a station name
     populate:
         Load a CSV file and concatinate the data into the results Dataframe
+    load:
+        Load several CSV files at once into the results Dataframe
     get_networks:
         Returns a list of networks from the ISPAQ results
     get_stations:
@@ -63,6 +73,11 @@ class StationMetricData():
         Returns a list of metrics that have values stored in the Datafame
     get_values:
         Return the values for a given metric for a given channel
+    select:
+        Returns the metric data of a single station
+
+    The lookups are answered from an index of the rows of each
+    (metricName, network, station, channel), built once after loading
 
     '''
 
@@ -71,6 +86,7 @@ class StationMetricData():
         Initialize the StationMetricData object
         '''
         self.results: DataFrame = pd.DataFrame()
+        self.index: Optional[Dict[str, Any]] = None
 
     def populate(
         self,
@@ -85,25 +101,93 @@ class StationMetricData():
         filename: str
             The path to the csv file to process
         '''
-        # Read the specified csv file into a dataframe
-        filedf = pd.read_csv(
-            filename,
-            # Use the start date as the index
-            index_col='start',
-            parse_dates=['start']
-        )
+        self.load([filename])
 
-        # Split the target field
-        filedf[['network', 'station', 'location', 'channel', 'quality']] = \
-            filedf['target'].str.split('.', expand=True)
+    def load(
+        self,
+        filenames: List[str]
+    ):
+        '''
+        Load several csv files at once and concatinate the data within to the
+        results Dataframe. Only the needed columns are read, and the network,
+        station, channel and metricName columns are categorical
 
-        # Drop the end, target, location and quality fields
-        filedf.drop(
-            ['end', 'target', 'location', 'quality'], axis=1, inplace=True)
+        Parameters
+        ----------
+        filenames: list
+            The paths to the csv files to process
+        '''
+        frames = [
+            pd.read_csv(
+                filename,
+                usecols=ISPAQ_CSV_COLUMNS,
+                dtype=ISPAQ_CSV_DTYPES,
+                # Use the start date as the index
+                index_col='start',
+                parse_dates=['start'])
+            for filename in filenames]
+        if not frames:
+            return
+        filedf = pd.concat(frames, sort=False)
+        filedf = filedf[filedf['value'].notna()]
+        filedf['metricName'] = filedf['metricName'].astype('category')
+
+        # Split each distinct target once, the rows only holding the codes of
+        # their network, station and channel
+        targets = pd.Categorical(filedf.pop('target'))
+        codes = targets.categories.str.split('.')
+        for column, position in (('network', 0), ('station', 1),
+                                 ('channel', 3)):
+            categories, category_codes = np.unique(
+                np.array([code[position] for code in codes], dtype=object),
+                return_inverse=True)
+            filedf[column] = pd.Categorical.from_codes(
+                category_codes[targets.codes], categories=categories)
+
+        # Concatinate the results to the dataframe, once for all the files
+        if self.results.empty:
+            self.results = filedf
+        else:
+            self.results = pd.concat([self.results, filedf], sort=False)
+            for column in ['metricName', 'network', 'station', 'channel']:
+                self.results[column] = \
+                    self.results[column].astype('category')
+        self.index = None
 
-        # Concatinate the results to the dataframe
-        self.results = pd.concat([self.results, filedf], sort=False)
-        self.results.dropna(subset=['value'], inplace=True)
+    def get_index(self) -> Dict[str, Any]:
+        '''
+        Returns the index of the results, built on first use after loading
+
+        Returns
+        -------
+        dict:
+            'rows', the positions of the rows of each (metricName, network,
+            station, channel), 'values', the values of all the rows, and the
+            'networks', 'stations' of each network, 'channels' of each
+            (network, station) and 'metricNames' found in the results
+        '''
+        if self.index is None:
+            # The keys are split from the targets, so are never missing
+            groups = self.results.groupby(
+                ['metricName', 'network', 'station', 'channel'],
+                sort=False, observed=True).indices
+            stations: Dict[str, Dict[str, None]] = {}
+            channels: Dict[tuple, Dict[str, None]] = {}
+            for _, network, station, channel in groups:
+                stations.setdefault(network, {})[station] = None
+                channels.setdefault((network, station), {})[channel] = None
+            self.index = {
+                'rows': groups,
+                'values': self.results['value'].to_numpy(),
+                'networks': list(stations),
+                'stations': {network: list(network_stations) for
+                             network, network_stations in stations.items()},
+                'channels': {key: list(station_channels) for
+                             key, station_channels in channels.items()},
+                'metricNames': list(dict.fromkeys(
+                    metric for metric, _, _, _ in groups)),
+            }
+        return self.index
 
     def get_networks(self) -> list:
         '''
@@ -121,7 +205,7 @@ class StationMetricData():
         else:
             # Get a list of all values of the networks column, excluding
             # duplicates
-            networks = list(set(self.results['network']))
+            networks = list(self.get_index()['networks'])
             return networks
 
     def get_stations(self, network: str) -> list:
@@ -145,8 +229,7 @@ class StationMetricData():
         else:
             # Get a list of all unique values in the station column, filtered
             # by a specific network code
-            df = self.results[self.results.network == network]
-            stations = list(set(df['station']))
+            stations = list(self.get_index()['stations'].get(network, []))
             return stations
 
     def get_channels(self, network: str, station: str) -> list:
@@ -172,9 +255,8 @@ class StationMetricData():
                 'Failed to load results from Ispaq. Check csv folder')
         else:
             # Get a list of all channels for the specified station
-            df = self.results[self.results['network'] == network]
-            df = df[df['station'] == station]
-            channels = list(set(df['channel']))
+            channels = list(
+                self.get_index()['channels'].get((network, station), []))
             return channels
 
     def get_metricNames(self) -> list:
@@ -193,9 +275,34 @@ class StationMetricData():
         else:
             # Get a list of the values in the metricName column, excluding
             # duplicates
-            metricNames = list(set(self.results['metricName']))
+            metricNames = list(self.get_index()['metricNames'])
             return metricNames
 
+    def select(self, network: str, station: str) -> 'StationMetricData':
+        '''
+        Get the metric data of a single station, such as one of the stations
+        of a fleet loaded at once
+
+        Parameters
+        ----------
+        network: str
+            The network of the station
+        station: str
+            The station to select
+
+        Returns
+        -------
+        StationMetricData:
+            The rows of the station, in the order they were loaded
+        '''
+        rows = [station_rows for (_, row_network, row_station, _),
+                station_rows in self.get_index()['rows'].items()
+                if (row_network, row_station) == (network, station)]
+        selection = StationMetricData()
+        selection.results = self.results.iloc[
+            np.sort(np.concatenate(rows))] if rows else self.results.iloc[:0]
+        return selection
+
     def get_values(
         self,
         metric: str,
@@ -221,6 +328,14 @@ class StationMetricData():
             A list of the values that ISPAQ returned for the specific metric
             and channel specified
         '''
+        # Look the rows of a channel up in the index
+        if None not in (network, station, channel):
+            index = self.get_index()
+            rows = index['rows'].get((metric, network, station, channel))
+            if rows is None:
+                return []
+            return index['values'][rows].tolist()
+
         # Filter the df by the metricName specified
         results = self.results[self.results.metricName == metric]
 
@@ -292,25 +407,27 @@ sampleRateMetrics.csv'
 {(stop + timedelta(days=-1))}_simpleMetrics.csv'
         psd_filename = f'{ispaqoutdir}/csv/{metrics}_{snlc}_{start}_\
 {(stop + timedelta(days=-1))}_PSDMetrics.csv'
-        sample_filename = f'{ispaqoutdir}csv/{metrics}_{snlc}_{start}_\
+        sample_filename = f'{ispaqoutdir}/csv/{metrics}_{snlc}_{start}_\
 {(stop + timedelta(days=-1))}_sampleRateMetrics.csv'
 
     # Initialize the StationMetricData object that will contain the data
     smd = StationMetricData()
 
-    # If a file exists with the basic_filename, gather the data from it
+    # Gather the data of the files that exist, loading them all at once
+    filenames = []
     if os.path.exists(basic_filename):
-        smd.populate(basic_filename)
+        filenames.append(basic_filename)
     else:
         logging.warning(f'{basic_filename} not found. Check that \
 basicStats metrics are specified in ispaq preference file under {metrics}')
     if os.path.exists(psd_filename):
-        smd.populate(psd_filename)
+        filenames.append(psd_filename)
     else:
         logging.warning(f'{psd_filename} not found. Check that psd_derived \
 metrics are specified in ispaq preference file under {metrics}')
     if os.path.exists(sample_filename):
-        smd.populate(sample_filename)
+        filenames.append(sample_filename)
+    smd.load(filenames)
 
     if len(smd.get_metricNames()) < 1:
         raise FileNotFoundError(
@@ -320,7 +437,7 @@ metrics are specified in ispaq preference file under {metrics}')
 
 
 def report(
-    combined_latency_dataframe_for_all_days_dataframe: DataFrame,
+    combined_latency_dataframe_for_all_days_dataframe: Optional[DataFrame],
     typeofinstrument: str,
     network: str,
     station: str,
@@ -330,6 +447,8 @@ def report(
     thresholds: ConfigParser,
     soharchive: str,
     location: Optional[str] = None,
+    soh_workers: int = 1,
+    output_directory: str = './stationvalidation_output',
 ) -> dict:
     '''
     Function used to generate a report about station data quality, evaluating
@@ -362,6 +481,12 @@ def report(
     soharchive: str
         The path to the soh files driectory
 
+    soh_workers: int
+        The number of processes used to read the soh files in parallel
+
+    output_directory: str
+        The directory to write the json report and the SOH plots to
+
     Returns
     -------
     dict:
@@ -380,26 +505,28 @@ def report(
     # Loop through each channel in the station
     channels = stationmetricdata.get_channels(network=network, station=station)
     metrics = stationmetricdata.get_metricNames()
+    # The values of all the channels and metrics are checked at once
+    values = {
+        channel: {
+            metric: stationmetricdata.get_values(
+                network=network,
+                station=station,
+                channel=channel,
+                metric=metric)
+            for metric in metrics if check_metric_exists(metric)}
+        for channel in channels}
+    results = evaluate_metrics(values, start,
+                               get_metric_limits(metrics, thresholds))
     for channel in channels:
         code = channel
         # Add the channel name to the json_dict dictionary to be
         # converted to json
         json_dict['channels'][code] = {}
         json_dict['channels'][code]['metrics'] = {}
-        for metric in metrics:
-            # Get the values for the metric and hand it off to the
-            # metric_handler to recieve a pass or fail grade
-            if not check_metric_exists(metric):
-                continue
-            values = stationmetricdata.get_values(
-                network=network,
-                station=station,
-                channel=channel,
-                metric=metric)
-            result = metric_handler(
-                metric, values, start, thresholds)
+        for metric, metric_values in values[channel].items():
+            result = results[channel][metric]
             logging.info(f"Metric being ran: {metric}")
-            logging.info(f"Values being ran: {values}")
+            logging.info(f"Values being ran: {metric_values}")
             logging.info(f"Outputted results: {result}")
             # If the result value is false, also log the reason
             # Add the metrics and results to a dictionary to be converted to
@@ -410,9 +537,11 @@ def report(
             json_dict['channels'][code]['metrics'][metric]['details'] = \
                 result.details
             json_dict['channels'][code]['metrics'][metric]['values'] = list(
-                values)
+                metric_values)
 
     try:
+        if combined_latency_dataframe_for_all_days_dataframe is None:
+            raise FileNotFoundError(f'No latencies found for {station}')
         json_dict = latencyreport(
             combined_latency_dataframe_for_all_days_dataframe=combined_latency_dataframe_for_all_days_dataframe,  # noqa
             network=network,
@@ -436,24 +565,36 @@ def report(
                                   directory=soharchive,
                                   typeofinstrument=typeofinstrument,
                                   json_dict=json_dict,
-                                  thresholds=thresholds)
-    # Setup JSson report
+                                  thresholds=thresholds,
+                                  workers=soh_workers,
+                                  output_directory=output_directory)
+    # Write the json dictionary to a json file
+    filename = get_report_filename(network=network, station=station,
+                                   start=start, end=end, location=location)
+    os.makedirs(output_directory, exist_ok=True)
+    with open(f'{output_directory}/{filename}', 'w+') as file:
+        json.dump(json_report_with_soh_results, file, indent=2)
+
+    # Return the report information in json format
+    return json_report_with_soh_results
+
+
+def get_report_filename(
+    network: str,
+    station: str,
+    start: date,
+    end: date,
+    location: Optional[str] = None,
+) -> str:
+    '''
+    Returns the name of the json report of a station for a test period, end
+    being non-inclusive
+    '''
     if location is None:
         snlc = f'{network}.{station}..'
     else:
         snlc = f'{network}.{station}.{location}.'
 
     if start == end - timedelta(days=1):
-        filename = f'{snlc}.{start}.validation_results.json'
-    else:
-        filename = f'{snlc}.{start}_{end}\
-.validation_results.json'
-
-    # Write the json dictionary to a json file
-    if not os.path.isdir('./stationvalidation_output'):
-        os.mkdir('./stationvalidation_output')
-    with open(f'./stationvalidation_output/{filename}', 'w+') as file:
-        json.dump(json_report_with_soh_results, file, indent=2)
-
-    # Return the report information in json format
-    return json_report_with_soh_results
+        return f'{snlc}.{start}.validation_results.json'
+    return f'{snlc}.{start}_{end}.validation_results.json'
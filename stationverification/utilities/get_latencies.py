@@ -1,7 +1,8 @@
-from typing import Any, List, Tuple
+from typing import Any, List, Optional, Tuple
 from datetime import date
 from stationverification.utilities.get_latencies_from_apollo \
     import get_latencies_from_apollo
+from stationverification.utilities.latency_cache import LatencyCache
 from stationverification.utilities.get_latencies_from_guralp import \
     get_latencies_from_guralp
 
@@ -12,7 +13,9 @@ def get_latencies(
     network: str,
     station: str,
     startdate=date,
-    enddate=date
+    enddate=date,
+    workers: int = 1,
+    cache: Optional[LatencyCache] = None
 ) -> Tuple:
     '''
     A function that returns a dataframe that includes 'network', 'station', \
@@ -28,6 +31,10 @@ def get_latencies(
         The station code for the selected station
     files: str
         A list of Latency files to search, JSON for Apollo, CSV for Guralp
+    workers: int
+        The number of processes reading the files in parallel
+    cache: LatencyCache
+        The cache of the latency files already read, None to read every file
 
     Returns
     -------
@@ -47,7 +54,9 @@ def get_latencies(
             get_latencies_from_apollo(
                 files=files,
                 network=network,
-                station=station)
+                station=station,
+                workers=workers,
+                cache=cache)
 
     elif typeofinstrument == "GURALP":
         combined_latency_dataframe_for_all_days_dataframe, \
@@ -55,7 +64,9 @@ def get_latencies(
             get_latencies_from_guralp(
                 files=files,
                 startdate=startdate,
-                enddate=enddate)
+                enddate=enddate,
+                workers=workers,
+                cache=cache)
         array_of_daily_latency_objects_max_latency_only = \
             array_of_daily_latency_objects_all_latencies
     return combined_latency_dataframe_for_all_days_dataframe,\
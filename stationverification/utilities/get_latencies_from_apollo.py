@@ -1,317 +1,409 @@
-import json
 import logging
 
-from typing import Any, List, Tuple
+from functools import partial
+from typing import Any, Iterator, List, Optional, Tuple
 
+import ijson
+import numpy as np
 import pandas as pd
 from pandas.core.frame import DataFrame
 
 from stationverification.utilities import exceptions
+from stationverification.utilities.\
+    calculate_total_availability_for_nanometrics import \
+    get_percent_availability_per_channel, is_station_id
+from stationverification.utilities.latency_cache import LatencyCache
+from stationverification.utilities.pool_map import pool_map
+
+# Columns of the latency dataframes handed to the plots and the report
+LATENCY_COLUMNS = ['network', 'station', 'channel', 'startTime',
+                   'data_latency']
 
 
 def get_latencies_from_apollo(files: list,
                               network: str,
-                              station: str) -> Tuple[DataFrame, Any, Any]:
-    # Dataframe used to hold latency information for the station
-    columns = ('network', 'station', 'channel',
-               'startTime', 'data_latency')
-    # Storing the data of all the latency files
-    combined_latency_data_for_all_days: dict = {}
+                              station: str,
+                              workers: int = 1,
+                              cache: Optional[LatencyCache] = None) -> \
+        Tuple[DataFrame, Any, Any]:
+    '''
+    Reads the Apollo latency JSON files of a station
+
+    Parameters
+    ----------
+    files: list
+        List of file paths to the Apollo latency JSON files, one per day
+    network: str
+        The network code for the selected station
+    station: str
+        The station code for the selected station
+    workers: int
+        The number of processes reading the files in parallel
+    cache: LatencyCache
+        The cache of the files already read, None to read every file
+
+    Returns
+    -------
+    combined_latency_dataframe_for_all_days_dataframe: DataFrame
+        All the latency values of the validation period, used in the latency
+        log plot and the report
+    array_of_daily_latency_objects_max_latency_only: list
+        A dataframe per day holding only the max latency of each interval,
+        used in the latency line plot
+    array_of_daily_latency_objects_all_latencies: list
+        A dataframe per day holding all the latency values, used in the
+        timely availability plot
+    '''
+    combined_latency_dataframe_for_all_days_dataframe, \
+        array_of_daily_latency_objects_max_latency_only, \
+        array_of_daily_latency_objects_all_latencies, \
+        _ = get_latencies_and_availability_from_apollo(
+            files=files, network=network, station=station, workers=workers,
+            cache=cache)
+    return combined_latency_dataframe_for_all_days_dataframe, \
+        array_of_daily_latency_objects_max_latency_only,\
+        array_of_daily_latency_objects_all_latencies
+
+
+def get_latencies_and_availability_from_apollo(
+        files: list,
+        network: str,
+        station: str,
+        workers: int = 1,
+        cache: Optional[LatencyCache] = None) -> \
+        Tuple[DataFrame, Any, Any, List[dict]]:
+    '''
+    Reads the Apollo latency JSON files of a station, decoding each file once
+    for both the latency values and the percent availability
+
+    Parameters
+    ----------
+    files: list
+        List of file paths to the Apollo latency JSON files, one per day
+    network: str
+        The network code for the selected station
+    station: str
+        The station code for the selected station
+    workers: int
+        The number of processes reading the files in parallel. Each file is
+        read by a single process, and the days are merged back in the order
+        of the files
+    cache: LatencyCache
+        The cache of the files already read, None to read every file. Only
+        the files that are not in the cache, or changed since they were
+        cached, are decoded
+
+    Returns
+    -------
+    The three values returned by get_latencies_from_apollo, followed by
+    array_of_daily_percent_availability: list
+        For each file, the average percent availability keyed by channel id,
+        to be passed to
+        calculate_total_availability_from_daily_percent_availability
+    '''
     # Storing the data of all the latency files seperated into current day
     array_of_daily_latency_objects_max_latency_only: List[Any] = []
     array_of_daily_latency_objects_all_latencies: List[Any] = []
-    for file in files:
-        logging.info(f"Fetching latency from: {file}")
-        # Opening JSON file
-        json_latency_file = open(file)
-        try:
-            latency_data = json.load(json_latency_file)
-        except json.decoder.JSONDecodeError:
-            raise exceptions.LatencyFileError(
-                f'Problem detected in latency file: {file}')
-        # Storing the data of the current days JSON latency file
-        current_day_max_latencies: dict = {}
-        current_day_all_latencies: dict = {}
-        # Iterating through the json availability array which a string "id",
-        # and an array of latency data "Intervals"
-        for current_NSC in latency_data['availability']:
-            current_id = current_NSC["id"]
-            network_station = [network, station]
-
-            # making sure we are looping over the required network station
-            # combo, as the current iteration of the latency JSON files,
-            # contained all the network and stations in one JSON file
-            # for that specific day.
-            if all(x in current_id for x in network_station):
-                # splitting the id column and fetching the network, station
-                # and channel values, id originally looks like the following :
-                # "QW.QCC01.HNN"
-                id_split = current_NSC['id'].split('.')
-                if len(id_split) == 3:
-                    current_network, current_station,\
-                        current_channel = id_split
-                elif len(id_split) == 4:
-                    current_network, current_station, current_location,\
-                        current_channel = id_split
-                # looping over the intervals array, which contains all the
-                # latency objects a specific NSC
-                for current_latency in current_NSC['intervals']:
-                    combined_latency_data_for_all_days, \
-                        current_day_max_latencies, current_day_all_latencies \
-                        = get_latency_value_for_current_timestamp(
-                            current_latency=current_latency,
-                            combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                            current_day_max_latencies=current_day_max_latencies,  # noqa
-                            current_day_all_latencies=current_day_all_latencies,  # noqa
-                            current_network=current_network,
-                            current_station=current_station,
-                            current_channel=current_channel)
-        json_latency_file.close()
+    array_of_daily_percent_availability: List[dict] = []
+    array_of_daily_latency_intervals = pool_map(
+        partial(read_apollo_latency_intervals,
+                network=network, station=station, cache=cache),
+        files,
+        workers=workers)
+    for current_day_intervals, current_day_percent_availability in \
+            array_of_daily_latency_intervals:
+        current_day_latencies = expand_latency_intervals(
+            current_day_intervals)
+        is_max_latency = current_day_latencies['packet'] == 'max'
+        current_day_latencies = current_day_latencies[LATENCY_COLUMNS]
 
         array_of_daily_latency_objects_max_latency_only.append(
-            current_day_max_latencies)
+            current_day_latencies[is_max_latency])
 
         array_of_daily_latency_objects_all_latencies.append(
-            current_day_all_latencies)
+            current_day_latencies)
+
+        array_of_daily_percent_availability.append(
+            current_day_percent_availability)
     logging.info("Creating Latency Dataframe...")
-    combined_latency_dataframe_for_all_days_dataframe = pd.DataFrame(
-        data=combined_latency_data_for_all_days, index=columns).T
+    if array_of_daily_latency_objects_all_latencies:
+        combined_latency_dataframe_for_all_days_dataframe = \
+            drop_repeated_latencies(pd.concat(
+                array_of_daily_latency_objects_all_latencies, sort=False))
+    else:
+        combined_latency_dataframe_for_all_days_dataframe = pd.DataFrame(
+            columns=LATENCY_COLUMNS)
     logging.info("Finished creating latency dataframe")
     return combined_latency_dataframe_for_all_days_dataframe, \
         array_of_daily_latency_objects_max_latency_only,\
-        array_of_daily_latency_objects_all_latencies
+        array_of_daily_latency_objects_all_latencies, \
+        array_of_daily_percent_availability
+
+
+def read_apollo_latency_intervals(file: str,
+                                  network: str,
+                                  station: str,
+                                  cache: Optional[LatencyCache] = None) -> \
+        Tuple[dict, dict]:
+    '''
+    Reads the intervals of one day of Apollo latency data into arrays. This
+    is the unit of work of the parallel reading, the arrays being much
+    cheaper to send back to the parent process than the expanded latencies
+
+    Parameters
+    ----------
+    file: str
+        Path to the Apollo latency JSON file
+    network: str
+        The network code for the selected station
+    station: str
+        The station code for the selected station
+    cache: LatencyCache
+        The cache to read the intervals from, or to store them in when the
+        file is not cached yet
+
+    Returns
+    -------
+    dict
+        The columns of the intervals, see get_latency_intervals
+    dict
+        The average percent availability of the station's channels for the
+        day, keyed by channel id
+    '''
+    logging.info(f"Fetching latency from: {file}")
+    if cache is not None:
+        return cache.read(decode_apollo_latency_file, file, network, station)
+    return decode_apollo_latency_file(file, network, station)
+
+
+def decode_apollo_latency_file(file: str,
+                               network: str,
+                               station: str) -> Tuple[dict, dict]:
+    '''
+    Decodes the intervals and the percent availability of a station from an
+    Apollo latency JSON file, see read_apollo_latency_intervals
+    '''
+    availability = list(iter_station_availability(
+        file=file, network=network, station=station))
+    return get_latency_intervals(availability=availability), \
+        get_percent_availability_per_channel(availability)
+
+
+def iter_station_availability(file: str,
+                              network: str,
+                              station: str) -> Iterator[dict]:
+    '''
+    Streams the entries of the "availability" array belonging to a station.
+
+    The daily latency file holds all the networks and stations, so it is read
+    as a stream of JSON events rather than decoded as a whole, and the
+    intervals of the entries of other stations are skipped without being
+    built. Memory use is bounded by the intervals of a single channel.
+
+    Parameters
+    ----------
+    file: str
+        Path to the Apollo latency JSON file
+    network: str
+        The network code for the selected station
+    station: str
+        The station code for the selected station
+
+    Returns
+    -------
+    Iterator[dict]
+        The "id" and "intervals" of each of the station's channels
+    '''
+    with open(file, 'rb') as json_latency_file:
+        try:
+            events = ijson.parse(json_latency_file, use_float=True)
+            for prefix, event, _ in events:
+                if prefix == 'availability.item' and event == 'start_map':
+                    current_NSC = read_availability_entry(
+                        events=events, network=network, station=station)
+                    if current_NSC is not None:
+                        yield current_NSC
+        except ijson.JSONError:
+            raise exceptions.LatencyFileError(
+                f'Problem detected in latency file: {file}')
+
+
+def read_availability_entry(events: Iterator[tuple],
+                            network: str,
+                            station: str) -> Optional[dict]:
+    '''
+    Reads the events of one entry of the "availability" array, up to the end
+    of the entry
+
+    Parameters
+    ----------
+    events: Iterator
+        The ijson events of the file, positioned at the start of the entry
+    network: str
+        The network code for the selected station
+    station: str
+        The station code for the selected station
+
+    Returns
+    -------
+    dict
+        The "id" and "intervals" of the entry, or None if the entry belongs
+        to another station
+    '''
+    current_id = None
+    intervals: list = []
+    for prefix, event, value in events:
+        if prefix == 'availability.item' and event == 'end_map':
+            break
+        if prefix == 'availability.item.id':
+            current_id = value
+        elif prefix == 'availability.item.intervals' and \
+                event == 'start_array':
+            # The id comes before the intervals in the Apollo files, which
+            # lets the intervals of other stations be skipped unbuilt
+            if current_id is not None and \
+                    not is_station_id(current_id, network, station):
+                for prefix, event, _ in events:
+                    if prefix == 'availability.item.intervals' and \
+                            event == 'end_array':
+                        break
+                continue
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            for prefix, event, value in events:
+                builder.event(event, value)
+                if prefix == 'availability.item.intervals' and \
+                        event == 'end_array':
+                    break
+            intervals = builder.value
+    if current_id is None or not is_station_id(current_id, network, station):
+        return None
+    return {'id': current_id, 'intervals': intervals}
+
+
+def get_latency_intervals(availability: List[dict]) -> dict:
+    '''
+    Flattens the intervals of the station's channels into columns
+
+    Parameters
+    ----------
+    availability: list
+        The "id" and "intervals" of each of the station's channels, as
+        returned by iter_station_availability
+
+    Returns
+    -------
+    dict
+        One numpy array per interval field: 'network', 'station', 'channel',
+        'startTime', 'minimum', 'average', 'maximum' and 'allPackets'
+    '''
+    networks: List[str] = []
+    stations: List[str] = []
+    channels: List[str] = []
+    intervals: List[dict] = []
+    for current_NSC in availability:
+        # id originally looks like the following : "QW.QCC01.HNN", or
+        # "QW.QCC01.00.HNN" when it has a location code
+        id_split = current_NSC['id'].split('.')
+        number_of_intervals = len(current_NSC['intervals'])
+        networks.extend([id_split[0]] * number_of_intervals)
+        stations.extend([id_split[1]] * number_of_intervals)
+        channels.extend([id_split[-1]] * number_of_intervals)
+        intervals.extend(current_NSC['intervals'])
+
+    return {
+        'network': np.array(networks, dtype=object),
+        'station': np.array(stations, dtype=object),
+        'channel': np.array(channels, dtype=object),
+        'startTime': np.array([interval['startTime']
+                               for interval in intervals], dtype=object),
+        'minimum': np.array([interval['latency']['minimum']
+                             for interval in intervals], dtype=float),
+        'average': np.array([interval['latency']['average']
+                             for interval in intervals], dtype=float),
+        'maximum': np.array([interval['latency']['maximum']
+                             for interval in intervals], dtype=float),
+        'allPackets': np.array([interval['retx']['allPackets']
+                                for interval in intervals], dtype=np.int64),
+    }
+
+
+def expand_latency_intervals(intervals: dict) -> DataFrame:
+    '''
+    Expands each interval into one latency value per packet it holds.
+
+    An interval only reports the minimum, average and maximum latency of its
+    packets, so the individual packets are rebuilt as:
+        1 packet: maximum
+        2 packets: maximum, minimum
+        3 packets: maximum, minimum, 3 * average - minimum - maximum
+        more packets: maximum, minimum, and average for each remaining packet
+    Latencies of -1 are placeholders for missing values and are dropped.
+
+    Parameters
+    ----------
+    intervals: dict
+        The columns returned by get_latency_intervals
+
+    Returns
+    -------
+    DataFrame
+        The latency values, with the 'network', 'station', 'channel',
+        'startTime', 'data_latency' columns, and a 'packet' column telling
+        which packet of the interval the value stands for: 'max', 'min',
+        'average' or 'averageN'. Rows are indexed by
+        "{network}.{station}.{channel}.{startTime}.{packet}"
+    '''
+    all_packets = intervals['allPackets']
+    number_of_packets = np.clip(all_packets, 0, None)
+    # Position of each packet in its interval, 0 being the maximum and 1 the
+    # minimum, the rest being averages
+    interval_index = np.repeat(np.arange(all_packets.size), number_of_packets)
+    first_packet = np.cumsum(number_of_packets) - number_of_packets
+    position = np.arange(interval_index.size) - \
+        np.repeat(first_packet, number_of_packets)
+
+    minimum = intervals['minimum'][interval_index]
+    average = intervals['average'][interval_index]
+    maximum = intervals['maximum'][interval_index]
+    packets = all_packets[interval_index]
+    is_max = position == 0
+    is_min = position == 1
+    is_average = position >= 2
+    is_repeated_average = is_average & (packets > 3)
+
+    data_latency = np.where(
+        is_max, maximum,
+        np.where(is_min, minimum,
+                 np.where(is_repeated_average, average,
+                          3 * average - minimum - maximum)))
+    keep = np.where(is_max, maximum != -1,
+                    np.where(is_min, minimum != -1, average != -1))
+
+    packet = np.full(position.size, 'average', dtype=object)
+    packet[is_max] = 'max'
+    packet[is_min] = 'min'
+    packet[is_repeated_average] = np.char.add(
+        'average', (position[is_repeated_average] - 1).astype(str))
+
+    latencies = pd.DataFrame({
+        'network': intervals['network'][interval_index],
+        'station': intervals['station'][interval_index],
+        'channel': intervals['channel'][interval_index],
+        'startTime': intervals['startTime'][interval_index],
+        'data_latency': data_latency,
+        'packet': packet})[keep]
+    latencies.index = latencies.network + '.' + latencies.station + '.' + \
+        latencies.channel + '.' + latencies.startTime + '.' + latencies.packet
+    return drop_repeated_latencies(latencies)
 
 
-def get_latency_value_for_current_timestamp(current_latency: dict,
-                                            combined_latency_data_for_all_days:
-                                            dict,
-                                            current_day_max_latencies: dict,
-                                            current_day_all_latencies: dict,
-                                            current_network: str,
-                                            current_station: str,
-                                            current_channel: str) -> \
-        Tuple[dict, dict, dict]:
-    if current_latency["retx"]["allPackets"] == 1:
-        if current_latency["latency"]["maximum"] != -1:
-            append_to_latency_objects(
-                append_to_current_day_max_latencies=True,
-                append_to_combined_latency_data_for_all_days=True,
-                append_to_current_day_all_latencies=True,
-                current_latency=current_latency["latency"]["maximum"],
-                combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                current_day_max_latencies=current_day_max_latencies,
-                current_day_all_latencies=current_day_all_latencies,
-                current_network=current_network,
-                current_station=current_station,
-                current_channel=current_channel,
-                start_time=current_latency[
-                    'startTime'],
-                packet_id="max")
-
-    elif current_latency["retx"]["allPackets"] == 2:
-        if current_latency["latency"]["maximum"] != -1:
-            append_to_latency_objects(
-                append_to_current_day_max_latencies=True,
-                append_to_combined_latency_data_for_all_days=True,
-                append_to_current_day_all_latencies=True,
-                current_latency=current_latency["latency"]["maximum"],
-                combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                current_day_max_latencies=current_day_max_latencies,
-                current_day_all_latencies=current_day_all_latencies,
-                current_network=current_network,
-                current_station=current_station,
-                current_channel=current_channel,
-                start_time=current_latency[
-                    'startTime'],
-                packet_id="max")
-
-        if current_latency["latency"]["minimum"] != -1:
-            append_to_latency_objects(
-                append_to_current_day_max_latencies=False,
-                append_to_combined_latency_data_for_all_days=True,
-                append_to_current_day_all_latencies=True,
-                current_latency=current_latency["latency"]["minimum"],
-                combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                current_day_max_latencies=current_day_max_latencies,
-                current_day_all_latencies=current_day_all_latencies,
-                current_network=current_network,
-                current_station=current_station,
-                current_channel=current_channel,
-                start_time=current_latency[
-                    'startTime'],
-                packet_id="min")
-
-    elif current_latency["retx"]["allPackets"] == 3:
-        if current_latency["latency"]["maximum"] != -1:
-            append_to_latency_objects(
-                append_to_current_day_max_latencies=True,
-                append_to_combined_latency_data_for_all_days=True,
-                append_to_current_day_all_latencies=True,
-                current_latency=current_latency["latency"]["maximum"],
-                combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                current_day_max_latencies=current_day_max_latencies,
-                current_day_all_latencies=current_day_all_latencies,
-                current_network=current_network,
-                current_station=current_station,
-                current_channel=current_channel,
-                start_time=current_latency[
-                    'startTime'],
-                packet_id="max")
-
-        if current_latency["latency"]["minimum"] != -1:
-            append_to_latency_objects(
-                append_to_current_day_max_latencies=False,
-                append_to_combined_latency_data_for_all_days=True,
-                append_to_current_day_all_latencies=True,
-                current_latency=current_latency["latency"]["minimum"],
-                combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                current_day_max_latencies=current_day_max_latencies,
-                current_day_all_latencies=current_day_all_latencies,
-                current_network=current_network,
-                current_station=current_station,
-                current_channel=current_channel,
-                start_time=current_latency[
-                    'startTime'],
-                packet_id="min")
-
-        if current_latency["latency"]["average"] != -1:
-            calculated_unkown_latency_value_prep = 3 * \
-                current_latency["latency"]["average"]
-            calculated_unkown_latency_value = calculated_unkown_latency_value_prep - current_latency["latency"]["minimum"] - current_latency["latency"]["maximum"]  # noqa
-            append_to_latency_objects(
-                append_to_current_day_max_latencies=False,
-                append_to_combined_latency_data_for_all_days=True,
-                append_to_current_day_all_latencies=True,
-                current_latency=calculated_unkown_latency_value,
-                combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                current_day_max_latencies=current_day_max_latencies,
-                current_day_all_latencies=current_day_all_latencies,
-                current_network=current_network,
-                current_station=current_station,
-                current_channel=current_channel,
-                start_time=current_latency[
-                       'startTime'],
-                packet_id="average")
-
-    elif current_latency["retx"]["allPackets"] > 3:
-        if current_latency["latency"]["maximum"] != -1:
-            append_to_latency_objects(
-                append_to_current_day_max_latencies=True,
-                append_to_combined_latency_data_for_all_days=True,
-                append_to_current_day_all_latencies=True,
-                current_latency=current_latency["latency"]["maximum"],
-                combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                current_day_max_latencies=current_day_max_latencies,
-                current_day_all_latencies=current_day_all_latencies,
-                current_network=current_network,
-                current_station=current_station,
-                current_channel=current_channel,
-                start_time=current_latency[
-                    'startTime'],
-                packet_id="max")
-
-        if current_latency["latency"]["minimum"] != -1:
-            append_to_latency_objects(
-                append_to_current_day_max_latencies=False,
-                append_to_combined_latency_data_for_all_days=True,
-                append_to_current_day_all_latencies=True,
-                current_latency=current_latency["latency"]["minimum"],
-                combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                current_day_max_latencies=current_day_max_latencies,
-                current_day_all_latencies=current_day_all_latencies,
-                current_network=current_network,
-                current_station=current_station,
-                current_channel=current_channel,
-                start_time=current_latency[
-                    'startTime'],
-                packet_id="min")
-
-        if current_latency["latency"]["average"] != -1:
-            number_of_times_to_append_to_latencies = \
-                current_latency["retx"]["allPackets"] - 2
-            for iteration in range(number_of_times_to_append_to_latencies):
-                append_to_latency_objects(
-                    append_to_current_day_max_latencies=False,
-                    append_to_combined_latency_data_for_all_days=True,
-                    append_to_current_day_all_latencies=True,
-                    current_latency=current_latency["latency"]["average"],
-                    combined_latency_data_for_all_days=combined_latency_data_for_all_days,  # noqa
-                    current_day_max_latencies=current_day_max_latencies,
-                    current_day_all_latencies=current_day_all_latencies,
-                    current_network=current_network,
-                    current_station=current_station,
-                    current_channel=current_channel,
-                    start_time=current_latency[
-                        'startTime'],
-                    packet_id=f"average{iteration+1}")
-    return combined_latency_data_for_all_days,\
-        current_day_max_latencies, \
-        current_day_all_latencies
-
-
-def append_to_latency_objects(
-        append_to_current_day_max_latencies: bool,
-        append_to_combined_latency_data_for_all_days: bool,
-        append_to_current_day_all_latencies: bool,
-        current_latency: float,
-        combined_latency_data_for_all_days: dict,
-        current_day_max_latencies: dict,
-        current_day_all_latencies: dict,
-        current_network: str,
-        current_station: str,
-        current_channel: str,
-        start_time: str,
-        packet_id: str):
-    # One dataframe that holds all the latency data, used in Latency Log plot
-    if append_to_combined_latency_data_for_all_days is True:
-        combined_latency_data_for_all_days[current_network +
-                                           "."+current_station
-                                           +
-                                           "."+current_channel
-                                           +
-                                           "." + start_time
-                                           +
-                                           "." + packet_id] = {'network':
-                                                               current_network,
-                                                               'station':
-                                                               current_station,
-                                                               'channel':
-                                                               current_channel,
-                                                               'startTime':
-                                                               start_time,
-                                                               'data_latency':
-                                                               current_latency
-                                                               }
-    if append_to_current_day_all_latencies is True:
-        # An array of dataframes, for each day in the validation period. \
-        # Has all the latency values for that day, used in \
-        # timely_availability_plot
-        current_day_all_latencies[current_network +
-                                  "."+current_station +
-                                  "."+current_channel +
-                                  "." +
-                                  start_time +
-                                  "." + packet_id] = \
-            {'network': current_network,
-                'station': current_station,
-                'channel': current_channel,
-                'startTime': start_time,
-                'data_latency':
-                current_latency
-             }
-    if append_to_current_day_max_latencies is True:
-        # An array of dataframes, for each day in the validation period. \
-        # Only includes the max latency values, used in the latency line plot
-        current_day_max_latencies[current_network +
-                                  "."+current_station +
-                                  "."+current_channel +
-                                  "." +
-                                  start_time +
-                                  "." + packet_id] = \
-            {'network': current_network,
-             'station': current_station,
-             'channel': current_channel,
-             'startTime': start_time,
-             'data_latency':
-             current_latency
-             }
+def drop_repeated_latencies(latencies: DataFrame) -> DataFrame:
+    '''
+    Keeps a single row per latency key, the same packet of the same interval
+    being reported more than once when an id or a file is repeated. The last
+    value reported is kept, at the position the key was first seen.
+    '''
+    if not latencies.index.has_duplicates:
+        return latencies
+    return latencies.groupby(level=0, sort=False).last()
@@ -1,72 +1,138 @@
-from typing import Tuple
+from functools import partial
+from typing import Optional, Tuple
 from datetime import date, timedelta
 
 import pandas as pd
 from pandas.core.frame import DataFrame
 
+from stationverification.utilities.latency_cache import LatencyCache
+from stationverification.utilities.parse_guralp_data_latency import \
+    parse_guralp_data_latency
+from stationverification.utilities.pool_map import pool_map
+
+GURALP_LATENCY_COLUMNS = ['network', 'station', 'channel', 'startTime',
+                          'data_latency']
+
 
 def get_latencies_from_guralp(files: list,
                               startdate: date,
-                              enddate: date) -> \
+                              enddate: date,
+                              workers: int = 1,
+                              cache: Optional[LatencyCache] = None) -> \
         Tuple[DataFrame, list]:
-    combined_latency_dataframe_for_all_days_dataframe = pd.DataFrame(
-        {'network': [], 'station': [], 'channel': [], "startTime": [],
-         'data_latency': []})
-    array_of_daily_latency_objects = []
-    for file in files:
-        current_file_dataframe = pd.read_csv(file)
-
-        current_file_dataframe[['network', 'station', "location", 'channel']
-                               ] = \
-            current_file_dataframe['channel'].str.split('.',
-                                                        expand=True)
-
-        current_file_dataframe.rename(
-            columns={"channel": "channel",
-                     "network latency": "network_latency",
-                     "data latency": "data_latency",
-                     "network": "network",
-                     "station": "station",
-                     "location": "location",
-                     "timestamp": "startTime"}, inplace=True)
-        # Data_latency column is in the format of  "=269/100+6.6", which we \
-        # need to split and get the value for
-        current_file_dataframe[['data_latency']] = \
-            current_file_dataframe['data_latency'].str.extract(
-            '=(.*)/').astype(float)/100
-        current_file_dataframe['data_latency'] = \
-            current_file_dataframe['network_latency'] + \
-            current_file_dataframe['data_latency']
-        combined_latency_dataframe_for_all_days_dataframe = \
-            combined_latency_dataframe_for_all_days_dataframe.append(
-                current_file_dataframe[[
-                    'network', 'station', 'channel', 'startTime',
-                    'data_latency']], sort=False)
-    # Populating the daily latency array by looping over the dates in the
-    # validation period, and filtering the
-    # combined_latency_dataframe_for_all_days_dataframe to only those dates,
-    # then creating a dataframe with that dates data
-    # We then add that dates dataframe into the daily latency array
-
-    # Adding a column that represents the start time in a YY-MM-DD format, in
-    # order to compare it to the current date we are looping over
-    combined_latency_dataframe_for_all_days_dataframe_with_datetime = \
-        combined_latency_dataframe_for_all_days_dataframe
-    combined_latency_dataframe_for_all_days_dataframe_with_datetime["date"] =\
-        pd.to_datetime(
-        combined_latency_dataframe_for_all_days_dataframe["startTime"],
-        infer_datetime_format=True).apply(lambda x: x.strftime('%Y-%m-%d'))
+    '''
+    Reads the Guralp latency CSV files of a station
+
+    Parameters
+    ----------
+    files: list
+        List of file paths to the Guralp latency CSV files, one per channel
+        and day
+    startdate: date
+        The first day of the validation period
+    enddate: date
+        The day after the last day of the validation period
+    workers: int
+        The number of processes reading the files in parallel
+    cache: LatencyCache
+        The cache of the files already read, None to read every file. Only
+        the files that are not in the cache, or changed since they were
+        cached, are parsed
 
+    Returns
+    -------
+    combined_latency_dataframe_for_all_days_dataframe: DataFrame
+        All the latency values of the validation period
+    array_of_daily_latency_objects: list
+        A dataframe per day of the validation period, empty for the days
+        without latency values
+    '''
+    # Each file is read by a single process, the results coming back in the
+    # order of the files. The frames are concatenated once, which keeps the
+    # memory and time linear in the number of files
+    array_of_file_dataframes = pool_map(
+        partial(read_guralp_latency_file, cache=cache), files,
+        workers=workers)
+    if array_of_file_dataframes:
+        combined_latency_dataframe_for_all_days_dataframe = pd.concat(
+            array_of_file_dataframes, sort=False)
+    else:
+        combined_latency_dataframe_for_all_days_dataframe = pd.DataFrame(
+            columns=GURALP_LATENCY_COLUMNS)
+
+    # Populating the daily latency array by splitting the combined dataframe
+    # on the day of the start time, in a single pass, then picking each day
+    # of the validation period, in order
+    day = pd.to_datetime(
+        combined_latency_dataframe_for_all_days_dataframe["startTime"]
+    ).dt.normalize()
+    latencies_per_day = {
+        current_day: current_day_dataframe
+        for current_day, current_day_dataframe in
+        combined_latency_dataframe_for_all_days_dataframe.groupby(
+            day, sort=False)}
+    no_latencies = combined_latency_dataframe_for_all_days_dataframe.iloc[0:0]
+
+    array_of_daily_latency_objects = []
     while startdate < enddate:
         array_of_daily_latency_objects.append(
-            combined_latency_dataframe_for_all_days_dataframe_with_datetime[
-                combined_latency_dataframe_for_all_days_dataframe_with_datetime["date"]  # noqa
-                == str(startdate)])
+            latencies_per_day.get(pd.Timestamp(startdate), no_latencies))
         startdate += timedelta(days=+1)
-
-    if 'date' in\
-            combined_latency_dataframe_for_all_days_dataframe_with_datetime.columns:  # noqa
-        combined_latency_dataframe_for_all_days_dataframe_with_datetime.drop(
-            'date', axis=1, inplace=True)
     return combined_latency_dataframe_for_all_days_dataframe, \
         array_of_daily_latency_objects
+
+
+def read_guralp_latency_file(file: str,
+                             cache: Optional[LatencyCache] = None) -> \
+        DataFrame:
+    '''
+    Reads one Guralp latency CSV file
+
+    Parameters
+    ----------
+    file: str
+        Path to the Guralp latency CSV file
+    cache: LatencyCache
+        The cache to read the latencies from, or to store them in when the
+        file is not cached yet
+
+    Returns
+    -------
+    DataFrame
+        The 'network', 'station', 'channel', 'startTime', 'data_latency'
+        columns of the file
+    '''
+    if cache is not None:
+        columns, _ = cache.read(parse_guralp_latency_file, file)
+    else:
+        columns, _ = parse_guralp_latency_file(file)
+    return pd.DataFrame(columns, columns=GURALP_LATENCY_COLUMNS)
+
+
+def parse_guralp_latency_file(file: str) -> Tuple[dict, dict]:
+    '''
+    Parses the latencies of a Guralp latency CSV file into one numpy array
+    per column, see read_guralp_latency_file. The second value, the metadata
+    stored in the latency cache, is empty
+    '''
+    current_file_dataframe = pd.read_csv(
+        file,
+        usecols=['timestamp', 'channel', 'network latency', 'data latency'],
+        dtype={'timestamp': str, 'channel': str, 'network latency': float,
+               'data latency': str})
+
+    # The channel column holds the SNCL, "QW.QCN08.0N.HNE", which is the
+    # same for most rows, so only the distinct values are split
+    sncl_codes, sncls = pd.factorize(current_file_dataframe['channel'])
+    sncls_split = pd.Series(sncls, dtype=object).str.split(
+        '.', n=3, expand=True).reindex(columns=range(4))
+
+    return {
+        'network': sncls_split[0].values[sncl_codes],
+        'station': sncls_split[1].values[sncl_codes],
+        'channel': sncls_split[3].values[sncl_codes],
+        'startTime': current_file_dataframe['timestamp'].values,
+        'data_latency': parse_guralp_data_latency(
+            expressions=current_file_dataframe['data latency'],
+            network_latency=current_file_dataframe['network latency']
+        ).values}, {}
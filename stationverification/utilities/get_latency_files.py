@@ -1,11 +1,10 @@
 import logging
-import subprocess
 
 from typing import List
-from datetime import date, timedelta
+from datetime import date
 
-from stationverification.utilities.julian_day_converter import \
-    datetime_to_year_and_julian_day
+from stationverification.utilities.latency_file_index import \
+    get_latency_files_by_day
 
 
 def get_latency_files(
@@ -47,30 +46,15 @@ def get_latency_files(
         A list of the files for the specified date range
     '''
     files: list = []
-    iterdate = startdate
-    # Iterate through all the dates in the verification period and collect a
-    # list of the associated files
-    while iterdate < enddate:
-        logging.debug(f'Looking for files for date {iterdate}')
-        if typeofinstrument == "APOLLO":
-            cmd = f'ls {path}/{iterdate.strftime("%Y/%m/%d")}/\
-{network}.{station}.\
-{datetime_to_year_and_julian_day(iterdate, typeofinstrument)}.json 2>/dev/null'
-        elif typeofinstrument == "GURALP":
-            cmd = f'ls {path}/{iterdate.strftime("%Y/%m/%d")}/{network}_\
-{station}_*_*_\
-{datetime_to_year_and_julian_day(iterdate, typeofinstrument)}.csv \
-2>/dev/null'
-
-        output = subprocess.getoutput(
-            cmd
-        ).split('\n')
-
-        if not output == ['']:
-            files.extend(output)
+    # The day directories of the archive are listed in-process, once
+    files_by_day = get_latency_files_by_day(
+        typeofinstrument=typeofinstrument, network=network, station=station,
+        path=path, startdate=startdate, enddate=enddate)
+    for iterdate, files_for_day in files_by_day.items():
+        if files_for_day:
+            files.extend(files_for_day)
         else:
             logging.warning(f'No Latency file found for {iterdate}')
-        iterdate += timedelta(days=+1)
 
     # Throw an exception if no files in the time period are found
     if len(files) <= 0:
@@ -1,70 +1,101 @@
-import arrow
-
 from datetime import date
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
 from pandas.core.frame import DataFrame
-from typing import List, Tuple
 
+from stationverification.utilities.latency_store import parse_start_times
 
-def get_timely_availability_arrays(
-    latencies: DataFrame, threshold: float
-) -> Tuple[list, list, list, list]:
-    HNN_timely_availability_percentage_array: List[float] = []
-    HNE_timely_availability_percentage_array: List[float] = []
-    HNZ_timely_availability_percentage_array: List[float] = []
-    timely_availability_percentage_array_days_axis: List[date] = []
-    for latency_dataframe in latencies:
-        if not latency_dataframe.empty:
-            HNN_latencies = latency_dataframe[latency_dataframe['channel'] ==
-                                              "HNN"]
-            total_number_of_HNN_latencies = HNN_latencies["data_latency"].size
-            number_of_HNN_latencies_below_threshold =\
-                HNN_latencies.loc[HNN_latencies["data_latency"]
-                                  <= threshold]["data_latency"].size
-            if total_number_of_HNN_latencies == 0:
-                HNN_timely_availability_percentage_array.append(0.0)
-            else:
-                HNN_timely_availability_percentage_array.\
-                    append(round(float(
-                        number_of_HNN_latencies_below_threshold /
-                        total_number_of_HNN_latencies * 100), 1))
+# The order of the components of the channels of a band, the others
+# following in alphabetical order
+CHANNEL_COMPONENT_ORDER = 'NEZ'
+
+
+def sort_channels(channels: Iterable[str]) -> List[str]:
+    '''
+    Sorts channel codes by band, then in the N, E, Z order of their
+    components
+    '''
+    return sorted(channels, key=lambda channel: (
+        channel[:-1],
+        CHANNEL_COMPONENT_ORDER.find(channel[-1:]) % (
+            len(CHANNEL_COMPONENT_ORDER) + 1),
+        channel))
 
-            HNE_latencies = latency_dataframe[latency_dataframe['channel'] ==
-                                              "HNE"]
-            total_number_of_HNE_latencies = HNE_latencies["data_latency"].size
-            number_of_HNE_latencies_below_threshold =\
-                HNE_latencies.loc[HNE_latencies["data_latency"]
-                                  <= threshold]["data_latency"].size
-            if total_number_of_HNE_latencies == 0:
-                HNE_timely_availability_percentage_array.append(0.0)
-            else:
-                HNE_timely_availability_percentage_array.\
-                    append(round(float(
-                        number_of_HNE_latencies_below_threshold /
-                        total_number_of_HNE_latencies * 100), 1))
 
-            HNZ_latencies = latency_dataframe[latency_dataframe['channel'] ==
-                                              "HNZ"]
-            total_number_of_HNZ_latencies = HNZ_latencies["data_latency"].size
-            number_of_HNZ_latencies_below_threshold =\
-                HNZ_latencies.loc[HNZ_latencies["data_latency"]
-                                  <= threshold]["data_latency"].size
+def get_timely_availability_matrix(
+    latencies: Union[DataFrame, Iterable[DataFrame]],
+    threshold: float,
+    channels: Optional[Sequence[str]] = None
+) -> DataFrame:
+    '''
+    Returns the percentage of the latencies of each channel of each day that
+    are timely, i.e at most the threshold, rounded to one decimal
 
-            if total_number_of_HNZ_latencies == 0:
-                HNZ_timely_availability_percentage_array.append(0.0)
-            else:
-                HNZ_timely_availability_percentage_array.\
-                    append(round(float(
-                        number_of_HNZ_latencies_below_threshold /
-                        total_number_of_HNZ_latencies * 100), 1))
+    Parameters
+    ----------
+    latencies: DataFrame or list of DataFrames
+        The 'channel', 'startTime' and 'data_latency' of the latencies, as a
+        single dataframe or one per day. The 'start_time' of LatencyStore may
+        be given instead of 'startTime', sparing its decoding
+    threshold: float
+        Maximum latency for a packet to be considered timely
+    channels: list
+        The channels of the matrix. Default: the channels with latencies
 
-            current_dataframe_date = arrow.get(
-                latency_dataframe.iloc[0].startTime).format('YYYY-MM-DD')
-            current_dataframe_date_dateobject = arrow.get(
-                current_dataframe_date, 'YYYY-MM-DD').date()
-            timely_availability_percentage_array_days_axis.append(
-                current_dataframe_date_dateobject)
+    Returns
+    -------
+    DataFrame
+        A day x channel matrix, indexed by the dates of the days with
+        latencies. The channels without latencies on a day are 0.0
+    '''
+    if not isinstance(latencies, DataFrame):
+        daily_latencies = [latency_dataframe for latency_dataframe
+                           in latencies if not latency_dataframe.empty]
+        latencies = pd.concat(daily_latencies, ignore_index=True) \
+            if daily_latencies else DataFrame()
+    if latencies.empty:
+        return DataFrame(columns=list(channels or []), dtype=float)
 
-    return HNN_timely_availability_percentage_array, \
-        HNE_timely_availability_percentage_array,\
-        HNZ_timely_availability_percentage_array,\
+    # The day of each latency, from its start time converted in one pass
+    if 'start_time' in latencies:
+        start_time = np.asarray(latencies['start_time'].values,
+                                dtype='datetime64[ns]')
+    else:
+        start_time = parse_start_times(latencies['startTime'].values)
+    counts = DataFrame({
+        'day': start_time.astype('datetime64[D]'),
+        'channel': latencies['channel'].values,
+        'timely': latencies['data_latency'].values <= threshold
+    }).groupby(['day', 'channel'], observed=True)['timely'].agg(
+        ['size', 'sum'])
+
+    matrix = (counts['sum'] / counts['size'] * 100).round(1).unstack(
+        'channel', fill_value=0.0)
+    matrix.columns = [str(channel) for channel in matrix.columns]
+    matrix = matrix.reindex(
+        columns=sort_channels(matrix.columns) if channels is None
+        else list(channels),
+        fill_value=0.0)
+    matrix.index = pd.Index(pd.DatetimeIndex(matrix.index).date, name='day')
+    matrix.columns.name = 'channel'
+    return matrix.astype(float)
+
+
+def get_timely_availability_arrays(
+    latencies: Union[DataFrame, Iterable[DataFrame]], threshold: float
+) -> Tuple[list, list, list, list]:
+    '''
+    Returns the daily timely availability of the HNN, HNE and HNZ channels,
+    followed by the days, see get_timely_availability_matrix
+    '''
+    matrix = get_timely_availability_matrix(
+        latencies=latencies, threshold=threshold,
+        channels=["HNN", "HNE", "HNZ"])
+    timely_availability_percentage_array_days_axis: List[date] = \
+        list(matrix.index)
+    return list(matrix['HNN']), \
+        list(matrix['HNE']),\
+        list(matrix['HNZ']),\
         timely_availability_percentage_array_days_axis
@@ -3,9 +3,12 @@ import os
 import tempfile
 
 from datetime import date
-from obspy.io.xseed import Parser
-from stationverification import XML_CONVERTER
+from typing import Optional
 from configparser import ConfigParser
+from stationverification.config import get_default_parameters
+from stationverification.utilities.ispaq_shards import run_ispaq_shards, \
+    split_window
+from stationverification.utilities.metadata_cache import MetadataCache
 from stationverification.utilities.prepare_ispaq import \
     InvalidConfigFile, prepare_ispaq_local
 
@@ -22,7 +25,11 @@ def handle_running_ispaq_command(
         station: str = None,
         location: str = None,
         station_url: str = None,
-        stationconf: str = None):
+        stationconf: str = None,
+        workers: int = 1,
+        shard_days: int = 1,
+        metadata_cache: Optional[MetadataCache] = None,
+        station_resp_only: bool = False):
     if stationconf is None:
         run_ispaq_command_with_stationXML(ispaqloc=ispaqloc,
                                           metrics=metrics,
@@ -34,7 +41,11 @@ def handle_running_ispaq_command(
                                           network=network,
                                           station=station,
                                           location=location,
-                                          station_url=station_url)  # type: ignore # noqa
+                                          station_url=station_url,  # type: ignore # noqa
+                                          workers=workers,
+                                          shard_days=shard_days,
+                                          metadata_cache=metadata_cache,
+                                          station_resp_only=station_resp_only)  # noqa
     else:
         run_ispaq_command_with_configfile(ispaqloc=ispaqloc,
                                           metrics=metrics,
@@ -43,7 +54,9 @@ def handle_running_ispaq_command(
                                           pfile=pfile,
                                           pdfinterval=pdfinterval,
                                           miniseedarchive=miniseedarchive,
-                                          stationconf=stationconf)
+                                          stationconf=stationconf,
+                                          workers=workers,
+                                          shard_days=shard_days)
 
 
 def run_ispaq_command_with_stationXML(
@@ -58,7 +71,11 @@ def run_ispaq_command_with_stationXML(
         network: str = None,
         station: str = None,
         location: str = None,
-        resp_dir: str = None):
+        resp_dir: str = None,
+        workers: int = 1,
+        shard_days: int = 1,
+        metadata_cache: Optional[MetadataCache] = None,
+        station_resp_only: bool = False):
 
     station_url_path = "stationverification/data/QW.xml"
 
@@ -66,29 +83,29 @@ def run_ispaq_command_with_stationXML(
         snlc = f'{network}.{station}.*.H**'
     else:
         snlc = f'{network}.{station}.{location}.H**'
-    subprocess.getoutput(f'java -jar {XML_CONVERTER} --input \
-    {station_url_path} --output stationverification/data/stationXML.dataless')
-    pars = Parser("stationverification/data/stationXML.dataless")
-    if not os.path.isdir("stationverification/data/resp_files"):
-        os.mkdir('stationverification/data/resp_files')
-    pars.write_resp(
-        folder="stationverification/data/resp_files/", zipped=False)
-
-    resp_dir = "stationverification/data/resp_files/"
-
-    cmd = f'{ispaqloc} -M {metrics} \
-        --starttime={startdate} --endtime={enddate} \
-        -S {snlc} -P {pfile} \
-            --pdf_interval {pdfinterval} \
-            --station_url {station_url_path} \
-            --dataselect_url {miniseedarchive}\
-            --resp_dir {resp_dir}'
-    print("ISPAQ:", cmd)
-    proc = subprocess.Popen(
-        cmd,
-        shell=True
-    )
-    proc.wait()
+    # The RESP files are converted from the stationXML once, and then read
+    # from the cache until the stationXML changes
+    if metadata_cache is None:
+        metadata_cache = MetadataCache(
+            get_default_parameters().METADATA_CACHE_DIRECTORY)
+    resp_dir = metadata_cache.get_resp_directory(
+        station_url_path,
+        network=network if station_resp_only else None,
+        station=station if station_resp_only else None)
+
+    # The paths are absolute, for the shards run in directories of their own
+    options = f'-S {snlc} --pdf_interval {pdfinterval} \
+--station_url {os.path.abspath(station_url_path)} \
+--dataselect_url {get_absolute_path(miniseedarchive)} \
+--resp_dir {os.path.abspath(resp_dir)}/'
+    run_ispaq(ispaqloc=ispaqloc,
+              metrics=metrics,
+              startdate=startdate,
+              enddate=enddate,
+              pfile=pfile,
+              options=options,
+              workers=workers,
+              shard_days=shard_days)
 
 
 def run_ispaq_command_with_configfile(
@@ -99,7 +116,9 @@ def run_ispaq_command_with_configfile(
         pfile: str,
         pdfinterval: str,
         miniseedarchive: str,
-        stationconf: str):
+        stationconf: str,
+        workers: int = 1,
+        shard_days: int = 1):
 
     stationconfiguration = ConfigParser()
     stationconfiguration.read(stationconf)
@@ -119,13 +138,56 @@ def run_ispaq_command_with_configfile(
         stationconf=stationconfiguration,
         tempfolder=tempfolder.name,
         pfile=pfile,
-        miniseed=miniseedarchive)
+        miniseed=get_absolute_path(miniseedarchive))
+
+    run_ispaq(ispaqloc=ispaqloc,
+              metrics=metrics,
+              startdate=startdate,
+              enddate=enddate,
+              pfile=preffile,
+              options=f'-S {station} --pdf_interval {pdfinterval}',
+              workers=workers,
+              shard_days=shard_days)
 
-    cmd = f'{ispaqloc} -M {metrics} -S {station} --starttime={startdate} \
---endtime={enddate} -P {preffile} --pdf_interval {pdfinterval}'
+
+def run_ispaq(
+        ispaqloc: str,
+        metrics: str,
+        startdate: date,
+        enddate: date,
+        pfile: str,
+        options: str,
+        workers: int = 1,
+        shard_days: int = 1):
+    '''
+    Runs ISPAQ over the period, in shards of shard_days days run workers at a
+    time if given more than one worker and the period holds more than one
+    shard
+    '''
+    if workers > 1 and \
+            len(split_window(startdate, enddate, shard_days)) > 1:
+        run_ispaq_shards(ispaqloc=ispaqloc,
+                         metrics=metrics,
+                         startdate=startdate,
+                         enddate=enddate,
+                         pfile=pfile,
+                         options=options,
+                         workers=workers,
+                         shard_days=shard_days)
+        return
+    cmd = f'{ispaqloc} -M {metrics} --starttime={startdate} \
+--endtime={enddate} -P {pfile} {options}'
     print("ISPAQ:", cmd)
     proc = subprocess.Popen(
         cmd,
         shell=True
     )
     proc.wait()
+
+
+def get_absolute_path(path: str) -> str:
+    '''
+    Returns the absolute path of a local path, leaving the URLs and aliases
+    of web services as they are
+    '''
+    return os.path.abspath(path) if os.path.exists(path) else path
@@ -0,0 +1,253 @@
+'''
+A module that runs ISPAQ over a validation period in shards of a few days,
+several shards at a time, ISPAQ itself using a single core.
+
+Each shard runs in a directory of its own, with a preference file writing the
+outputs of ISPAQ to that directory. Once all the shards are done, the csv
+files of the shards are merged into the csv files of the whole period, named
+as if ISPAQ had been run once, the PSDs are moved to the PSD directory, and
+the transcripts are appended to ISPAQ_TRANSCRIPT.log.
+
+The PDFs are computed from the PSDs of the whole period, so the pdf metric is
+left out of the shards and computed by a last run of ISPAQ over the whole
+period, which reads the PSDs of the shards rather than computing them again.
+'''
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from stationverification.utilities.prepare_ispaq import \
+    ISPAQ_OUTPUT_PREFERENCES, read_preference, redirect_ispaq_outputs, \
+    set_preference
+
+# The kinds of csv files written by ISPAQ, last in their names
+ISPAQ_CSV_KINDS = ['simpleMetrics', 'PSDMetrics', 'sampleRateMetrics']
+ISPAQ_TRANSCRIPT = 'ISPAQ_TRANSCRIPT.log'
+PDF_METRIC = 'pdf'
+
+
+def split_window(startdate: date,
+                 enddate: date,
+                 shard_days: int) -> List[Tuple[date, date]]:
+    '''
+    Splits a period, enddate being non-inclusive, in shards of shard_days
+    days, the last shard holding the remaining days
+    '''
+    shard_days = max(shard_days, 1)
+    windows = []
+    shard_start = startdate
+    while shard_start < enddate:
+        shard_end = min(shard_start + timedelta(days=shard_days), enddate)
+        windows.append((shard_start, shard_end))
+        shard_start = shard_end
+    return windows
+
+
+def get_ispaq_dates(startdate: date, enddate: date) -> str:
+    '''
+    Returns the dates of a period in the names of the csv files of ISPAQ,
+    enddate being non-inclusive
+    '''
+    if startdate == enddate - timedelta(days=1):
+        return f'{startdate}'
+    return f'{startdate}_{enddate - timedelta(days=1)}'
+
+
+def set_metric_alias(contents: List[str],
+                     metrics: str,
+                     metric_names: List[str]) -> List[str]:
+    '''
+    Sets the metrics of an alias of the Metrics section of the lines of a
+    preference file, adding the alias if not found
+    '''
+    contents = list(contents)
+    alias_line = f'  {metrics}: {", ".join(metric_names)}\n'
+    for linenum, line in enumerate(contents):
+        if line.partition(':')[0].strip() == metrics:
+            contents[linenum] = alias_line
+            return contents
+    contents.insert(contents.index('Metrics:\n') + 1, alias_line)
+    return contents
+
+
+def get_metric_names(contents: List[str], metrics: str) -> List[str]:
+    '''
+    Returns the metrics of an alias of a preference file, or the metrics
+    listed if not an alias
+    '''
+    alias = read_preference(contents, metrics)
+    return [name.strip() for name in (alias or metrics).split(',')
+            if name.strip()]
+
+
+def write_preference_file(contents: List[str], directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    with open(f'{directory}/pref.txt', 'w+') as temppref:
+        temppref.write("".join(contents))
+    return f'{directory}/pref.txt'
+
+
+def run_ispaq_in_directory(cmd: str, directory: str):
+    print("ISPAQ:", cmd)
+    subprocess.run(cmd, shell=True, cwd=directory)
+
+
+def run_ispaq_shards(ispaqloc: str,
+                     metrics: str,
+                     startdate: date,
+                     enddate: date,
+                     pfile: str,
+                     options: str,
+                     workers: int,
+                     shard_days: int = 1):
+    '''
+    Runs ISPAQ over a period in shards, the outputs being those of a single
+    run of ISPAQ over the period
+
+    Parameters
+    ----------
+    ispaqloc: str
+        The path or alias of the ispaq cmdline tool
+    metrics: str
+        The alias of the metrics of the preference file
+    startdate: date
+        The first day of the period
+    enddate: date
+        The day after the last day of the period
+    pfile: str
+        The preference file of ISPAQ
+    options: str
+        The other options of ISPAQ, the paths of which must be absolute
+    workers: int
+        The number of shards run at a time
+    shard_days: int
+        The number of days of the shards
+    '''
+    if os.path.exists(ispaqloc):
+        ispaqloc = os.path.abspath(ispaqloc)
+    with open(pfile, "r") as preffile:
+        contents = preffile.readlines()
+    # The output directories of the preference file, relative to the
+    # current directory
+    outputs = {name: os.path.abspath(read_preference(contents, name) or
+                                     f'ispaq_outputs/{directory}')
+               for name, directory in ISPAQ_OUTPUT_PREFERENCES.items()}
+    metric_names = get_metric_names(contents, metrics)
+    shard_contents = set_metric_alias(
+        contents, metrics,
+        [name for name in metric_names if name != PDF_METRIC])
+
+    windows = split_window(startdate, enddate, shard_days)
+    shards_directory = tempfile.mkdtemp(prefix='ispaq_shards', dir='.')
+    try:
+        commands = []
+        for shard_start, shard_end in windows:
+            directory = os.path.abspath(f'{shards_directory}/{shard_start}')
+            preffile = write_preference_file(
+                redirect_ispaq_outputs(shard_contents, directory), directory)
+            commands.append((
+                f'{ispaqloc} -M {metrics} --starttime={shard_start} \
+--endtime={shard_end} -P {preffile} {options}', directory))
+        logging.info(f'Running ISPAQ in {len(windows)} shards, {workers} \
+at a time')
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            list(executor.map(lambda command: run_ispaq_in_directory(
+                *command), commands))
+
+        shard_directories = [directory for _, directory in commands]
+        merge_shard_csvs(shard_directories, windows, outputs['csv_dir'],
+                         startdate, enddate)
+        move_shard_files(shard_directories, 'PSDs', outputs['psd_dir'])
+        move_shard_files(shard_directories, 'PDFs', outputs['pdf_dir'])
+
+        if PDF_METRIC in metric_names:
+            # The PDFs of the whole period, from the PSDs of the shards
+            directory = os.path.abspath(f'{shards_directory}/{PDF_METRIC}')
+            pdf_contents = redirect_ispaq_outputs(
+                set_metric_alias(contents, metrics, [PDF_METRIC]), directory)
+            pdf_contents = set_preference(
+                pdf_contents, 'psd_dir', f"{outputs['psd_dir']}/")
+            pdf_contents = set_preference(
+                pdf_contents, 'pdf_dir', f"{outputs['pdf_dir']}/")
+            run_ispaq_in_directory(
+                f'{ispaqloc} -M {metrics} --starttime={startdate} \
+--endtime={enddate} -P {write_preference_file(pdf_contents, directory)} \
+{options}', directory)
+            shard_directories.append(directory)
+        append_transcripts(shard_directories)
+    finally:
+        shutil.rmtree(shards_directory, ignore_errors=True)
+
+
+def merge_shard_csvs(shard_directories: List[str],
+                     windows: List[Tuple[date, date]],
+                     csv_dir: str,
+                     startdate: date,
+                     enddate: date):
+    '''
+    Merges the csv files of the shards, in the order of the shards, into the
+    csv files of the whole period
+    '''
+    merged: Dict[str, List[str]] = {}
+    dates = get_ispaq_dates(startdate, enddate)
+    for directory, (shard_start, shard_end) in zip(shard_directories,
+                                                   windows):
+        shard_dates = get_ispaq_dates(shard_start, shard_end)
+        csv_directory = f'{directory}/csv'
+        if not os.path.isdir(csv_directory):
+            continue
+        for name in sorted(os.listdir(csv_directory)):
+            kind = next((kind for kind in ISPAQ_CSV_KINDS
+                         if name.endswith(f'_{shard_dates}_{kind}.csv')),
+                        None)
+            if kind is None:
+                continue
+            prefix = name[:-len(f'_{shard_dates}_{kind}.csv')]
+            merged.setdefault(f'{prefix}_{dates}_{kind}.csv', []).append(
+                f'{csv_directory}/{name}')
+
+    os.makedirs(csv_dir, exist_ok=True)
+    for name, files in merged.items():
+        with open(f'{csv_dir}/{name}', 'w') as merged_file:
+            for position, file in enumerate(files):
+                with open(file) as shard_file:
+                    header = shard_file.readline()
+                    # The header is written once, from the first shard
+                    if position == 0:
+                        merged_file.write(header)
+                    shutil.copyfileobj(shard_file, merged_file)
+
+
+def move_shard_files(shard_directories: List[str],
+                     subdirectory: str,
+                     destination: str):
+    '''
+    Moves the files of a subdirectory of the shards, such as the PSDs, to
+    the same place in the destination
+    '''
+    for directory in shard_directories:
+        source = f'{directory}/{subdirectory}'
+        for root, _, names in os.walk(source):
+            target = os.path.join(destination, os.path.relpath(root, source))
+            os.makedirs(target, exist_ok=True)
+            for name in names:
+                shutil.move(os.path.join(root, name),
+                            os.path.join(target, name))
+
+
+def append_transcripts(shard_directories: List[str]):
+    '''
+    Appends the transcripts of the runs of ISPAQ to the one of the current
+    directory
+    '''
+    with open(ISPAQ_TRANSCRIPT, 'a') as transcript:
+        for directory in shard_directories:
+            if os.path.isfile(f'{directory}/{ISPAQ_TRANSCRIPT}'):
+                with open(f'{directory}/{ISPAQ_TRANSCRIPT}') as shard:
+                    shutil.copyfileobj(shard, transcript)
@@ -0,0 +1,181 @@
+'''
+A module that contains an on-disk cache of the latency values read from the
+Apollo and Guralp latency archives, so that re-running a validation over an
+overlapping period only parses the latency files that are new or changed.
+
+Each entry holds the columns read from one latency file, stored as an Arrow
+IPC file, and is keyed by the path, modification time and size of that file.
+'''
+import hashlib
+import json
+import logging
+import os
+
+from typing import Callable, Optional, Tuple
+
+import pyarrow as pa
+
+# Bumped whenever the columns read from the latency files change, so that
+# entries written by a previous version are not used
+CACHE_FORMAT_VERSION = 1
+CACHE_FILE_SUFFIX = '.arrow'
+
+
+class LatencyCache:
+    '''
+    A size-bounded cache of latency columns, evicting the least recently
+    used entries first
+
+    Parameters
+    ----------
+    directory: str
+        The directory to store the cache entries in
+    max_size: int
+        The maximum total size of the entries, in bytes
+    '''
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+
+    def read(self, reader: Callable, file: str, *parameters) -> \
+            Tuple[dict, dict]:
+        '''
+        Returns what was cached for a latency file, or calls the reader on it
+        and caches what it returns
+
+        Parameters
+        ----------
+        reader: Callable
+            Called with the file and the parameters, returns the columns, as
+            a dictionary of numpy arrays, and the metadata, as a dictionary
+            that can be dumped to JSON
+        file: str
+            The path of the latency file
+        parameters:
+            The other arguments of the reader, such as the network and
+            station the latencies are filtered on
+
+        Returns
+        -------
+        dict
+            The columns
+        dict
+            The metadata
+        '''
+        key = self.key(file, reader.__name__, *map(str, parameters))
+        cached = self.load(key)
+        if cached is not None:
+            return cached
+        columns, metadata = reader(file, *parameters)
+        self.store(key, columns, metadata)
+        return columns, metadata
+
+    def key(self, file: str, *parameters: str) -> Optional[str]:
+        '''
+        Returns the key of the entry for a latency file, or None if the file
+        cannot be found
+
+        Parameters
+        ----------
+        file: str
+            The path of the latency file
+        parameters: str
+            Anything else the columns read from the file depend on, such as
+            the network and station they are filtered on
+        '''
+        try:
+            status = os.stat(file)
+        except OSError:
+            return None
+        identity = [str(CACHE_FORMAT_VERSION), os.path.abspath(file),
+                    str(status.st_mtime_ns), str(status.st_size),
+                    *parameters]
+        return hashlib.sha1('\n'.join(identity).encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[dict, dict]]:
+        '''
+        Returns the columns and the metadata stored for a key, or None if
+        there is no entry for it
+        '''
+        if key is None:
+            return None
+        path = self.path(key)
+        try:
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+            # Marks the entry as recently used
+            os.utime(path)
+        except (OSError, pa.ArrowInvalid):
+            return None
+        columns = {
+            name: table.column(name).to_numpy(zero_copy_only=False)
+            for name in table.column_names}
+        metadata = json.loads(table.schema.metadata[b'metadata'])
+        return columns, metadata
+
+    def store(self, key: str, columns: dict, metadata: dict):
+        '''
+        Stores the columns and the metadata for a key, then evicts the least
+        recently used entries if the cache grew over its maximum size
+
+        Parameters
+        ----------
+        key: str
+            The key returned by LatencyCache.key
+        columns: dict
+            The numpy arrays to store, by name
+        metadata: dict
+            Anything else to store with the columns, that can be dumped to
+            JSON
+        '''
+        if key is None:
+            return
+        table = pa.table(
+            {name: pa.array(values, from_pandas=True)
+             for name, values in columns.items()},
+            metadata={'metadata': json.dumps(metadata)})
+        path = self.path(key)
+        # Written under a temporary name then renamed, so that concurrent
+        # readers never see a partial entry
+        temporary_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with pa.OSFile(temporary_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temporary_path, path)
+        except (OSError, pa.ArrowException) as e:
+            logging.warning(f'Could not write to the latency cache: {e}')
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        self.evict()
+
+    def evict(self):
+        '''
+        Deletes the least recently used entries until the cache fits in its
+        maximum size
+        '''
+        entries = []
+        with os.scandir(self.directory) as directory:
+            for entry in directory:
+                if not entry.name.endswith(CACHE_FILE_SUFFIX):
+                    continue
+                try:
+                    status = entry.stat()
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}{CACHE_FILE_SUFFIX}')
@@ -0,0 +1,133 @@
+'''
+A module that contains an index of the latency archives, laid out as
+{path}/YYYY/MM/DD/ with one directory per day.
+
+The directories are listed in-process with os.scandir, and each listing is
+memoized for as long as the directory is not modified, so that the files of
+long validation periods, or of several stations of the same archive, are
+found without listing a directory twice.
+'''
+import glob
+import logging
+import os
+import time
+
+from datetime import date, timedelta
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from stationverification.utilities.julian_day_converter import \
+    datetime_to_year_and_julian_day
+
+# The names of the latency files of a station for a day, as shell patterns
+LATENCY_FILE_PATTERNS = {
+    'APOLLO': '{network}.{station}.{julian_day}.json',
+    'GURALP': '{network}_{station}_*_*_{julian_day}.csv',
+}
+
+# In nanoseconds
+RECENT_MODIFICATION_TIME = 2 * 10 ** 9
+
+
+def get_latency_files_by_day(typeofinstrument: str,
+                             network: str,
+                             station: str,
+                             path: str,
+                             startdate: date,
+                             enddate: date) -> Dict[date, List[str]]:
+    '''
+    Finds the latency files of a station for each day of a date range
+
+    Parameters
+    ----------
+    typeofinstrument: str
+        The type of instrument the data was fetched from 'APOLLO' or 'GURALP'
+    network: str
+        The network that will be found in the latency file name
+    station: str
+        The station that will be found in the latency file name
+    path: str
+        The path to the latency data storage
+    startdate: date
+        The first day of the range
+    enddate: date
+        The day after the last day of the range
+
+    Returns
+    -------
+    dict
+        The paths of the latency files of each day of the range, sorted by
+        name, an empty list for the days without files
+    '''
+    files_by_day: Dict[date, List[str]] = {}
+    pattern = LATENCY_FILE_PATTERNS.get(typeofinstrument)
+    iterdate = startdate
+    while iterdate < enddate:
+        files_by_day[iterdate] = [] if pattern is None else \
+            find_latency_files_for_day(
+                pattern=pattern, network=network, station=station,
+                path=path, day=iterdate, typeofinstrument=typeofinstrument)
+        iterdate += timedelta(days=+1)
+    return files_by_day
+
+
+def find_latency_files_for_day(pattern: str,
+                               network: str,
+                               station: str,
+                               path: str,
+                               day: date,
+                               typeofinstrument: str) -> List[str]:
+    '''
+    Returns the paths of the files of a day directory of the archive matching
+    one of LATENCY_FILE_PATTERNS, sorted by name
+    '''
+    directory = f'{path}/{day.strftime("%Y/%m/%d")}'
+    # The codes are escaped, so that they only ever match themselves
+    day_pattern = pattern.format(
+        network=glob.escape(network),
+        station=glob.escape(station),
+        julian_day=datetime_to_year_and_julian_day(day, typeofinstrument))
+    return [f'{directory}/{name}' for name in list_archive_day(directory)
+            if fnmatchcase(name, day_pattern)]
+
+
+def list_archive_day(directory: str) -> Tuple[str, ...]:
+    '''
+    Returns the names of the files of a directory, sorted, or no names if the
+    directory does not exist. The listing is memoized until the directory is
+    modified
+    '''
+    modification_time = get_modification_time(directory)
+    if modification_time is None:
+        return ()
+    # The modification time of a directory is only as precise as the clock
+    # of the file system, so the listing of a directory modified moments ago,
+    # such as the directory of the current day, is not memoized
+    if time.time_ns() - modification_time < RECENT_MODIFICATION_TIME:
+        return scan_directory.__wrapped__(directory, modification_time)
+    return scan_directory(directory, modification_time)
+
+
+def get_modification_time(directory: str) -> Optional[int]:
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def scan_directory(directory: str, modification_time: int) -> \
+        Tuple[str, ...]:
+    '''
+    Lists the files of a directory. The modification time of the directory
+    is part of the key of the memoized listings, so that a listing is made
+    again once files are added or removed
+    '''
+    logging.debug(f'Listing the latency files of {directory}')
+    try:
+        with os.scandir(directory) as entries:
+            return tuple(sorted(
+                entry.name for entry in entries if not entry.is_dir()))
+    except OSError:
+        return ()
@@ -2,14 +2,22 @@
 A module that contains utilities to extract latency values from HDF5 format
 files and report on them
 '''
-import os
-from typing import Optional
-import arrow
+from typing import List, Optional
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import numpy as np
 
 from pandas.plotting import register_matplotlib_converters
-from datetime import timedelta
+
+from stationverification.utilities.decimate_min_max import decimate_min_max
+from stationverification.utilities.latency_store import parse_start_times
+from stationverification.utilities.plot_renderer import PlotSpec, \
+    render_plots
+
+LATENCY_LINE_PLOT_CHANNELS = ["HNN", "HNE", "HNZ"]
+# The latencies of a channel are reduced to the min and max of a bucket per
+# pixel of the width of the figure, 18.5 inches at 100 dpi
+LATENCY_LINE_PLOT_BUCKETS = 1850
 
 
 def latency_line_plot(
@@ -17,7 +25,8 @@ def latency_line_plot(
     network: str,
     station: str,
     timely_threshold: float,
-    location: Optional[str] = None
+    location: Optional[str] = None,
+    workers: int = 1
 ):
     '''
     Generates a line plot of latency values for each channel of a station
@@ -31,166 +40,198 @@ def latency_line_plot(
         The station code. For the title and name of file
     network: str
         The network code. For the title and name of file
-    channel: str
-        The channel code. For the title and name of file
-    startdate: date
-        The start date of the validation period
     timely_threshold: float
         Maximum latency for a packet to be considered timely
+    location: str
+        The location code. For the name of file
+    workers: int
+        The number of processes drawing the plots of the days, each
+        process drawing its days on a single figure
     return
     -------
     No returned values, but will plot the latency line charts for the given
     validation period
 
     '''
-    # The converter was registered by pandas on import. \
-    # Future versions of pandas will require you to explicitly register \
-    # matplotlib converters.
-    register_matplotlib_converters()
-    for index, latency_dataframe in enumerate(latencies):
-        if not latency_dataframe.empty:
-            # Fetch the current date from the dataframe
-            startdate = arrow.get(
-                latency_dataframe.iloc[0].startTime).format('YYYY-MM-DD')
-            startdate_dateobject = arrow.get(startdate, 'YYYY-MM-DD').date()
-            if location is None:
-                snlc = f'{network}.{station}..'
-            else:
-                snlc = f'{network}.{station}.{location}.'
-
-            filename = f'{snlc}.{startdate_dateobject}\
-.latency_line_plot.png'
-            HNN_latencies = \
-                latency_dataframe[latency_dataframe
-                                  ['channel'] == "HNN"]
-            HNE_latencies = \
-                latency_dataframe[latency_dataframe
-                                  ['channel'] == "HNE"]
-            HNZ_latencies = \
-                latency_dataframe[latency_dataframe
-                                  ['channel'] == "HNZ"]
-            # Setting up the figure
-            fig, axes = plt.subplots(
-                3, 1, sharex=True, sharey=True, figsize=(18.5, 10.5))
-            # add a big axis, hide frame
-            fig.add_subplot(111, frameon=False)
-            # hide tick and tick label of the big axis
-            plt.tick_params(labelcolor='none', which='both', top=False,
-                            bottom=False, left=False, right=False)
-            plt.title(
-                f'Latencies for {network}.{station} \n \
-    {startdate_dateobject}')
-            plt.ylabel("Latency (seconds)")
-            threshold = timely_threshold
-
-            axes[0].set_ylim([0, 10])
-            # Setting up our data
-            x_axis = HNN_latencies.startTime
-            x_axis_as_dates = [arrow.get(x).datetime for x in x_axis]
-            axes[0].set_xlim(
-                [x_axis_as_dates[0], x_axis_as_dates[0]+timedelta(hours=24)])
-            y_axis = HNN_latencies.data_latency
-
-            # Format the dates on the x-axis
-            formatter = mdates.DateFormatter("%Y-%m-%d:%H:%M")
-            axes[0].xaxis.set_major_formatter(formatter)
-            locator = mdates.HourLocator()
-            axes[0].xaxis.set_major_locator(locator)
-            axes[0].tick_params(axis='x', labelrotation=90)
+    render_plots(latency_line_plot_specs(latencies=latencies,
+                                         network=network,
+                                         station=station,
+                                         timely_threshold=timely_threshold,
+                                         location=location,
+                                         chunks=workers),
+                 workers=workers)
 
-            # Plotting the data
 
-            axes[0].plot(
-                x_axis_as_dates, y_axis,
-                marker='o', label='HNN Latency values', linewidth=1,
-                markeredgewidth=1,
-                markersize=1, markevery=100000, c="green")
-            # Show the grid
-            axes[0].set_axisbelow(True)
-            axes[0].grid(visible=True, which='both',
-                         axis='both', linewidth=0.5)
-            # Adding the threshold line
-            axes[0].axhline(threshold, color='r', linewidth="1",
-                            linestyle='--',
-                            label=f"Data Timeliness threshold: \
-    {timely_threshold} seconds")
-
-            legend = axes[0].legend(bbox_to_anchor=(1, 1),
-                                    loc='upper right', fontsize="9")
-
-            # Setting up the second plot for channel HNE
-
-            axes[1].set_ylim([0, 10])
-
-            # Setting up our data
-            x_axis = HNE_latencies.startTime
-            x_axis_as_dates = [arrow.get(x).datetime for x in x_axis]
-            y_axis = HNE_latencies.data_latency
-
-            # Format the dates on the x-axis
-            formatter = mdates.DateFormatter("%Y-%m-%d:%H:%M")
-            axes[1].xaxis.set_major_formatter(formatter)
-            locator = mdates.HourLocator()
-            axes[1].xaxis.set_major_locator(locator)
-            axes[1].tick_params(axis='x', labelrotation=90)
-
-            # Plotting the data
-            axes[1].plot(
-                x_axis_as_dates, y_axis,
-                marker='o', label='HNE Latency values', linewidth=1,
-                markeredgewidth=1,
-                markersize=1, markevery=100000, c="green")
-            # Show the grid
-            axes[1].set_axisbelow(True)
-            axes[1].grid(visible=True, which='both',
-                         axis='both', linewidth=0.5)
-            # Adding the threshold line
-            axes[1].axhline(threshold, color='r', linewidth="1",
-                            linestyle='--',
-                            label=f"Data Timeliness threshold: \
-    {timely_threshold} seconds")
+def latency_line_plot_specs(
+    latencies: list,
+    network: str,
+    station: str,
+    timely_threshold: float,
+    location: Optional[str] = None,
+    chunks: int = 1
+) -> List[PlotSpec]:
+    '''
+    Returns the specs of the latency line plots of the days with latencies,
+    the days being split in chunks of consecutive days. The latencies of
+    each channel are reduced to the min and max of each pixel of the plot,
+    see decimate_min_max
 
-            legend = axes[1].legend(bbox_to_anchor=(1, 1),
-                                    loc='upper right', fontsize="9")
+    Parameters
+    ----------
+    chunks: int
+        The number of specs to split the days in, usually the number of
+        processes drawing them
 
-            # Setting up the third plot for channel HNZ
-            axes[2].set_ylim([0, 10])
+    Returns
+    -------
+    list
+        The specs, each drawn by render_latency_line_plots on a single
+        figure
+    '''
+    if location is None:
+        snlc = f'{network}.{station}..'
+    else:
+        snlc = f'{network}.{station}.{location}.'
+    days = []
+    for latency_dataframe in latencies:
+        if latency_dataframe.empty:
+            continue
+        # The start times of the day are converted in a single pass
+        start_times = parse_start_times(latency_dataframe.startTime.values)
+        channel_codes = np.asarray(latency_dataframe.channel, dtype=object)
+        data_latency = np.asarray(latency_dataframe.data_latency,
+                                  dtype=float)
+        # Fetch the current date from the dataframe
+        startdate = start_times[0].astype('datetime64[D]').item()
+        channels = []
+        for channel in LATENCY_LINE_PLOT_CHANNELS:
+            selected = channel_codes == channel
+            channels.append(decimate_min_max(start_times[selected],
+                                             data_latency[selected],
+                                             LATENCY_LINE_PLOT_BUCKETS))
+        days.append(dict(
+            filename=f'./stationvalidation_output/{snlc}.{startdate}\
+.latency_line_plot.png',
+            title=f'Latencies for {network}.{station} \n \
+    {startdate}',
+            channels=channels))
+    return [PlotSpec(render=render_latency_line_plots,
+                     filenames=[day['filename'] for day in chunk],
+                     timely_threshold=timely_threshold,
+                     days=list(chunk))
+            for chunk in np.array_split(np.asarray(days, dtype=object),
+                                        max(min(chunks, len(days)), 1))
+            if len(chunk)]
+
+
+class LatencyLineFigure:
+    '''
+    The figure of the latency line plots, one panel per channel, set up once
+    and drawn again for each day by swapping the data of its lines
 
-            # Setting up our data
-            x_axis = HNZ_latencies.startTime
-            x_axis_as_dates = [arrow.get(x).datetime for x in x_axis]
-            y_axis = HNZ_latencies.data_latency
+    Parameters
+    ----------
+    timely_threshold: float
+        Maximum latency for a packet to be considered timely
+    '''
 
+    def __init__(self, timely_threshold: float):
+        # The converter was registered by pandas on import. \
+        # Future versions of pandas will require you to explicitly register \
+        # matplotlib converters.
+        register_matplotlib_converters()
+        # Setting up the figure
+        self.figure, self.axes = plt.subplots(
+            3, 1, sharex=True, sharey=True, figsize=(18.5, 10.5))
+        # add a big axis, hide frame
+        title_axis = self.figure.add_subplot(111, frameon=False)
+        # hide tick and tick label of the big axis
+        title_axis.tick_params(labelcolor='none', which='both', top=False,
+                               bottom=False, left=False, right=False)
+        self.title = title_axis.set_title(' \n ')
+        title_axis.set_ylabel("Latency (seconds)")
+
+        self.lines = []
+        self.legends = []
+        for channel, ax in zip(LATENCY_LINE_PLOT_CHANNELS, self.axes):
+            ax.set_ylim([0, 10])
             # Format the dates on the x-axis
             formatter = mdates.DateFormatter("%Y-%m-%d:%H:%M")
-            axes[2].xaxis.set_major_formatter(formatter)
+            ax.xaxis.set_major_formatter(formatter)
             locator = mdates.HourLocator()
-            axes[2].xaxis.set_major_locator(locator)
-            axes[2].tick_params(axis='x', labelrotation=90)
+            ax.xaxis.set_major_locator(locator)
+            ax.tick_params(axis='x', labelrotation=90)
 
-            # Plotting the data
-            axes[2].plot(
-                x_axis_as_dates, y_axis,
-                marker='o', label='HNZ Latency values', linewidth=1,
+            # The line of the latencies, the data of which is set per day
+            line, = ax.plot(
+                np.array([], dtype='datetime64[ns]'), [],
+                marker='o', label=f'{channel} Latency values', linewidth=1,
                 markeredgewidth=1,
                 markersize=1, markevery=100000, c="green")
+            self.lines.append(line)
             # Show the grid
-            axes[2].set_axisbelow(True)
-            axes[2].grid(visible=True, which='both',
-                         axis='both', linewidth=0.5)
+            ax.set_axisbelow(True)
+            ax.grid(visible=True, which='both',
+                    axis='both', linewidth=0.5)
             # Adding the threshold line
-            axes[2].axhline(threshold, color='r', linewidth="1",
-                            linestyle='--',
-                            label=f"Data Timeliness threshold: \
+            ax.axhline(timely_threshold, color='r', linewidth="1",
+                       linestyle='--',
+                       label=f"Data Timeliness threshold: \
     {timely_threshold} seconds")
 
-            legend = axes[2].legend(bbox_to_anchor=(1, 1),
-                                    loc='upper right', fontsize="9")
-            fig.tight_layout()  # Important for the plot labels to not overlap
-            if not os.path.isdir('./stationvalidation_output/'):
-                os.mkdir('./stationvalidation_output/')
-            plt.savefig(
-                f'./stationvalidation_output/{filename}',
-                bbox_extra_artists=(legend,),
-                bbox_inches='tight')
-            plt.close()
+            self.legends.append(ax.legend(bbox_to_anchor=(1, 1),
+                                          loc='upper right', fontsize="9"))
+        self.laid_out = False
+
+    def draw(self, title: str, channels: list):
+        '''
+        Sets the title and the latencies of each channel of a day
+
+        Parameters
+        ----------
+        title: str
+            The title of the plot
+        channels: list
+            The (start times, latencies) of each channel, as datetime64 and
+            float arrays
+        '''
+        self.title.set_text(title)
+        for line, (start_times, data_latency) in zip(self.lines, channels):
+            line.set_data(start_times, data_latency)
+        # The day starts at the first latency of the first channel with
+        # latencies
+        first_start_times = next((start_times
+                                  for start_times, _ in channels
+                                  if len(start_times)), None)
+        if first_start_times is not None:
+            self.axes[0].set_xlim([
+                first_start_times[0],
+                first_start_times[0] + np.timedelta64(24, 'h')])
+        if not self.laid_out:
+            # Important for the plot labels to not overlap. The labels are
+            # the same for every day, so the layout is only computed once
+            self.figure.tight_layout()
+            self.laid_out = True
+
+    def save(self, filename: str):
+        self.figure.savefig(
+            filename,
+            bbox_extra_artists=(self.legends[-1],),
+            bbox_inches='tight')
+
+    def close(self):
+        plt.close(self.figure)
+
+
+def render_latency_line_plots(spec: PlotSpec):
+    '''
+    Draws the spec of the latency line plots of consecutive days, on a single
+    figure
+    '''
+    figure = LatencyLineFigure(spec['timely_threshold'])
+    try:
+        for day in spec['days']:
+            figure.draw(day['title'], day['channels'])
+            figure.save(day['filename'])
+    finally:
+        figure.close()
@@ -1,21 +1,23 @@
 import os
 import warnings
 
-from typing import Optional
+from typing import Optional, Union
 
-import numpy as np
 from datetime import date, timedelta
 
 import matplotlib.pyplot as plt
 import matplotlib
 from pandas.core.frame import DataFrame
 
+from stationverification.utilities.latency_statistics import \
+    LATENCY_BINS, LatencyStatistics
+
 
 warnings.filterwarnings("ignore")
 
 
 def latency_log_plot(
-    latencies: DataFrame,
+    latencies: Union[DataFrame, LatencyStatistics],
     station: str,
     startdate: date,
     enddate: date,
@@ -30,8 +32,9 @@ def latency_log_plot(
 
     Parameters
     ----------
-    latencies: Pandas dataframe
-         Contains 'network', 'station', 'channel', 'startTime', 'data_latency'
+    latencies: Pandas dataframe or LatencyStatistics
+         The statistics of the latencies, as kept by LatencyStore, or a
+         dataframe containing 'data_latency', from which they are computed
     station: str
         The station code. For the title and name of file
     network: str
@@ -53,6 +56,8 @@ def latency_log_plot(
     validation period
 
     '''
+    if isinstance(latencies, DataFrame):
+        latencies = LatencyStatistics.from_values(latencies.data_latency)
 
     # Setting up the file name and plot name based on whether its a one day \
     # validation period or not to know if we include end date or not
@@ -85,12 +90,12 @@ def latency_log_plot(
     if typeofinstrument == "APOLLO":
         note_content = f'Type of Instrument: TitanSMA\n\
 Data availability: {total_availability}%\n\
-Average latency:{round(latencies.data_latency.mean(),2)} seconds\n\
-Standard deviation: {round(np.std(latencies.data_latency),1)}'
+Average latency:{round(latencies.mean,2)} seconds\n\
+Standard deviation: {round(latencies.std,1)}'
     elif typeofinstrument == "GURALP":
         note_content = f'Type of Instrument: Fortimus\n\
-Average latency:{round(latencies.data_latency.mean(),2)} seconds\n\
-Standard deviation: {round(np.std(latencies.data_latency),1)}'
+Average latency:{round(latencies.mean,2)} seconds\n\
+Standard deviation: {round(latencies.std,1)}'
 
     ax1.text(0.9, 0.8, note_content, style='italic', fontsize=12,
              transform=ax1.transAxes,
@@ -98,10 +103,13 @@ Standard deviation: {round(np.std(latencies.data_latency),1)}'
     ax1.set_axisbelow(True)
     plt.grid(visible=True, which='both', axis='both', linewidth=0.5)
 
-    ax1.hist(
-        latencies.data_latency,
-        bins=[0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5,
-              5, 5.5, 6, 6.5, 7, 7.5, 8, 8.5, 9, 9.5, 10],
+    # The histogram is drawn from the counts of the bins, whatever the
+    # number of latencies
+    ax1.bar(
+        LATENCY_BINS[:-1],
+        latencies.histogram,
+        width=LATENCY_BINS[1:] - LATENCY_BINS[:-1],
+        align='edge',
         ec='black',
     )
 
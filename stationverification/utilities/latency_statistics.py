@@ -0,0 +1,110 @@
+'''
+A module that contains the statistics of the latencies of a station, kept
+as the latencies are ingested rather than computed again from all of them.
+
+The statistics are the number, mean and sum of squared deviations from the
+mean of the latencies, as updated by Welford's algorithm, and their
+histogram over the bins of the latency log plot. The statistics of two sets
+of latencies are merged with the parallel form of Welford's algorithm, so
+the statistics of each channel of each day can be computed once, and merged
+into those of any channel or period.
+'''
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+# The bins of the latency log plot, in seconds
+LATENCY_BINS = np.arange(0, 10.5, 0.5)
+
+
+class LatencyStatistics:
+    '''
+    The number, mean, variance and histogram of a set of latencies
+
+    Parameters
+    ----------
+    count: int
+        The number of latencies
+    mean: float
+        The mean of the latencies, NaN if there are none
+    m2: float
+        The sum of the squared deviations of the latencies from their mean
+    histogram: np.ndarray
+        The number of latencies in each of the LATENCY_BINS. The latencies
+        outside of the bins are not counted
+    '''
+
+    def __init__(self,
+                 count: int = 0,
+                 mean: float = np.nan,
+                 m2: float = 0.0,
+                 histogram: Optional[np.ndarray] = None):
+        self.count = int(count)
+        self.mean = float(mean) if count else np.nan
+        self.m2 = float(m2) if count else 0.0
+        self.histogram = np.zeros(len(LATENCY_BINS) - 1, dtype=np.int64) \
+            if histogram is None else np.asarray(histogram, dtype=np.int64)
+
+    @classmethod
+    def from_values(cls, latencies: Sequence[float]) -> 'LatencyStatistics':
+        '''
+        Returns the statistics of latency values
+        '''
+        latencies = np.asarray(latencies, dtype=float)
+        latencies = latencies[~np.isnan(latencies)]
+        if not len(latencies):
+            return cls()
+        mean = latencies.mean()
+        return cls(count=len(latencies),
+                   mean=mean,
+                   m2=np.square(latencies - mean).sum(),
+                   histogram=np.histogram(latencies, LATENCY_BINS)[0])
+
+    @classmethod
+    def merged(cls, statistics: Iterable['LatencyStatistics']) -> \
+            'LatencyStatistics':
+        '''
+        Returns the statistics of the union of sets of latencies
+        '''
+        total = cls()
+        for current in statistics:
+            total.merge(current)
+        return total
+
+    def add(self, latencies: Sequence[float]):
+        '''
+        Adds latency values to the statistics
+        '''
+        self.merge(LatencyStatistics.from_values(latencies))
+
+    def merge(self, other: 'LatencyStatistics'):
+        '''
+        Adds the latencies of other statistics to the statistics
+        '''
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = \
+                other.count, other.mean, other.m2
+        else:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + \
+                delta ** 2 * self.count * other.count / count
+            self.count = count
+        self.histogram = self.histogram + other.histogram
+
+    @property
+    def variance(self) -> float:
+        '''
+        The population variance of the latencies, as np.var
+        '''
+        return self.m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self) -> float:
+        '''
+        The population standard deviation of the latencies, as np.std
+        '''
+        return float(np.sqrt(self.variance))
@@ -0,0 +1,336 @@
+'''
+A module that contains a store of the latency values of a validation period,
+kept on disk as memory-mapped numpy arrays.
+
+The latencies are written once, sorted by day then channel, so that the
+latencies of a day, or of a channel on a day, are contiguous slices of the
+arrays. The plots and the report are handed dataframes built on views of
+these slices rather than copies, and the processes sharing the latencies
+only pass the directory of the store around.
+
+The statistics of the latencies of each channel of each day are computed as
+the days are written, and merged into the statistics of a channel or of the
+whole period on demand, see LatencyStatistics.
+'''
+import json
+import os
+import shutil
+import tempfile
+
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.core.frame import DataFrame
+
+from stationverification.utilities.latency_statistics import \
+    LatencyStatistics
+
+LATENCY_STORE_COLUMNS = ['network', 'station', 'channel', 'startTime',
+                         'data_latency']
+# The columns holding a few distinct values, stored as codes
+CODED_COLUMNS = ['network', 'station', 'channel']
+# The kind of packet of each latency, see expand_latency_intervals. Guralp
+# latencies are stored as 'max', every value being plotted
+PACKET_KINDS = ['max', 'min', 'average']
+METADATA_FILE = 'latency_store.json'
+# The arrays of the statistics of each channel of each day
+STATISTICS_ARRAYS = ['statistics_count', 'statistics_mean', 'statistics_m2',
+                     'statistics_histogram']
+
+
+class LatencyStore:
+    '''
+    The latencies of a validation period, memory-mapped from a directory
+    written by LatencyStore.create
+
+    Parameters
+    ----------
+    directory: str
+        The directory of the store
+    '''
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, METADATA_FILE)) as metadata_file:
+            metadata = json.load(metadata_file)
+        self.categories = metadata['categories']
+        self.days = [date.fromisoformat(day) for day in metadata['days']]
+        self.day_bounds = metadata['day_bounds']
+        self.arrays = {
+            name: load_array(os.path.join(directory, f'{name}.npy'))
+            for name in ['start_time', 'start_time_text', 'data_latency',
+                         'packet', *CODED_COLUMNS, *STATISTICS_ARRAYS]}
+
+    @classmethod
+    def create(cls,
+               latencies: DataFrame,
+               packet: Optional[Sequence[str]] = None,
+               directory: Optional[str] = None) -> 'LatencyStore':
+        '''
+        Writes the latencies to a new store
+
+        Parameters
+        ----------
+        latencies: DataFrame
+            The 'network', 'station', 'channel', 'startTime', 'data_latency'
+            columns of the latencies
+        packet: list
+            The packet of each latency, 'max', 'min', 'average' or
+            'averageN', as in expand_latency_intervals. None for latencies
+            that each stand for a single packet, as in the Guralp files
+        directory: str
+            The directory to write the store to, a new temporary directory if
+            None
+
+        Returns
+        -------
+        LatencyStore
+            The store, to be deleted with LatencyStore.delete once done with
+        '''
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='latency_store.')
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        start_time = parse_start_times(latencies['startTime'].values)
+        day = start_time.astype('datetime64[D]')
+        codes = {}
+        categories = {}
+        for name in CODED_COLUMNS:
+            column_codes, column_categories = pd.factorize(
+                latencies[name].values)
+            codes[name] = column_codes.astype(np.int16)
+            categories[name] = list(column_categories)
+        if packet is not None:
+            packet = np.asarray(packet, dtype=object)
+            packet_codes = np.full(len(latencies),
+                                   PACKET_KINDS.index('average'),
+                                   dtype=np.int8)
+            packet_codes[packet == 'max'] = PACKET_KINDS.index('max')
+            packet_codes[packet == 'min'] = PACKET_KINDS.index('min')
+        else:
+            packet_codes = np.full(len(latencies), PACKET_KINDS.index('max'),
+                                   dtype=np.int8)
+
+        # Sorting by day then channel, the rows of a channel keeping the order
+        # they were read in
+        order = np.lexsort((codes['channel'], day))
+        day = day[order]
+        days, day_starts = np.unique(day, return_index=True)
+        arrays = {
+            'start_time': start_time[order],
+            'start_time_text': np.asarray(
+                latencies['startTime'].values, dtype=object
+            )[order].astype(bytes),
+            'data_latency': np.asarray(
+                latencies['data_latency'].values, dtype=float)[order],
+            'packet': packet_codes[order],
+            **{name: codes[name][order] for name in CODED_COLUMNS}}
+        arrays.update(get_daily_statistics(
+            arrays['data_latency'], arrays['channel'],
+            [*day_starts, len(day)], len(categories['channel'])))
+        for name, values in arrays.items():
+            np.save(os.path.join(directory, f'{name}.npy'), values)
+        with open(os.path.join(directory, METADATA_FILE), 'w') as \
+                metadata_file:
+            json.dump({
+                'categories': categories,
+                'days': [str(current_day) for current_day in days],
+                'day_bounds': [int(bound) for bound in
+                               [*day_starts, len(day)]]},
+                metadata_file)
+        return cls(directory)
+
+    def latencies(self,
+                  day: Optional[date] = None,
+                  channel: Optional[str] = None,
+                  max_only: bool = False,
+                  above: Optional[float] = None,
+                  columns: List[str] = LATENCY_STORE_COLUMNS) -> DataFrame:
+        '''
+        Returns the latencies of the store, of a day, or of a channel on a day
+
+        Parameters
+        ----------
+        day: date
+            The day of the latencies, all the days if None
+        channel: str
+            The channel of the latencies, all the channels if None. Only
+            used with a day
+        max_only: bool
+            Whether to keep only the max latency of each interval, as done
+            for the latency line plot
+        above: float
+            Keeps only the latencies above this value, as done for the CSV of
+            failed latencies
+        columns: list
+            The columns of the dataframe. The columns are views of the store,
+            except for 'startTime', which is decoded, so it is best left out
+            when not used. 'start_time' holds the start times as datetime64
+
+        Returns
+        -------
+        DataFrame
+            The latencies, in the order of the store
+        '''
+        rows = self.rows(day=day, channel=channel)
+        # Selecting rows copies the columns, which is only done for the
+        # latencies of a day or for the few latencies above a value
+        if max_only or above is not None:
+            selected = np.ones(rows.stop - rows.start, dtype=bool)
+            if max_only:
+                selected &= self.arrays['packet'][rows] == \
+                    PACKET_KINDS.index('max')
+            if above is not None:
+                selected &= self.arrays['data_latency'][rows] > above
+            rows = np.flatnonzero(selected) + rows.start
+        dataframe_columns = {}
+        for name in columns:
+            if name in CODED_COLUMNS:
+                dataframe_columns[name] = pd.Categorical.from_codes(
+                    self.arrays[name][rows],
+                    categories=self.categories[name])
+            elif name == 'startTime':
+                dataframe_columns[name] = \
+                    self.arrays['start_time_text'][rows].astype(str).astype(
+                        object)
+            else:
+                dataframe_columns[name] = self.arrays[name][rows]
+        return pd.DataFrame(dataframe_columns, columns=columns, copy=False)
+
+    def statistics(self,
+                   day: Optional[date] = None,
+                   channel: Optional[str] = None) -> LatencyStatistics:
+        '''
+        Returns the statistics of the latencies of the store, of a day, of a
+        channel, or of a channel on a day, merged from the statistics of each
+        channel of each day rather than computed from the latencies
+        '''
+        days = range(len(self.days)) if day is None else \
+            [self.days.index(day)] if day in self.days else []
+        channels = range(len(self.categories['channel'])) \
+            if channel is None else \
+            [self.categories['channel'].index(channel)] \
+            if channel in self.categories['channel'] else []
+        return LatencyStatistics.merged(
+            LatencyStatistics(
+                count=self.arrays['statistics_count'][day_index, code],
+                mean=self.arrays['statistics_mean'][day_index, code],
+                m2=self.arrays['statistics_m2'][day_index, code],
+                histogram=self.arrays['statistics_histogram'][day_index,
+                                                              code])
+            for day_index in days for code in channels)
+
+    def daily_latencies(self,
+                        max_only: bool = False,
+                        columns: List[str] = LATENCY_STORE_COLUMNS) -> \
+            Iterator[DataFrame]:
+        '''
+        Yields the latencies of each day of the store holding latencies, in
+        order, see LatencyStore.latencies
+        '''
+        for day in self.days:
+            yield self.latencies(day=day, max_only=max_only, columns=columns)
+
+    def rows(self,
+             day: Optional[date] = None,
+             channel: Optional[str] = None) -> slice:
+        '''
+        Returns the slice of the arrays holding the latencies of a day, or of
+        a channel on a day
+        '''
+        if day is None:
+            return slice(0, self.day_bounds[-1])
+        if day not in self.days:
+            return slice(0, 0)
+        index = self.days.index(day)
+        start, stop = self.day_bounds[index], self.day_bounds[index + 1]
+        if channel is None:
+            return slice(start, stop)
+        if channel not in self.categories['channel']:
+            return slice(0, 0)
+        # The channels of a day are sorted by code
+        code = self.categories['channel'].index(channel)
+        channel_codes = self.arrays['channel'][start:stop]
+        return slice(
+            start + int(np.searchsorted(channel_codes, code, 'left')),
+            start + int(np.searchsorted(channel_codes, code, 'right')))
+
+    def delete(self):
+        '''
+        Deletes the directory of the store. The dataframes already handed out
+        remain usable, the files being unlinked only once unmapped
+        '''
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def load_array(path: str) -> np.ndarray:
+    '''
+    Memory-maps a numpy array, empty arrays being loaded as they cannot be
+    mapped
+    '''
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        return np.load(path)
+
+
+def parse_start_times(start_times: Sequence[str]) -> np.ndarray:
+    '''
+    Converts the text start times of latencies, as found in the latency
+    files, to a datetime64 array of UTC times in a single pass
+    '''
+    return pd.to_datetime(
+        pd.Series(start_times, dtype=object), utc=True
+    ).values.astype('datetime64[ns]')
+
+
+def get_daily_statistics(data_latency: np.ndarray,
+                         channel_codes: np.ndarray,
+                         day_bounds: List[int],
+                         number_of_channels: int) -> Dict[str, np.ndarray]:
+    '''
+    Returns the arrays of the statistics of the latencies of each channel of
+    each day, the latencies being sorted by day then channel
+
+    Parameters
+    ----------
+    data_latency: np.ndarray
+        The latencies
+    channel_codes: np.ndarray
+        The code of the channel of each latency
+    day_bounds: list
+        The first row of each day, followed by the number of rows
+    number_of_channels: int
+        The number of channel codes
+
+    Returns
+    -------
+    dict
+        The STATISTICS_ARRAYS, indexed by day then channel code
+    '''
+    shape = (len(day_bounds) - 1, number_of_channels)
+    statistics = {
+        'statistics_count': np.zeros(shape, dtype=np.int64),
+        'statistics_mean': np.full(shape, np.nan),
+        'statistics_m2': np.zeros(shape),
+        'statistics_histogram': np.zeros(
+            (*shape, len(LatencyStatistics().histogram)), dtype=np.int64)}
+    for day_index, (start, stop) in enumerate(zip(day_bounds[:-1],
+                                                  day_bounds[1:])):
+        day_codes = channel_codes[start:stop]
+        for code in np.unique(day_codes):
+            channel_start = start + int(np.searchsorted(day_codes, code,
+                                                        'left'))
+            channel_stop = start + int(np.searchsorted(day_codes, code,
+                                                       'right'))
+            current = LatencyStatistics.from_values(
+                data_latency[channel_start:channel_stop])
+            statistics['statistics_count'][day_index, code] = current.count
+            statistics['statistics_mean'][day_index, code] = current.mean
+            statistics['statistics_m2'][day_index, code] = current.m2
+            statistics['statistics_histogram'][day_index, code] = \
+                current.histogram
+    return statistics
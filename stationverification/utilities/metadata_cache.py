@@ -0,0 +1,162 @@
+'''
+A module that contains an on-disk cache of the station metadata converted for
+ISPAQ, so that the stationXML is converted to dataless SEED, and the RESP
+files written from it, once rather than on every validation.
+
+The entries are keyed by the content of the stationXML file. Each entry holds
+the dataless SEED of the stationXML and its RESP files, either those of all
+the channels or those of the channels of a single station:
+
+    {directory}/{key}/stationXML.dataless
+    {directory}/{key}/resp_files/
+    {directory}/{key}/resp_files.{network}.{station}/
+'''
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+
+from typing import Callable, Optional
+
+from obspy.io.xseed import Parser
+
+from stationverification import XML_CONVERTER
+from stationverification.utilities.exceptions import MetadataConversionError
+
+# Bumped whenever the way the metadata is converted changes, so that entries
+# written by a previous version are not used
+CACHE_FORMAT_VERSION = 1
+DATALESS_FILE = 'stationXML.dataless'
+RESP_DIRECTORY = 'resp_files'
+
+
+class MetadataCache:
+    '''
+    A cache of the dataless SEED and RESP files converted from stationXML
+    files
+
+    Parameters
+    ----------
+    directory: str
+        The directory to store the cache entries in
+    '''
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_resp_directory(self,
+                           station_xml: str,
+                           network: Optional[str] = None,
+                           station: Optional[str] = None) -> str:
+        '''
+        Returns the directory of the RESP files of a stationXML file,
+        converting it if it was not already
+
+        Parameters
+        ----------
+        station_xml: str
+            The path to the stationXML file
+        network: str
+            The network of the station to write the RESP files of, None for
+            all the stations
+        station: str
+            The station to write the RESP files of, None for all the
+            stations
+
+        Returns
+        -------
+        str
+            The directory of the RESP files, ending with a /
+        '''
+        entry = os.path.join(self.directory, self.key(station_xml))
+        name = RESP_DIRECTORY if network is None or station is None \
+            else f'{RESP_DIRECTORY}.{network}.{station}'
+        resp_dir = os.path.join(entry, name)
+        if os.path.isdir(resp_dir):
+            logging.info(f'Using the RESP files cached in {resp_dir}')
+        else:
+            dataless = self.get_dataless(station_xml, entry)
+            store(resp_dir, lambda directory: write_resp_files(
+                dataless, directory, network, station))
+        return f'{resp_dir}/'
+
+    def get_dataless(self, station_xml: str, entry: str) -> str:
+        '''
+        Returns the path of the dataless SEED of a stationXML file in its
+        entry, converting it if it was not already
+        '''
+        dataless = os.path.join(entry, DATALESS_FILE)
+        if not os.path.isfile(dataless):
+            os.makedirs(entry, exist_ok=True)
+            store(dataless, lambda path: convert_to_dataless(station_xml,
+                                                             path))
+        return dataless
+
+    def key(self, station_xml: str) -> str:
+        '''
+        Returns the key of the entry of a stationXML file, the hash of its
+        content
+        '''
+        digest = hashlib.sha256(
+            f'{CACHE_FORMAT_VERSION}\n{os.path.basename(XML_CONVERTER)}\n'
+            .encode())
+        with open(station_xml, 'rb') as xml_file:
+            for chunk in iter(lambda: xml_file.read(1024 ** 2), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+def store(path: str, writer: Callable):
+    '''
+    Writes a file or a directory of the cache under a temporary name then
+    renames it, so that concurrent validations never see a partial one
+    '''
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        writer(temporary_path)
+        os.rename(temporary_path, path)
+    except OSError:
+        # Another validation stored the same conversion first
+        if not os.path.exists(path):
+            raise
+    finally:
+        if os.path.isdir(temporary_path):
+            shutil.rmtree(temporary_path, ignore_errors=True)
+        elif os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def convert_to_dataless(station_xml: str, dataless: str):
+    '''
+    Converts a stationXML file to dataless SEED, with the stationxml-seed
+    converter
+    '''
+    logging.info(f'Converting {station_xml} to dataless SEED..')
+    subprocess.getoutput(f'java -jar {XML_CONVERTER} --input \
+{station_xml} --output {dataless}')
+    if not os.path.isfile(dataless):
+        raise MetadataConversionError(
+            f'{station_xml} could not be converted to dataless SEED')
+
+
+def write_resp_files(dataless: str,
+                     directory: str,
+                     network: Optional[str] = None,
+                     station: Optional[str] = None):
+    '''
+    Writes the RESP files of the channels of a dataless SEED to a directory,
+    only those of a station if given one
+    '''
+    parser = Parser(dataless)
+    if network is not None and station is not None:
+        # Only the blockettes of the station are turned into RESP files
+        parser.stations = [
+            blockettes for blockettes in parser.stations
+            if blockettes[0].network_code.strip() == network and
+            blockettes[0].station_call_letters.strip() == station]
+        if not parser.stations:
+            raise MetadataConversionError(
+                f'No metadata for {network}.{station} in {dataless}')
+    os.makedirs(directory)
+    parser.write_resp(folder=directory, zipped=False)
@@ -5,8 +5,12 @@ a passing or failing grade
 Functions
 ---------
 metric_handler:
-    Given a metric name and a list of values, passes the values to the correct
-    function for validation
+    Given a metric name and a list of values, checks the values against the
+    threshold of the metric
+
+evaluate_metrics:
+    Checks the values of several metrics for several channels at once, as
+    declared in METRIC_CHECKS
 
 check_num_gap:
     Check the values for the num_gaps metric
@@ -66,7 +70,9 @@ check_telemetry_sync_error
 from datetime import date, timedelta
 from configparser import ConfigParser
 import logging
-from typing import List
+from typing import Callable, Dict, List
+
+import numpy as np
 
 from stationverification.utilities import exceptions
 
@@ -81,33 +87,246 @@ class MetricResults(dict):
         return self["details"]
 
 
+class MetricCheck(dict):
+    '''
+    How the values of a metric are checked against its threshold
+    '''
+    @property
+    def comparison(self) -> str:
+        '''
+        The comparison of a value to the threshold failing it, one of
+        COMPARISONS
+        '''
+        return self["comparison"]
+
+    @property
+    def message(self) -> str:
+        '''
+        The details of a failing value, formatted with the value, its
+        int_value and its date, or with the average of the values for the
+        metrics checked on their average
+        '''
+        return self["message"]
+
+    @property
+    def average(self) -> bool:
+        '''
+        Whether the average of the values is checked, rather than the value
+        of each day
+        '''
+        return self.get("average", False)
+
+    @property
+    def first_occurrence(self) -> bool:
+        '''
+        Whether a failing value is reported on the first day with that same
+        value, as num_spikes always has
+        '''
+        return self.get("first_occurrence", False)
+
+
+# The comparisons failing the values of the metrics, applied to the values of
+# all the channels and days at once. The negated comparisons fail NaN values
+COMPARISONS: Dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    '>': lambda values, limits: values > limits,
+    '<': lambda values, limits: values < limits,
+    'not <=': lambda values, limits: ~(values <= limits),
+    'not >=': lambda values, limits: ~(values >= limits),
+    # The flags are compared as integers
+    'flag': lambda values, limits: ~(np.trunc(values) <= limits),
+}
+
+METRIC_CHECKS: Dict[str, MetricCheck] = {
+    'num_gaps': MetricCheck(
+        comparison='>',
+        message='{value} gaps detected on {date}'),
+    'amplifier_saturation': MetricCheck(
+        comparison='flag',
+        message='Amplifier saturation flag set on {date}'),
+    'calibration_signal': MetricCheck(
+        comparison='flag',
+        message='Calibration signal flag set on {date}'),
+    'suspect_time_tag': MetricCheck(
+        comparison='flag',
+        message='Suspect time tag flag set on {date}'),
+    'timing_quality': MetricCheck(
+        comparison='<',
+        message='Timing quality {value}% on {date}'),
+    'digitizer_clipping': MetricCheck(
+        comparison='not <=',
+        message='Overvoltage detected on {date}'),
+    'max_gap': MetricCheck(
+        comparison='not <=',
+        message='Max gap of {value} seconds detected on {date}'),
+    'num_overlaps': MetricCheck(
+        comparison='>',
+        message='{value} overlaps detected on {date}'),
+    'max_overlap': MetricCheck(
+        comparison='not <=',
+        message='Max overlap of {value} seconds detected on {date}'),
+    'num_spikes': MetricCheck(
+        comparison='not <=',
+        message='{int_value} spikes detected on {date}',
+        first_occurrence=True),
+    'spikes': MetricCheck(
+        comparison='>',
+        message='Spikes flag set {value} times on {date}'),
+    'dead_channel_gsn': MetricCheck(
+        comparison='not <=',
+        message='Channel dead on {date}'),
+    'dead_channel_lin': MetricCheck(
+        comparison='not >=',
+        message='Channel too linear on {date}'),
+    'pct_above_nhnm': MetricCheck(
+        comparison='not <=',
+        message='{average}% noise above the New High Noise Model',
+        average=True),
+    'pct_below_nlnm': MetricCheck(
+        comparison='not <=',
+        message='{average}% noise below the New Low Noise Model',
+        average=True),
+    'percent_availability': MetricCheck(
+        comparison='not >=',
+        message='{average}% data availability',
+        average=True),
+    'clock_locked': MetricCheck(
+        comparison='not >=',
+        message='Clock not locked with enough satelites on {date}'),
+    'telemetry_sync_error': MetricCheck(
+        comparison='not <=',
+        message='Telemetry sync error detected on {date}'),
+}
+
+
 def check_metric_exists(metric: str) -> bool:
-    list_of_available_metrics = [
-        'num_gaps',
-        'amplifier_saturation',
-        'calibration_signal',
-        'suspect_time_tag',
-        'timing_quality',
-        'digitizer_clipping',
-        'max_gap',
-        'num_overlaps',
-        'max_overlap',
-        'num_spikes',
-        'spikes',
-        'dead_channel_gsn',
-        'dead_channel_lin',
-        'pct_above_nhnm',
-        'pct_below_nlnm',
-        'percent_availability',
-        'clock_locked',
-        'telemetry_sync_error',
-    ]
-    #  Grab the right function name from the switcher. If no function exists
-    # for the metric, then lambda should return a blank string
-    if metric not in list_of_available_metrics:
-        return False
-    else:
-        return True
+    return metric in METRIC_CHECKS
+
+
+def get_metric_limits(metrics: List[str],
+                      thresholds: ConfigParser) -> Dict[str, float]:
+    '''
+    Returns the threshold of each metric, 0 for the metrics without one
+    '''
+    return {metric: thresholds.getfloat('thresholds', metric, fallback=0)
+            for metric in metrics}
+
+
+def evaluate_metrics(
+    values: Dict[str, Dict[str, List[float]]],
+    start: date,
+    limits: Dict[str, float]
+) -> Dict[str, Dict[str, MetricResults]]:
+    '''
+    Checks the values of several metrics for several channels against the
+    thresholds of the metrics. The values of all the channels, metrics and
+    days are compared at once, and the details are only formatted for the
+    failing values
+
+    Parameters
+    ----------
+    values: dict
+        The values of each day for each metric, for each channel
+    start: date
+        The start date of the testing period, the date of the first value
+    limits: dict
+        The threshold of each metric, as returned by get_metric_limits
+
+    Returns
+    -------
+    dict:
+        The MetricResults of each metric, for each channel
+    '''
+    channels = list(values)
+    metrics = list(dict.fromkeys(
+        metric for channel in channels for metric in values[channel]))
+    for metric in metrics:
+        if metric not in METRIC_CHECKS:
+            logging.info(f'Function for metric "{metric}" was not found')
+            raise exceptions.MetricHandlerError(
+                'The name of the metric to be tested is incorrect or not \
+found.')
+    number_of_days = max([len(metric_values) for channel in channels
+                          for metric_values in values[channel].values()],
+                         default=0)
+
+    # A (channel x metric x day) matrix of the values, the metrics checked on
+    # their average holding it on the first day
+    matrix = np.full((len(channels), len(metrics), max(number_of_days, 1)),
+                     np.nan)
+    has_value = np.zeros(matrix.shape, dtype=bool)
+    averages: Dict[tuple, float] = {}
+    for channel_index, channel in enumerate(channels):
+        for metric, metric_values in values[channel].items():
+            metric_index = metrics.index(metric)
+            if METRIC_CHECKS[metric].average:
+                # Summed in order, as the reported averages always were
+                average = sum(metric_values) / float(len(metric_values))
+                averages[(channel, metric)] = average
+                matrix[channel_index, metric_index, 0] = average
+                has_value[channel_index, metric_index, 0] = True
+            else:
+                matrix[channel_index, metric_index, :len(metric_values)] = \
+                    metric_values
+                has_value[channel_index, metric_index,
+                          :len(metric_values)] = True
+
+    limit_column = np.array([limits[metric] for metric in metrics])[:, None]
+    failed = np.zeros(matrix.shape, dtype=bool)
+    for comparison, compare in COMPARISONS.items():
+        selected = [index for index, metric in enumerate(metrics)
+                    if METRIC_CHECKS[metric].comparison == comparison]
+        if selected:
+            failed[:, selected] = compare(matrix[:, selected],
+                                          limit_column[selected])
+    failed &= has_value
+
+    results: Dict[str, Dict[str, MetricResults]] = {}
+    for channel_index, channel in enumerate(channels):
+        results[channel] = {}
+        for metric, metric_values in values[channel].items():
+            check = METRIC_CHECKS[metric]
+            failed_days = np.flatnonzero(
+                failed[channel_index, metrics.index(metric)])
+            if check.average:
+                details = [check.message.format(
+                    average=averages[(channel, metric)])
+                    for _ in failed_days]
+            else:
+                details = [format_failure(check, metric_values, int(day),
+                                          start)
+                           for day in failed_days]
+            results[channel][metric] = MetricResults(
+                result=failed_days.size == 0, details=details)
+    return results
+
+
+def format_failure(check: MetricCheck,
+                   values: List[float],
+                   day: int,
+                   start: date) -> str:
+    '''
+    Formats the details of the failing value of a day
+    '''
+    value = values[day]
+    if check.first_occurrence:
+        day = list(values).index(value)
+    return check.message.format(
+        value=value,
+        int_value=int(value) if '{int_value}' in check.message else None,
+        date=start + timedelta(days=day))
+
+
+def check_metric(
+    metric: str,
+    values: List[float],
+    start: date,
+    limit: float
+) -> MetricResults:
+    '''
+    Checks the values of a metric against its threshold, see evaluate_metrics
+    '''
+    return evaluate_metrics({'': {metric: values}}, start,
+                            {metric: limit})[''][metric]
 
 # Function that determins what metric is being checked and then passes
 # the data to the correct function. Each of these functions should return a
@@ -122,8 +341,8 @@ def metric_handler(
     thresholds: ConfigParser
 ) -> MetricResults:
     '''
-    This function determines what check_ function to call when given the name
-    of a metric
+    This function checks the values of a metric, given the name of the
+    metric, against the threshold of the metric
 
     Parameters
     ----------
@@ -144,40 +363,12 @@ def metric_handler(
     str:
         If the station failed the test, some detailed about why
     '''
-    # Switcher dictionary containing the function references for the different
-    # metrics
-    switcher = {
-        'num_gaps': check_num_gaps,
-        'amplifier_saturation':  check_amplifier_saturation,
-        'calibration_signal': check_calibration_signal,
-        'suspect_time_tag': check_suspect_time_tag,
-        'timing_quality': check_timing_quality,
-        'digitizer_clipping': check_digitizer_clipping,
-        'max_gap': check_max_gap,
-        'num_overlaps': check_num_overlaps,
-        'max_overlap': check_max_overlap,
-        'num_spikes': check_num_spikes,
-        'spikes': check_spikes,
-        'dead_channel_gsn': check_dead_channel_gsn,
-        'dead_channel_lin': check_dead_channel_lin,
-        'pct_above_nhnm': check_pct_above_nhnm,
-        'pct_below_nlnm': check_pct_below_nlnm,
-        'percent_availability': check_percent_availability,
-        'clock_locked': check_clock_locked,
-        'telemetry_sync_error': check_telemetry_sync_error
-    }
-
-    #  Grab the right function name from the switcher. If no function exists
-    # for the metric, then lambda should return a blank string
-    func = switcher.get(metric)
-    if func is None:
+    if not check_metric_exists(metric):
         logging.info(f'Function for metric "{metric}" was not found')
         raise exceptions.MetricHandlerError(
             'The name of the metric to be tested is incorrect or not found.')
-    else:
-        result = func(values, start, thresholds.getfloat(
-            'thresholds', metric, fallback=0))
-        return result
+    return check_metric(metric, values, start,
+                        get_metric_limits([metric], thresholds)[metric])
 
 
 # There should be no gaps. Any value that isn't 0 is a fail
@@ -207,14 +398,7 @@ def check_num_gaps(
         If failed, the number of gaps found on the first day that exceeded the
         threshold
     '''
-    result = True
-    details = []
-    for index, gap in enumerate(gaps):
-        if gap > limit:
-            result = False
-            details.append(
-                f'{gap} gaps detected on {start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric('num_gaps', gaps, start, limit)
 
 
 # This flag is meant to signify that the preamplifier is being overridden,
@@ -249,14 +433,8 @@ def check_amplifier_saturation(
     str:
         If failed, the first date that the amplifier_saturation flag was set
     '''
-    result = True
-    details = []
-    for index, value in enumerate(amplifier_saturation):
-        if not int(value) <= limit:
-            result = False
-            details.append(f'Amplifier saturation flag set on \
-{start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric(
+        'amplifier_saturation', amplifier_saturation, start, limit)
 
 
 # This flag is set when a calibration is performed. Any value besides 0 is a
@@ -290,14 +468,7 @@ def check_calibration_signal(
     str:
         If failed, the first date that the calibration_signal flag was set
     '''
-    result = True
-    details = []
-    for index, value in enumerate(calibration_signal):
-        if not int(value) <= limit:
-            result = False
-            details.append(f'Calibration signal flag set on \
-{start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric('calibration_signal', calibration_signal, start, limit)
 
 
 # This flag is set when timing quality has fallen below a datalogger-specific
@@ -333,14 +504,7 @@ def check_suspect_time_tag(
     str:
         If failed, the first date that the suspect_time_tag flag was set
     '''
-    result = True
-    details = []
-    for index, value in enumerate(suspect_time_tag):
-        if not int(value) <= limit:
-            result = False
-            details.append(f'Suspect time tag flag set on \
-{start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric('suspect_time_tag', suspect_time_tag, start, limit)
 
 
 # This metric is the daily average of the timing_quality values stored in the
@@ -373,14 +537,7 @@ def check_timing_quality(
     str:
         If failed, the timing quality value and date that it failed
     '''
-    result = True
-    details = []
-    for index, value in enumerate(timing_quality):
-        if value < limit:
-            result = False
-            details.append(f'Timing quality {value}% on \
-{start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric('timing_quality', timing_quality, start, limit)
 
 
 # Any value besides 0 indicates that the input voltage exceeded the maximum
@@ -415,14 +572,7 @@ def check_digitizer_clipping(
     str:
         If failed, the first date that the digitizer_clipping flag was set
     '''
-    result = True
-    details = []
-    for index, value in enumerate(digitizer_clipping):
-        if not value <= limit:
-            result = False
-            details.append(f'Overvoltage detected on \
-{start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric('digitizer_clipping', digitizer_clipping, start, limit)
 
 # This metric records the longest gap in seconds. There should be no gaps, so
 # any values above 0 are considered a Fail
@@ -455,14 +605,7 @@ def check_max_gap(
     str:
         If failed, the size of the largest gap and the date that it appeared
     '''
-    result = True
-    details = []
-    for index, value in enumerate(max_gap):
-        if not value <= limit:
-            result = False
-            details.append(f'Max gap of {value} seconds detected on \
-{start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric('max_gap', max_gap, start, limit)
 
 
 # This metric counts the number of overlaps. There should be no overlaps, so
@@ -492,14 +635,7 @@ def check_num_overlaps(
     str:
         If failed, the total number of overlaps detected
     '''
-    result = True
-    details = []
-    for index, value in enumerate(num_overlaps):
-        if value > limit:
-            result = False
-            details.append(f'{value} overlaps detected on \
-{start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric('num_overlaps', num_overlaps, start, limit)
 
 
 # This metric records the duration of the longest overlap in seconds. There
@@ -531,15 +667,7 @@ def check_max_overlap(
     str:
         If failed, the size and date of the largest overlap
     '''
-    result = True
-    details = []
-    for index, value in enumerate(max_overlap):
-        if not value <= limit:
-            result = False
-            details.append(f"Max overlap of {value} seconds detected on \
-{start + timedelta(days=index)}")
-    else:
-        return MetricResults(result=result, details=details)
+    return check_metric('max_overlap', max_overlap, start, limit)
 
 
 # This metric detects spikes using a Median Absolute Deviation approach. There
@@ -572,15 +700,7 @@ def check_num_spikes(
     str:
         If failed, the total number of spikes detected
     '''
-    result = True
-    details = []
-    for index, value in enumerate(num_spikes):
-        if not value <= limit:
-            result = False
-            details.append(f"{int(value)} spikes detected on \
-{start + timedelta(days=num_spikes.index(value))}")
-    else:
-        return MetricResults(result=result, details=details)
+    return check_metric('num_spikes', num_spikes, start, limit)
 
 
 # This metric checks how many times the data quality flag is set to 1,
@@ -614,14 +734,7 @@ def check_spikes(
     str:
         If failed,  the first date that the spikes flag was set
     '''
-    result = True
-    details = []
-    for index, value in enumerate(spikes):
-        if value > limit:
-            result = False
-            details.append(f"Spikes flag set {value} times on \
-{start + timedelta(days=index)}")
-    return MetricResults(result=result, details=details)
+    return check_metric('spikes', spikes, start, limit)
 
 
 # This metric returns 1 when a full day's corrected PSD values are 5dB below
@@ -655,14 +768,7 @@ def check_dead_channel_gsn(
     str:
         If failed, the date that the channel first appeared dead
     '''
-    result = True
-    details = []
-    for index, value in enumerate(dead_channel_gsn):
-        if not value <= limit:
-            result = False
-            details.append(f"Channel dead on \
-{start + timedelta(days=index)}")
-    return MetricResults(result=result, details=details)
+    return check_metric('dead_channel_gsn', dead_channel_gsn, start, limit)
 
 
 # This metric determines how linear the mean of PSD values are for the channel.
@@ -694,14 +800,7 @@ def check_dead_channel_lin(
     str:
         If failed, the date that the channel first appeared dead
     '''
-    result = True
-    details = []
-    for index, value in enumerate(dead_channel_lin):
-        if not value >= limit:
-            result = False
-            details.append(f'Channel too linear on \
-{start + timedelta(days=index)}')
-    return MetricResults(result=result, details=details)
+    return check_metric('dead_channel_lin', dead_channel_lin, start, limit)
 
 
 # Returns the percentage of corrected PSD values that fall above the NHNM. For
@@ -734,14 +833,7 @@ def check_pct_above_nhnm(
     str:
         If failed, the percentage of PDF values above the NHNM
     '''
-    average = sum(pct_above_nhnm)/float(len(pct_above_nhnm))
-    result = True
-    details = []
-    if not average <= limit:
-        result = False
-        details.append(f"{average}% noise above \
-the New High Noise Model")
-    return MetricResults(result=result, details=details)
+    return check_metric('pct_above_nhnm', pct_above_nhnm, start, limit)
 
 
 # Checks the percentage of corrected PSD values that fall below the NLNM.
@@ -773,15 +865,7 @@ def check_pct_below_nlnm(
     str:
         If failed, the percentage of PDF values below the NLNM
     '''
-
-    average = sum(pct_below_nlnm)/float(len(pct_below_nlnm))
-    result = True
-    details = []
-    if not average <= limit:
-        result = False
-        details.append(f"{average}% noise below \
-the New Low Noise Model")
-    return MetricResults(result=result, details=details)
+    return check_metric('pct_below_nlnm', pct_below_nlnm, start, limit)
 
 
 # The percentage of available data for the test period should be very high
@@ -812,15 +896,8 @@ def check_percent_availability(
     str:
         If failed, the percentage of data that was available
     '''
-
-    average = sum(percent_availability)/float(len(percent_availability))
-    result = True
-    details = []
-    if not average >= limit:
-        result = False
-        details.append(f"{average}% data \
-availability")
-    return MetricResults(result=result, details=details)
+    return check_metric(
+        'percent_availability', percent_availability, start, limit)
 
 
 # Counts the number of times the "clock_locked" flag has been set to 1, which
@@ -853,14 +930,7 @@ def check_clock_locked(
     str:
         If failed, the first date when this flag was not set not set
     '''
-    result = True
-    details = []
-    for index, value in enumerate(clock_locked):
-        if not value >= limit:
-            result = False
-            details.append(f"Clock not locked with enough satelites on \
-{start + timedelta(days=index)}")
-    return MetricResults(result=result, details=details)
+    return check_metric('clock_locked', clock_locked, start, limit)
 
 # Counts the number of times the data quality flag is set from 0 to 1,
 # indicating data droppouts.
@@ -894,11 +964,5 @@ def check_telemetry_sync_error(
     str:
         If failed, the date of the first telemetry sync error
     '''
-    result = True
-    details = []
-    for index, value in enumerate(telemetry_sync_error):
-        if not value <= limit:
-            result = False
-            details.append(f"Telemetry sync error detected on \
-{start + timedelta(days=index)}")
-    return MetricResults(result=result, details=details)
+    return check_metric(
+        'telemetry_sync_error', telemetry_sync_error, start, limit)
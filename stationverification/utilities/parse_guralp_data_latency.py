@@ -0,0 +1,67 @@
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.core.series import Series
+
+# The "data latency" field of the Guralp latency files is a spreadsheet
+# expression such as "=269/100+6.6": the data latency in hundredths of a
+# second, over the denominator, plus the network latency
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+DATA_LATENCY_EXPRESSION = re.compile(
+    rf'^\s*=?\s*(?P<numerator>{_NUMBER})'
+    rf'(?:\s*/\s*(?P<denominator>{_NUMBER}))?'
+    rf'(?:\s*(?P<offset>[-+](?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?))?\s*$')
+
+
+def parse_guralp_data_latency(expressions: Series,
+                              network_latency: Series) -> Series:
+    '''
+    Evaluates the "data latency" expressions of a Guralp latency file
+
+    Parameters
+    ----------
+    expressions: Series
+        The expressions, in the format of "=numerator/denominator+offset",
+        where the denominator and the offset are optional
+    network_latency: Series
+        The "network latency" column of the file, used as the offset of the
+        expressions that have none
+
+    Returns
+    -------
+    Series
+        The data latency in seconds, NaN for the expressions that could not
+        be parsed and for those with a zero denominator
+    '''
+    # Nearly every row has the full "=numerator/denominator+offset" form,
+    # which is evaluated with plain string operations. The other rows go
+    # through the regular expression
+    data_latency = np.fromiter(
+        (evaluate_data_latency_expression(expression)
+         for expression in expressions.values),
+        dtype=float, count=len(expressions))
+    irregular = np.isnan(data_latency)
+    if irregular.any():
+        parts = expressions[irregular].str.extract(DATA_LATENCY_EXPRESSION)
+        numerator = pd.to_numeric(parts['numerator'])
+        denominator = pd.to_numeric(parts['denominator']).fillna(1.)
+        # A zero denominator gives NaN, as in the plain string evaluation
+        denominator = denominator.where(denominator != 0)
+        offset = pd.to_numeric(parts['offset']).fillna(
+            network_latency[irregular])
+        data_latency[irregular] = numerator / denominator + offset
+    return pd.Series(data_latency, index=expressions.index)
+
+
+def evaluate_data_latency_expression(expression: str) -> float:
+    '''
+    Evaluates a "=numerator/denominator+offset" expression, NaN if it is not
+    in that exact form or if its denominator is zero
+    '''
+    try:
+        numerator, _, rest = expression.lstrip('=').partition('/')
+        denominator, _, offset = rest.partition('+')
+        return float(numerator) / float(denominator) + float(offset)
+    except (AttributeError, ValueError, ZeroDivisionError):
+        return np.nan
@@ -15,7 +15,8 @@ def plot_clock_offset(network: str,
                       enddate: date,
                       results: tuple,
                       threshold: float,
-                      location: Optional[str] = None):
+                      location: Optional[str] = None,
+                      output_directory: str = './stationvalidation_output'):
 
     number_of_expected_samples = 1440
     x_axis = list(range(0, number_of_expected_samples))
@@ -114,9 +115,8 @@ def plot_clock_offset(network: str,
                 # Save the plot to file and then close it so the next \
                 # channel's metrics aren't plotted on the same plot
                 # Write the plot to the output directory
-                if not os.path.isdir("./stationvalidation_output"):
-                    os.mkdir('./stationvalidation_output')
+                os.makedirs(output_directory, exist_ok=True)
                 plt.savefig(
-                    f'stationvalidation_output/{filename}.timing_error.png',
+                    f'{output_directory}/{filename}.timing_error.png',
                     dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
                 plt.close()
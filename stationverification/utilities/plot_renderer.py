@@ -0,0 +1,85 @@
+'''
+A module that renders the plots of a validation on a pool of processes.
+
+The plots are described by plot specs, which hold the values to plot, the
+labels and the name of the file to write, along with the top level function
+drawing them. The specs are built from the metrics and latencies in the
+process holding them, and only the specs are sent to the processes of the
+pool, which draw them with the Agg backend, no display being needed to write
+the PNG files. The specs drawn in the current process use its own backend,
+which is left as it is.
+'''
+import os
+
+from typing import Any, Callable, List, Sequence
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from stationverification.utilities.pool_map import pool_map
+
+PLOT_BACKEND = 'Agg'
+
+
+class PlotSpec(dict):
+    '''
+    The values and labels of a plot, drawn by its render function
+    '''
+    @property
+    def render(self) -> Callable[['PlotSpec'], Any]:
+        return self["render"]
+
+    @property
+    def filename(self) -> str:
+        return self["filename"]
+
+    @property
+    def filenames(self) -> List[str]:
+        '''
+        The files written by the spec, specs drawing several plots listing
+        theirs under 'filenames'
+        '''
+        return self["filenames"] if "filenames" in self else [self.filename]
+
+
+def use_plot_backend():
+    '''
+    Switches the process to the Agg backend, as done by the processes of the
+    pool when they start
+    '''
+    if matplotlib.get_backend().lower() != PLOT_BACKEND.lower():
+        plt.switch_backend(PLOT_BACKEND)
+
+
+def render_plot(spec: PlotSpec):
+    '''
+    Draws a plot spec, creating the directories of its files if needed
+    '''
+    for directory in {os.path.dirname(filename)
+                      for filename in spec.filenames}:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    spec.render(spec)
+
+
+def render_plots(specs: Sequence[PlotSpec], workers: int = 1) -> List:
+    '''
+    Draws plot specs on a pool of processes
+
+    Parameters
+    ----------
+    specs: list
+        The plot specs to draw, the render functions of which must be
+        defined at the top level of a module
+    workers: int
+        The number of processes drawing the plots, with the Agg backend. With
+        1 worker, the plots are drawn in the current process, with its
+        backend
+
+    Returns
+    -------
+    list:
+        The result of the render function of each spec
+    '''
+    return pool_map(render_plot, specs, workers=workers,
+                    initializer=use_plot_backend)
@@ -16,7 +16,8 @@ def plot_timing_quality(network: str,
                         enddate: date,
                         results: Any,
                         threshold: float,
-                        location: Optional[str] = None):
+                        location: Optional[str] = None,
+                        output_directory: str = './stationvalidation_output'):
 
     # Generatre x-axis values as days since startdate
     difference = enddate - startdate
@@ -76,9 +77,7 @@ def plot_timing_quality(network: str,
         # Save the plot to file and then close it so the next channel's metrics
         # aren't plotted on the same plot
         # Write the plot to the output directory
-        if not os.path.isdir("./stationvalidation_output"):
-            os.mkdir('./stationvalidation_output')
-        # plt.savefig(f'stationvalidation_output/{plot_filename}')
-        plt.savefig(f'stationvalidation_output/{filename}.timing_quality.png',
+        os.makedirs(output_directory, exist_ok=True)
+        plt.savefig(f'{output_directory}/{filename}.timing_quality.png',
                     dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
         plt.close()
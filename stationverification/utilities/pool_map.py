@@ -0,0 +1,37 @@
+from multiprocessing import Pool
+from typing import Callable, Iterable, List, Optional
+
+
+def pool_map(function: Callable,
+             iterable: Iterable,
+             workers: int = 1,
+             initializer: Optional[Callable] = None) -> List:
+    '''
+    Applies a function to every item of an iterable on a pool of worker
+    processes, keeping the results in the order of the items
+
+    Parameters
+    ----------
+    function: Callable
+        The function to apply. Must be picklable, i.e defined at the top level
+        of a module, or a functools.partial of such a function
+    iterable: Iterable
+        The items to apply the function to
+    workers: int
+        The maximum number of worker processes. With 1 worker, or a single
+        item, the function is applied in the current process
+    initializer: Callable
+        A function called once by each worker process when it starts, and
+        not called when the function is applied in the current process
+
+    Returns
+    -------
+    list:
+        The result of the function for each item
+    '''
+    items = list(iterable)
+    if workers is None or workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    with Pool(processes=min(workers, len(items)),
+              initializer=initializer) as pool:
+        return pool.map(function, items, chunksize=1)
@@ -36,6 +36,7 @@ import logging
 import json
 
 from datetime import date
+from typing import List, Optional
 
 from obspy.core.inventory.inventory import read_inventory
 from obspy.io.xseed import Parser
@@ -48,6 +49,11 @@ from configparser import ConfigParser
 
 from stationverification import XML_CONVERTER
 
+# The preferences of the output directories of ISPAQ, and the subdirectories
+# of ./ispaq_outputs they point to by default
+ISPAQ_OUTPUT_PREFERENCES = {'csv_dir': 'csv', 'psd_dir': 'PSDs',
+                            'pdf_dir': 'PDFs'}
+
 
 class InvalidConfigFile(Exception):
     '''
@@ -113,6 +119,38 @@ def prepare_ispaq_local(
     return f'{tempfolder}/pref.txt'
 
 
+def read_preference(contents: List[str], name: str) -> Optional[str]:
+    '''
+    Returns the value of a preference of the lines of a preference file, the
+    first one found, without its comment
+    '''
+    for line in contents:
+        key, _, value = line.partition(':')
+        if key.strip() == name:
+            return value.split('#')[0].strip()
+    return None
+
+
+def set_preference(contents: List[str], name: str, value: str) -> List[str]:
+    '''
+    Sets the value of a preference of the lines of a preference file
+    '''
+    return [f'  {name}: {value}\n' if line.partition(':')[0].strip() == name
+            else line for line in contents]
+
+
+def redirect_ispaq_outputs(contents: List[str], directory: str) -> List[str]:
+    '''
+    Sets the output directories of the lines of a preference file, the csv
+    files, PSDs and PDFs of ISPAQ being written to subdirectories of a
+    directory
+    '''
+    for name, subdirectory in ISPAQ_OUTPUT_PREFERENCES.items():
+        contents = set_preference(contents, name,
+                                  f'{directory}/{subdirectory}/')
+    return contents
+
+
 # def prepare_ispaq(
 #     network: str,
 #     station: str,
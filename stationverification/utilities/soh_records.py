@@ -0,0 +1,297 @@
+'''
+A module that reads the SOH miniSEED files record by record, without building
+obspy Traces.
+
+The fixed headers of the records of a file are scanned first, which places
+the samples of every record in the day, and the payloads are then decoded one
+record at a time. Only the records of a single channel, with a supported
+encoding and without overlaps, are read this way, anything else raising
+MSeedRecordError so that the file is read with obspy instead.
+'''
+import struct
+
+from datetime import date
+from typing import Any, Iterator, List, Tuple
+
+import numpy as np
+import numpy.ma as ma
+
+from stationverification.utilities.exceptions import MSeedRecordError
+
+try:
+    # The Steim decoders of libmseed, as wrapped by obspy
+    from obspy.io.mseed.util import _unpack_steim_1, _unpack_steim_2
+except ImportError:  # pragma: no cover
+    _unpack_steim_1 = _unpack_steim_2 = None
+
+FIXED_HEADER_SIZE = 48
+# The data type of the decoded samples of each encoding, as read by obspy
+ENCODING_DTYPES = {
+    1: np.dtype(np.int32),    # INT16
+    3: np.dtype(np.int32),    # INT32
+    4: np.dtype(np.float32),  # FLOAT32
+    5: np.dtype(np.float64),  # FLOAT64
+    10: np.dtype(np.int32),   # STEIM1
+    11: np.dtype(np.int32),   # STEIM2
+}
+UNCOMPRESSED_ENCODINGS = {1: 'i2', 3: 'i4', 4: 'f4', 5: 'f8'}
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class SOHRecord(dict):
+    '''
+    The fixed header of a miniSEED record, with the bytes of its payload
+    '''
+    @property
+    def id(self) -> str:
+        return self["id"]
+
+    @property
+    def starttime(self) -> int:
+        '''
+        In nanoseconds since the epoch
+        '''
+        return self["starttime"]
+
+    @property
+    def sampling_rate(self) -> float:
+        return self["sampling_rate"]
+
+    @property
+    def npts(self) -> int:
+        return self["npts"]
+
+    @property
+    def encoding(self) -> int:
+        return self["encoding"]
+
+    @property
+    def big_endian(self) -> bool:
+        return self["big_endian"]
+
+    @property
+    def payload(self) -> bytes:
+        return self["payload"]
+
+
+def scan_soh_records(file: str) -> List[SOHRecord]:
+    '''
+    Reads the fixed headers of the records of a miniSEED file
+
+    Parameters
+    ----------
+    file: str
+        The path to the miniSEED file
+
+    Returns
+    -------
+    list
+        The records of the file, sorted by start time, as the traces are
+        sorted by obspy before merging them
+
+    Raises
+    ------
+    MSeedRecordError
+        If a record of the file could not be read
+    '''
+    with open(file, 'rb') as mseed_file:
+        buffer = mseed_file.read()
+    records: List[SOHRecord] = []
+    offset = 0
+    while offset < len(buffer):
+        try:
+            record = read_record_header(buffer, offset)
+        except (struct.error, ValueError) as e:
+            # A record cut off within its blockettes, or with a corrupt start
+            # time
+            raise MSeedRecordError(
+                f'The record at byte {offset} of {file} is corrupt: {e}')
+        records.append(record)
+        offset += record['length']
+    if not records:
+        raise MSeedRecordError(f'{file} holds no records')
+    records.sort(key=lambda record: record.starttime)
+    return records
+
+
+def read_record_header(buffer: bytes, offset: int) -> SOHRecord:
+    '''
+    Reads the fixed header and the blockette 1000 of the record starting at
+    an offset of the buffer
+    '''
+    header = buffer[offset:offset + FIXED_HEADER_SIZE]
+    if len(header) < FIXED_HEADER_SIZE or header[6:7] not in b'DRQM':
+        raise MSeedRecordError(f'No miniSEED record at byte {offset}')
+    # The headers are big endian, some writers using little endian instead,
+    # which is told apart by the year of the start time
+    byte_order = '>'
+    if not 1900 <= struct.unpack('>H', header[20:22])[0] <= 2100:
+        byte_order = '<'
+    (year, day_of_year, hour, minute, second, _, ten_thousandths, npts,
+     rate_factor, rate_multiplier, activity_flags, _, _, _, time_correction,
+     data_offset, blockette_offset) = struct.unpack(
+        byte_order + 'HHBBBBHHhhBBBBiHH', header[20:48])
+
+    encoding = big_endian = length = None
+    microseconds = 0
+    while blockette_offset:
+        position = offset + blockette_offset
+        blockette_type, next_blockette = struct.unpack(
+            byte_order + 'HH', buffer[position:position + 4])
+        if blockette_type == 100:
+            # The actual sampling rate, which obspy prefers to the nominal one
+            raise MSeedRecordError('Blockette 100 is not supported')
+        if blockette_type == 1000:
+            encoding, word_order, length_exponent = struct.unpack(
+                'BBB', buffer[position + 4:position + 7])
+            big_endian = word_order == 1
+            length = 2 ** length_exponent
+        elif blockette_type == 1001:
+            microseconds = struct.unpack(
+                'b', buffer[position + 5:position + 6])[0]
+        if next_blockette and next_blockette <= blockette_offset:
+            raise MSeedRecordError('The blockettes of a record loop')
+        blockette_offset = next_blockette
+    if encoding not in ENCODING_DTYPES or length is None:
+        raise MSeedRecordError(f'Unsupported encoding {encoding}')
+    if npts == 0 or offset + length > len(buffer) or \
+            not FIXED_HEADER_SIZE <= data_offset < length:
+        raise MSeedRecordError('A record holds no samples')
+
+    days = date(year, 1, 1).toordinal() - EPOCH_ORDINAL + day_of_year - 1
+    starttime = (((days * 24 + hour) * 60 + minute) * 60 + second) * 10 ** 9 \
+        + ten_thousandths * 10 ** 5 + microseconds * 10 ** 3
+    # The time correction is applied unless flagged as already applied
+    if not activity_flags & 0x02:
+        starttime += time_correction * 10 ** 5
+
+    return SOHRecord(
+        id='.'.join(
+            code.decode('ascii', 'replace').strip() for code in
+            (header[18:20], header[8:13], header[13:15], header[15:18])),
+        starttime=starttime,
+        sampling_rate=get_sampling_rate(rate_factor, rate_multiplier),
+        npts=npts,
+        encoding=encoding,
+        big_endian=big_endian,
+        length=length,
+        payload=buffer[offset + data_offset:offset + length])
+
+
+def get_sampling_rate(rate_factor: int, rate_multiplier: int) -> float:
+    '''
+    Returns the nominal sampling rate of a record, as defined by SEED
+    '''
+    if rate_factor == 0 or rate_multiplier == 0:
+        raise MSeedRecordError('A record has no sampling rate')
+    if rate_factor > 0:
+        return rate_factor * rate_multiplier if rate_multiplier > 0 \
+            else -rate_factor / rate_multiplier
+    return -rate_multiplier / rate_factor if rate_multiplier > 0 \
+        else 1 / (rate_factor * rate_multiplier)
+
+
+def get_record_positions(records: List[SOHRecord]) -> Tuple[List[int], int]:
+    '''
+    Places the samples of the records in the merged trace of the day
+
+    Parameters
+    ----------
+    records: list
+        The records of a file, as returned by scan_soh_records
+
+    Returns
+    -------
+    tuple: (list, int)
+        The position of the first sample of each record, and the number of
+        samples of the merged trace, gaps included
+    '''
+    first = records[0]
+    if any(record.id != first.id or
+           record.sampling_rate != first.sampling_rate or
+           ENCODING_DTYPES[record.encoding] !=
+           ENCODING_DTYPES[first.encoding] for record in records):
+        raise MSeedRecordError('The records are not of a single trace')
+    period = 10 ** 9 / first.sampling_rate
+    positions: List[int] = []
+    end = 0
+    segment_start = segment_position = 0
+    for record in records:
+        # A record following the previous ones within half a sample continues
+        # their trace, as joined by libmseed
+        expected = segment_start + (end - segment_position) * period
+        if positions and abs(record.starttime - expected) <= period / 2:
+            position = end
+        else:
+            # Otherwise the trace is placed by its start time, as done by
+            # obspy when merging
+            position = int(round(
+                (record.starttime - first.starttime) / period))
+            if position < end:
+                raise MSeedRecordError('The records overlap')
+            segment_start, segment_position = record.starttime, position
+        positions.append(position)
+        end = position + record.npts
+    return positions, end
+
+
+def decode_soh_record(record: SOHRecord) -> np.ndarray:
+    '''
+    Decodes the samples of a record
+    '''
+    if record.encoding in UNCOMPRESSED_ENCODINGS:
+        dtype = np.dtype(UNCOMPRESSED_ENCODINGS[record.encoding]).newbyteorder(
+            '>' if record.big_endian else '<')
+        samples = np.frombuffer(record.payload, dtype=dtype)
+        if samples.size < record.npts:
+            raise MSeedRecordError('A record holds fewer samples than stated')
+        return samples[:record.npts].astype(ENCODING_DTYPES[record.encoding])
+    unpack = _unpack_steim_1 if record.encoding == 10 else _unpack_steim_2
+    if unpack is None:  # pragma: no cover
+        raise MSeedRecordError('The Steim decoders are not available')
+    # The Steim frames are decoded by libmseed, which is told to swap the
+    # words that are not in the byte order of this machine
+    swap = record.big_endian == np.little_endian
+    try:
+        return unpack(np.frombuffer(record.payload, dtype=np.uint8),
+                      record.npts, swapflag=int(swap))
+    except Exception as e:
+        raise MSeedRecordError(f'A Steim record could not be decoded: {e}')
+
+
+def iterate_soh_samples(records: List[SOHRecord]) -> \
+        Iterator[Tuple[int, np.ndarray]]:
+    '''
+    Yields the position and the decoded samples of each record, decoding one
+    record at a time
+    '''
+    positions, _ = get_record_positions(records)
+    for position, record in zip(positions, records):
+        yield position, decode_soh_record(record)
+
+
+def merge_soh_records(records: List[SOHRecord]) -> Any:
+    '''
+    Gathers the samples of the records of a day, as merged by obspy
+
+    Parameters
+    ----------
+    records: list
+        The records of a file, as returned by scan_soh_records
+
+    Returns
+    -------
+    The samples of the day, as a masked array if there are gaps, the masked
+    samples holding the fill value of obspy
+    '''
+    _, length = get_record_positions(records)
+    dtype = ENCODING_DTYPES[records[0].encoding]
+    values = np.empty(length, dtype=dtype)
+    mask = np.ones(length, dtype=bool)
+    for position, samples in iterate_soh_samples(records):
+        values[position:position + samples.size] = samples
+        mask[position:position + samples.size] = False
+    if not mask.any():
+        return values
+    values[mask] = np.iinfo(dtype).min if dtype.kind == 'i' else np.nan
+    return ma.array(values, mask=mask)
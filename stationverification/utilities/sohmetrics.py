@@ -1,12 +1,13 @@
 import obspy
 import logging
-import subprocess
 import numpy as np
 import numpy.ma as ma
 from datetime import date, timedelta
-from typing import List, Any, Optional
+from typing import Any, Collection, Dict, List, Optional, Tuple
 
-from stationverification.utilities import exceptions
+from stationverification.utilities import exceptions, soh_records
+from stationverification.utilities.latency_file_index import list_archive_day
+from stationverification.utilities.pool_map import pool_map
 from stationverification.utilities.plot_timing_quality import\
     plot_timing_quality
 
@@ -25,6 +26,63 @@ class MetricResults(dict):
         return self["results"]
 
 
+class SOHChannelData(dict):
+    '''
+    The samples of a SOH channel for each day of the validation period, held
+    in a single contiguous array
+    '''
+    @property
+    def values(self) -> np.ndarray:
+        return self["values"]
+
+    @property
+    def mask(self) -> np.ndarray:
+        '''
+        True for the samples missing from the merged daily traces
+        '''
+        return self["mask"]
+
+    @property
+    def day_bounds(self) -> List[int]:
+        '''
+        The samples of the Nth day are values[day_bounds[N]:day_bounds[N+1]]
+        '''
+        return self["day_bounds"]
+
+    def get_days(self) -> List[Any]:
+        '''
+        Returns views of the samples of each day, as masked arrays for the
+        days with missing samples, as done by get_stream_data_of_merged_streams
+        '''
+        days: List[Any] = []
+        for start, stop in zip(self.day_bounds[:-1], self.day_bounds[1:]):
+            mask = self.mask[start:stop]
+            days.append(ma.array(self.values[start:stop], mask=mask)
+                        if mask.any() else self.values[start:stop])
+        return days
+
+
+class SOHStats(dict):
+    '''
+    The statistics of a SOH channel, with one value per day
+    '''
+    @property
+    def averages(self) -> List[float]:
+        return self["averages"]
+
+    @property
+    def minimums(self) -> List[float]:
+        return self["minimums"]
+
+    @property
+    def maximums(self) -> List[float]:
+        return self["maximums"]
+
+    @property
+    def counts_below(self) -> List[int]:
+        return self["counts_below"]
+
+
 class StreamStats(dict):
     @property
     def average(self) -> float:
@@ -65,6 +123,8 @@ def getsohfiles(
         The end date for the search, non-inclusive
     directory: str
         The directory where the miniseed archive should be found
+    location: str
+        Location Code, see getsohfiles_by_channel
 
     Returns
     -------
@@ -72,33 +132,77 @@ def getsohfiles(
         List of files found for the specified station, SOH channel and time
         period
     '''
-    files: List[str] = []
+    return getsohfiles_by_channel(network=network,
+                                  station=station,
+                                  channels=[channel],
+                                  startdate=startdate,
+                                  enddate=enddate,
+                                  directory=directory,
+                                  location=location)[channel]
+
+
+def getsohfiles_by_channel(
+        network: str,
+        station: str,
+        channels: List[str],
+        startdate: date,
+        enddate: date,
+        directory: str,
+        location: Any = None) -> Dict[str, List[str]]:
+    '''
+    Retrieves the daily SOH files of several SOH channels, listing each day
+    directory of the archive once for all the channels
+
+    Parameters
+    ----------
+    network: str
+        Network Code
+    station: str
+        Station Code
+    channels: list
+        The SOH channel codes
+    startdate: date
+        The first day to search for files for
+    enddate: date
+        The end date for the search, non-inclusive
+    directory: str
+        The directory where the miniseed archive should be found
+    location: str
+        Location Code. The SOH channels are usually archived without a
+        location code, which is used for the days without files for the
+        location, or when no location is given
+
+    Returns
+    -------
+    dict
+        List of files found for each SOH channel and the time period
+    '''
+    files: Dict[str, List[str]] = {channel: [] for channel in channels}
+    location_codes = [''] if location is None else [location, '']
     iterdate = startdate
-    # if location is None:
-    #     snlc = f'{network}.{station}.*.{channel}'
-    # else:
-    #     snlc = f'{network}.{station}.{location}.{channel}'
-    snlc = f'{network}.{station}..{channel}'
     # Loop through all the dates
     while iterdate < enddate:
         # Get the julian day and convert it to a 3 digit string
         jday = "%03d" % iterdate.timetuple().tm_yday
-        # Search for the file for the specific day
-        command = f'ls {directory}/{iterdate.strftime("%Y/%m/%d")}/{snlc}\
-.{iterdate.year}.{jday} 2>/dev/null'
-        logging.debug(command)
-        output = subprocess.getoutput(command)
-        if len(output) > 0:
-            # Add the file to a list
-            files = files + output.split('\n')
-
+        day_directory = f'{directory}/{iterdate.strftime("%Y/%m/%d")}'
+        names = set(list_archive_day(day_directory))
+        for channel in channels:
+            # Search for the file for the specific day
+            for location_code in location_codes:
+                name = f'{network}.{station}.{location_code}.{channel}\
+.{iterdate.year}.{jday}'
+                if name in names:
+                    # Add the file to a list
+                    files[channel].append(f'{day_directory}/{name}')
+                    break
         iterdate = iterdate + timedelta(days=+1)
-    # Raise an error if no files were collected
-    if len(files) < 1:
-        logging.warning(f'No SOH files found for {channel}')
-    logging.debug(
-        f'{len(files)} files found for {network}.{station}.{channel} \
-            between {startdate} and {enddate}')
+    for channel, channel_files in files.items():
+        # Warn if no files were collected
+        if len(channel_files) < 1:
+            logging.warning(f'No SOH files found for {channel}')
+        logging.debug(
+            f'{len(channel_files)} files found for {network}.{station}.\
+{channel} between {startdate} and {enddate}')
     return files
 
 
@@ -133,6 +237,285 @@ streams from was empty')
     return list_of_merged_streams
 
 
+def read_soh_channel_data(files: List[str],
+                          workers: int = 1) -> SOHChannelData:
+    '''
+    Reads the daily files of a SOH channel, each file being decoded and its
+    traces merged once
+
+    Parameters
+    ----------
+    files: List[str]
+        The daily files of the SOH channel, as found by getsohfiles
+    workers: int
+        The number of processes decoding the files in parallel
+
+    Returns
+    -------
+    SOHChannelData
+        The samples of the channel, to compute the statistics of every SOH
+        metric from, with get_soh_stats, and to plot
+    '''
+    return pick_soh_channel_data(
+        read_soh_channels_data({'': files}, workers=workers), '')
+
+
+def read_soh_channels_data(files_by_channel: Dict[str, List[str]],
+                           workers: int = 1,
+                           stats_only: Collection[str] = ()) -> \
+        Dict[str, Any]:
+    '''
+    Reads the daily files of several SOH channels, the files of all the
+    channels and days being decoded in parallel
+
+    Parameters
+    ----------
+    files_by_channel: dict
+        The daily files of each SOH channel, as found by
+        getsohfiles_by_channel
+    workers: int
+        The number of processes decoding the files in parallel
+    stats_only: list
+        The channels of which only the statistics are needed, which are
+        accumulated record by record instead of gathering the samples
+
+    Returns
+    -------
+    dict
+        The SOHChannelData of each channel, or its SOHStats for the channels
+        of stats_only, or the StreamError raised reading one of its files, to
+        be picked with pick_soh_channel_data
+    '''
+    jobs = [(channel, file) for channel, files in files_by_channel.items()
+            for file in files]
+    results = pool_map(
+        read_soh_day,
+        [(file, channel in stats_only) for channel, file in jobs],
+        workers=workers)
+    results_by_channel: Dict[str, List[Any]] = {
+        channel: [] for channel in files_by_channel}
+    # The results come back in the order of the jobs, which keeps the days
+    # of each channel in order
+    for (channel, _), result in zip(jobs, results):
+        results_by_channel[channel].append(result)
+
+    soh_channels_data: Dict[str, Any] = {}
+    for channel, channel_results in results_by_channel.items():
+        errors = [result for result in channel_results
+                  if isinstance(result, exceptions.StreamError)]
+        if len(channel_results) < 1:
+            soh_channels_data[channel] = exceptions.StreamError(
+                'Can not fetch any streams. The list of files passed to fetch \
+streams from was empty')
+        elif errors:
+            soh_channels_data[channel] = errors[0]
+        elif channel in stats_only:
+            soh_channels_data[channel] = SOHStats(
+                **{name: [value for stats in channel_results
+                          for value in stats[name]]
+                   for name in ['averages', 'minimums', 'maximums',
+                                'counts_below']})
+        else:
+            soh_channels_data[channel] = get_soh_channel_data(channel_results)
+    return soh_channels_data
+
+
+def read_soh_day(job: Tuple[str, bool]) -> Any:
+    '''
+    Reads a daily SOH file, the unit of work of the parallel reading. A
+    StreamError is returned rather than raised so that it only skips the
+    metrics of its channel
+
+    Parameters
+    ----------
+    job: tuple: (str, bool)
+        The file, and whether only the statistics of its samples are needed
+
+    Returns
+    -------
+    The result of read_soh_day_stats or read_soh_day_data, or the
+    StreamError raised
+    '''
+    file, stats_only = job
+    try:
+        return read_soh_day_stats(file) if stats_only \
+            else read_soh_day_data(file)
+    except exceptions.StreamError as e:
+        return e
+
+
+def read_soh_day_data(file: str) -> Any:
+    '''
+    Reads the samples of a daily SOH file, as merged by obspy. The records
+    are read directly, and the files the record reader does not support are
+    read and merged with obspy
+
+    Returns
+    -------
+    The data of the merged trace
+    '''
+    try:
+        return soh_records.merge_soh_records(
+            soh_records.scan_soh_records(file))
+    except exceptions.MSeedRecordError as e:
+        logging.debug(f'Reading {file} with obspy: {e}')
+        return get_stream_data_of_merged_streams(obspy.read(file))
+
+
+def read_soh_day_stats(file: str, below: float = 2) -> SOHStats:
+    '''
+    Computes the statistics of a daily SOH file, as get_soh_stats does on its
+    merged samples. The statistics of integer samples are accumulated record
+    by record, without gathering the samples of the day
+
+    Returns
+    -------
+    SOHStats
+        The statistics of the day
+    '''
+    try:
+        records = soh_records.scan_soh_records(file)
+        _, length = soh_records.get_record_positions(records)
+        if soh_records.ENCODING_DTYPES[records[0].encoding].kind != 'i':
+            return get_soh_stats(get_soh_channel_data(
+                [soh_records.merge_soh_records(records)]), below=below)
+        count = total = count_below = 0
+        minimum = maximum = None
+        for _, samples in soh_records.iterate_soh_samples(records):
+            count += samples.size
+            total += int(samples.sum(dtype=np.int64))
+            count_below += int(np.count_nonzero(samples < below))
+            minimum = samples.min() if minimum is None \
+                else min(minimum, samples.min())
+            maximum = samples.max() if maximum is None \
+                else max(maximum, samples.max())
+    except exceptions.MSeedRecordError as e:
+        logging.debug(f'Reading {file} with obspy: {e}')
+        return get_soh_stats(get_soh_channel_data(
+            [get_stream_data_of_merged_streams(obspy.read(file))]),
+            below=below)
+    # The gaps of the merged integer samples hold the smallest integer, and
+    # are counted below the value as get_soh_stats does. The sums of integer
+    # samples are exact, which keeps the averages identical to np.average
+    if np.iinfo(np.int32).min < below:
+        count_below += length - count
+    return SOHStats(averages=[total / count],
+                    minimums=[float(minimum)],
+                    maximums=[float(maximum)],
+                    counts_below=[count_below])
+
+
+def pick_soh_channel_data(soh_channels_data: Dict[str, Any],
+                          channel: str) -> Any:
+    '''
+    Returns the SOHChannelData, or SOHStats, of a channel read by
+    read_soh_channels_data, raising the StreamError raised reading its files
+    if any
+    '''
+    soh_channel_data = soh_channels_data[channel]
+    if isinstance(soh_channel_data, exceptions.StreamError):
+        raise soh_channel_data
+    return soh_channel_data
+
+
+def get_soh_channel_data(list_of_data: List[Any]) -> SOHChannelData:
+    '''
+    Gathers the merged daily samples of a SOH channel into a contiguous array
+
+    Parameters
+    ----------
+    list_of_data: list
+        The data of the merged stream of each day, masked arrays for the days
+        with gaps
+
+    Returns
+    ----------
+    SOHChannelData
+    '''
+    day_bounds = [0]
+    for data in list_of_data:
+        day_bounds.append(day_bounds[-1] + len(data))
+    if list_of_data:
+        values = np.concatenate([ma.getdata(data) for data in list_of_data])
+        mask = np.concatenate([ma.getmaskarray(data) for data in list_of_data])
+    else:
+        values = np.array([])
+        mask = np.array([], dtype=bool)
+    return SOHChannelData(values=values, mask=mask, day_bounds=day_bounds)
+
+
+def as_soh_channel_data(list_of_streams: Any) -> SOHChannelData:
+    '''
+    Returns the SOHChannelData of a list of daily streams, or the
+    SOHChannelData passed as is
+    '''
+    if isinstance(list_of_streams, SOHChannelData):
+        return list_of_streams
+    return get_soh_channel_data(
+        get_list_of_data_from_list_of_streams(list_of_streams))
+
+
+def as_soh_stats(list_of_streams: Any, below: float = 2) -> SOHStats:
+    '''
+    Returns the SOHStats of a list of daily streams, or of a SOHChannelData,
+    or the SOHStats passed as is
+    '''
+    if isinstance(list_of_streams, SOHStats):
+        return list_of_streams
+    return get_soh_stats(as_soh_channel_data(list_of_streams), below=below)
+
+
+def get_soh_stats(soh_channel_data: SOHChannelData,
+                  below: float = 2) -> SOHStats:
+    '''
+    Computes the daily statistics of a SOH channel in one pass over its
+    samples
+
+    Parameters
+    ----------
+    soh_channel_data: SOHChannelData
+        The samples of the SOH channel
+    below: float
+        The value to count the samples below of
+
+    Returns
+    -------
+    SOHStats
+        The average, minimum and maximum of the samples of each day, missing
+        samples left out, and the number of samples below the value. NaN for
+        the days without samples
+    '''
+    values = soh_channel_data.values
+    mask = soh_channel_data.mask
+    bounds = np.array(soh_channel_data.day_bounds)
+    number_of_days = bounds.size - 1
+    minimums = np.full(number_of_days, np.nan)
+    maximums = np.full(number_of_days, np.nan)
+    counts_below = np.zeros(number_of_days, dtype=np.int64)
+    # The days without samples are skipped, which leaves the bounds of the
+    # other days delimiting their samples
+    has_samples = bounds[1:] > bounds[:-1]
+    starts = bounds[:-1][has_samples]
+    if starts.size > 0:
+        minimums[has_samples] = np.minimum.reduceat(
+            np.where(mask, np.inf, values), starts)
+        maximums[has_samples] = np.maximum.reduceat(
+            np.where(mask, -np.inf, values), starts)
+        # Counted on the raw samples, missing samples included, as was done
+        # on the merged streams by check_clock_locked
+        counts_below[has_samples] = np.add.reduceat(
+            (values < below).astype(np.int64), starts)
+    # The averages are computed day by day with np.average, which sums the
+    # samples in the same order as it did on the merged streams, keeping the
+    # reported averages identical to the last digit
+    averages = [float(np.average(data)) if len(data) > 0 else np.nan
+                for data in soh_channel_data.get_days()]
+    return SOHStats(averages=averages,
+                    minimums=minimums.tolist(),
+                    maximums=maximums.tolist(),
+                    counts_below=counts_below.tolist())
+
+
 def getstats(
         stream: obspy.Stream) -> StreamStats:
     '''
@@ -232,7 +615,9 @@ def check_timing_quality(list_of_streams: List[obspy.Stream],
                          enddate: date,
                          network: str,
                          station: str,
-                         location: Optional[str] = None) -> MetricResults:
+                         location: Optional[str] = None,
+                         output_directory: str = './stationvalidation_output'
+                         ) -> MetricResults:
     '''
     Function to check the timing quality SOH channel and ensure the daily
     averages fall above a specific threshold
@@ -241,7 +626,8 @@ def check_timing_quality(list_of_streams: List[obspy.Stream],
     ----------
         list_of_streams
             List of SOH stream data to read (A stream is a set of traces /
-             one merged trace)
+             one merged trace), or the SOHChannelData or SOHStats of the
+             channel
             Channel='LCQ'
         threshold:
             Lowest allowed timing quality
@@ -253,6 +639,8 @@ def check_timing_quality(list_of_streams: List[obspy.Stream],
             Network code for the station being validated
         station:
             Station code for the station being validated
+        output_directory:
+            Directory to write the timing quality plot to
 
     Returns
     -------
@@ -265,23 +653,22 @@ def check_timing_quality(list_of_streams: List[obspy.Stream],
         list
             List of the results for the metric
     '''
-    results: Any = np.array([])
     details = []
     passed = True
-    # Loop though the streams
-    for stream in list_of_streams:
-        # Get the stats for the stream and append the average to an np array
-        stats = getstats(stream)
-        results = np.append(results, round(stats.average, 2))
-        # Count how many of the days have an average timing quality below the
-        # threshold
+    # Get the daily averages of the streams, in one pass
+    stats = as_soh_stats(list_of_streams)
+    results: Any = np.array([round(average, 2)
+                             for average in stats.averages])
+    # Count how many of the days have an average timing quality below the
+    # threshold
     plot_timing_quality(network=network,
                         station=station,
                         startdate=startdate,
                         enddate=enddate,
                         results=results,
                         threshold=threshold,
-                        location=location
+                        location=location,
+                        output_directory=output_directory
                         )
     for index, value in enumerate(results):
         if value < threshold:
@@ -308,7 +695,8 @@ def check_clock_locked(
     ----------
         list_of_streams
             List of SOH stream data to read (A stream is a set of traces /
-             one merged trace)
+             one merged trace), or the SOHChannelData or SOHStats of the
+             channel
             Channel='GST'
 
     Returns
@@ -322,15 +710,9 @@ def check_clock_locked(
         list
             List of the results for the metric
     '''
-    results: Any = np.array([])
-    # Loop through the streams
-    for stream in list_of_streams:
-        # Count how many times the clock is locked for a day
-        stream_data = get_stream_data_of_merged_streams(stream)
-        values = ma.array(stream_data)
-        count = np.count_nonzero(values < 2)
-        results = np.append(results, count)
-    results = results.tolist()
+    # Count how many times the clock is not locked for each day
+    stats = as_soh_stats(list_of_streams, below=2)
+    results = [float(count) for count in stats.counts_below]
     # Check each day to see if the clock is locked enough times
     passed = True
     details = []
@@ -353,7 +735,8 @@ def check_clock_offset(list_of_streams: List[obspy.Stream],
     ----------
         list_of_streams
             List of SOH stream data to read (A stream is a set of traces /
-             one merged trace)
+             one merged trace), or the SOHChannelData or SOHStats of the
+             channel
             Channel='LCE'
         threshold:
             Maximum average sample clock offset from timesource
@@ -379,11 +762,8 @@ def check_clock_offset(list_of_streams: List[obspy.Stream],
     '''
 
     passed = True
-    offsets = []
     details = []
-    for stream in list_of_streams:
-        stats = getstats(stream)
-        offsets.append(stats.average)
+    offsets = as_soh_stats(list_of_streams).averages
     for index, clockPhaseError in enumerate(offsets):
         testdate = startdate + timedelta(index)
         if clockPhaseError > threshold:
@@ -403,7 +783,8 @@ def check_number_of_satellites(
     ----------
         list_of_streams
             List of SOH stream data to read (A stream is a set of traces /
-             one merged trace)
+             one merged trace), or the SOHChannelData or SOHStats of the
+             channel
             Channel='GNS'
 
     Returns
@@ -420,11 +801,8 @@ def check_number_of_satellites(
 
     passed = True
     details = []
-    results = []
-
-    for stream in list_of_streams:
-        stats = getstats(stream)
-        results.append(int(stats.average))
+    results = [int(average) for average in
+               as_soh_stats(list_of_streams).averages]
 
     for index, numberOfSatellites in enumerate(results):
         testdate = startdate + timedelta(days=index)
@@ -4,7 +4,7 @@ import logging
 import matplotlib
 import numpy as np
 
-from typing import List, Optional
+from typing import Iterable, Optional, Union
 
 from datetime import date, timedelta
 
@@ -13,18 +13,21 @@ import matplotlib.ticker as ticker
 import matplotlib.ticker as plticker
 import matplotlib.dates as mdates
 
+from pandas.core.frame import DataFrame
 from pandas.plotting import register_matplotlib_converters
 from stationverification.utilities.generate_report import StationMetricData
 
 from stationverification.utilities.get_timely_availability_arrays\
-    import get_timely_availability_arrays
+    import get_timely_availability_matrix
+from stationverification.utilities.plot_renderer import PlotSpec, \
+    render_plot
 
 
 warnings.filterwarnings("ignore")
 
 
 def timely_availability_plot(
-    latencies: List,
+    latencies: Union[DataFrame, Iterable[DataFrame]],
     station: str,
     startdate: date,
     enddate: date,
@@ -33,30 +36,46 @@ def timely_availability_plot(
     stationMetricData: StationMetricData,
     location: Optional[str] = None
 ):
-    font = {'size': 13}
-    matplotlib.rc('font', **font)
-    percent_availability_array_HNN = (stationMetricData.get_values(
-        'percent_availability', network, station, "HNN"))
-    percent_availability_array_HNN_rounded = list(
-        map(lambda value: float(round(value, 2)),
-            percent_availability_array_HNN))
-    percent_availability_array_HNE = (stationMetricData.get_values(
-        'percent_availability', network, station, "HNZ"))
-    percent_availability_array_HNE_rounded = list(
-        map(lambda value: float(round(value, 2)),
-            percent_availability_array_HNE))
-    percent_availability_array_HNZ = (stationMetricData.get_values(
-        'percent_availability', network, station, "HNE"))
-    percent_availability_array_HNZ_rounded = list(
-        map(lambda value: float(round(value, 2)),
-            percent_availability_array_HNZ))
-    register_matplotlib_converters()
-    HNN_timely_availability_percentage_array, \
-        HNE_timely_availability_percentage_array,\
-        HNZ_timely_availability_percentage_array,\
-        timely_availability_percentage_array_days_axis = \
-        get_timely_availability_arrays(
-            latencies=latencies, threshold=timely_threshold)
+    spec = timely_availability_plot_spec(
+        latencies=latencies,
+        station=station,
+        startdate=startdate,
+        enddate=enddate,
+        network=network,
+        timely_threshold=timely_threshold,
+        stationMetricData=stationMetricData,
+        location=location)
+    if spec is not None:
+        render_plot(spec)
+
+
+def timely_availability_plot_spec(
+    latencies: Union[DataFrame, Iterable[DataFrame]],
+    station: str,
+    startdate: date,
+    enddate: date,
+    network: str,
+    timely_threshold: float,
+    stationMetricData: StationMetricData,
+    location: Optional[str] = None
+) -> Optional[PlotSpec]:
+    '''
+    Returns the spec of the plot of the daily timely availability and percent
+    availability of each channel with latencies, or None if there are no
+    latencies
+
+    Parameters
+    ----------
+    latencies: DataFrame or list of DataFrames
+        The latencies, see get_timely_availability_matrix
+
+    Returns
+    -------
+    PlotSpec
+        The spec, drawn by render_timely_availability_plot
+    '''
+    timely_availability = get_timely_availability_matrix(
+        latencies=latencies, threshold=timely_threshold)
     # Setting up the figure
     filename = ""
     if location is None:
@@ -70,128 +89,104 @@ def timely_availability_plot(
         filename = f'{snlc}.{startdate}_\
 {enddate - timedelta(days=1)}.timely_availability_plot.png'
 
-    fig, axes = plt.subplots(
-        3, 1, sharex=True, sharey=True, figsize=(18.5, 10.5))
-
-    # add a big axis, hide frame
-    fig.add_subplot(111, frameon=False)
-
-    # hide tick and tick label of the big axis
-    plt.tick_params(labelcolor='none', which='both', top=False,
-                    bottom=False, left=False, right=False)
-    plt.title(
-        f'Timely Availability [%]\n{network}.{station} {startdate}_{enddate}',
-        pad=20)
-
-    axes[1].set_ylabel("Timely availability [%]", fontsize=20)
-
-    # Setting up our X-axis data
-    x_axis = timely_availability_percentage_array_days_axis
-    number_of_days = len(x_axis)
-    number_of_days_as_array = np.arange(number_of_days)
-    width_between_ticks = 0.4
-    bar_width = 0.4
-    if len(HNN_timely_availability_percentage_array) == len(x_axis) and\
-        len(HNE_timely_availability_percentage_array) == len(x_axis) and\
-            len(HNE_timely_availability_percentage_array) == len(x_axis) and \
-            len(x_axis) != 0:
-        # Format the dates on the x-axis
+    if timely_availability.empty or not len(timely_availability.columns):
+        logging.warning(
+            "Skipping Timely Availability. Please double check the latency\
+ files")
+        return None
+
+    channels = []
+    for channel in timely_availability.columns:
+        percent_availability = stationMetricData.get_values(
+            'percent_availability', network, station, channel)
+        channels.append((
+            channel,
+            list(timely_availability[channel]),
+            list(map(lambda value: float(round(value, 2)),
+                     percent_availability))))
+    return PlotSpec(render=render_timely_availability_plot,
+                    filename=f'./stationvalidation_output/{filename}',
+                    title=f'Timely Availability [%]\n{network}.{station} \
+{startdate}_{enddate}',
+                    days=list(timely_availability.index),
+                    channels=channels)
+
+
+def render_timely_availability_plot(spec: PlotSpec):
+    '''
+    Draws the spec of a timely availability plot, one panel per channel
+    '''
+    register_matplotlib_converters()
+    days = spec['days']
+    with matplotlib.rc_context({'font.size': 13}):
+        fig, axes = plt.subplots(
+            len(spec['channels']), 1, sharex=True, sharey=True,
+            figsize=(18.5, 3.5 * len(spec['channels'])), squeeze=False)
+        axes = axes[:, 0]
+
+        # add a big axis, hide frame
+        fig.add_subplot(111, frameon=False)
+
+        # hide tick and tick label of the big axis
+        plt.tick_params(labelcolor='none', which='both', top=False,
+                        bottom=False, left=False, right=False)
+        plt.title(spec['title'], pad=20)
+
+        axes[len(axes) // 2].set_ylabel("Timely availability [%]",
+                                        fontsize=20)
+
+        # Setting up our X-axis data
+        number_of_days_as_array = np.arange(len(days))
+        width_between_ticks = 0.4
+        bar_width = 0.4
+
+        # Format the dates on the x-axis, the days without latencies being
+        # left out
         def timeTicks(x, pos):
-            date = startdate + timedelta(days=x)
-            return str(date.isoformat())
+            index = int(round(x - width_between_ticks / 2))
+            if 0 <= index < len(days):
+                return str(days[index].isoformat())
+            return ''
         formatter = matplotlib.ticker.FuncFormatter(timeTicks)
         axes[0].xaxis.set_major_formatter(formatter)
         # Format the x axis values to be dates and rotate them 90 degrees
-        # formatter = mdates.DateFormatter("%Y-%m-%d")
-        # axes[0].xaxis.set_major_formatter(formatter)
         locator = mdates.DayLocator()
         axes[0].xaxis.set_major_locator(locator)
         axes[0].tick_params(axis='x', labelrotation=90)
         axes[0].set_xticks(number_of_days_as_array+(width_between_ticks/2))
 
-        # Format the Y-axis values to be percentages
-        axes[0].yaxis.set_major_formatter(ticker.PercentFormatter(xmax=100))
-        loc = plticker.MultipleLocator(base=10)
-        axes[0].yaxis.set_major_locator(loc)
-
-        # Plotting the data
-        y_axis = HNN_timely_availability_percentage_array
-        # axes[0].bar(x_axis, [100], color="red")
-        # axes[0].bar(x_axis, y_axis,
-        #             label='HNN Timely Availability [%]')
-        axes[0].bar(number_of_days_as_array, y_axis,
-                    bar_width, label='HNN Timely Availability [%]',
-                    color="blue")
-        axes[0].bar(number_of_days_as_array + width_between_ticks,
-                    percent_availability_array_HNN_rounded,
-                    bar_width, label='HNN Percent Availability [%]',
-                    color="green")
-        for bars in axes[0].containers:
-            axes[0].bar_label(bars)
-        legend = axes[0].legend(bbox_to_anchor=(1.1, 1),
-                                loc='upper right', fontsize="10")
-        # Show the grid
-        axes[0].set_axisbelow(True)
-        axes[0].grid(visible=True, which='both',
-                     axis='both', linewidth=0.5)
-        axes[0].set_ylim(ymin=0, ymax=100)
-
-        # # Second plot
-        # Setting up our data
-        # Format the Y-axis values to be percentages
-        axes[1].yaxis.set_major_formatter(ticker.PercentFormatter(xmax=100))
-        loc = plticker.MultipleLocator(base=10)
-        axes[1].yaxis.set_major_locator(loc)
-        y_axis = HNE_timely_availability_percentage_array
-        axes[1].bar(number_of_days_as_array, y_axis,
-                    bar_width, label='HNE Timely Availability [%]',
-                    color="blue")
-        axes[1].bar(number_of_days_as_array + width_between_ticks,
-                    percent_availability_array_HNE_rounded,
-                    bar_width, label='HNE Percent Availability [%]',
-                    color="green")
-        for bars in axes[1].containers:
-            axes[1].bar_label(bars)
-        legend = axes[1].legend(bbox_to_anchor=(1.1, 1),
-                                loc='upper right')
-        # Show the grid
-        axes[1].set_axisbelow(True)
-        axes[1].grid(visible=True, which='both',
-                     axis='both', linewidth=0.5)
-        axes[1].set_ylim(ymin=0, ymax=100)
-
-        # # Third plot
-        # Setting up our data
-        axes[2].yaxis.set_major_formatter(ticker.PercentFormatter(xmax=100))
-        loc = plticker.MultipleLocator(base=10)
-        axes[2].yaxis.set_major_locator(loc)
-        y_axis = HNZ_timely_availability_percentage_array
-        axes[2].bar(number_of_days_as_array, y_axis,
-                    bar_width, label='HNZ Timely Availability [%]',
-                    color="blue")
-        axes[2].bar(number_of_days_as_array + width_between_ticks,
-                    percent_availability_array_HNZ_rounded,
-                    bar_width, label='HNZ Percent Availability [%]',
-                    color="green")
-        for bars in axes[2].containers:
-            axes[2].bar_label(bars)
-        legend = axes[2].legend(bbox_to_anchor=(1.1, 1),
-                                loc='upper right')
-        # Show the grid
-        axes[2].set_axisbelow(True)
-        axes[2].grid(visible=True, which='both',
-                     axis='both', linewidth=0.5)
-        axes[2].set_ylim(ymin=0, ymax=100)
+        for ax, (channel, timely_availability, percent_availability) in \
+                zip(axes, spec['channels']):
+            # Format the Y-axis values to be percentages
+            ax.yaxis.set_major_formatter(ticker.PercentFormatter(xmax=100))
+            loc = plticker.MultipleLocator(base=10)
+            ax.yaxis.set_major_locator(loc)
+
+            # Plotting the data
+            ax.bar(number_of_days_as_array, timely_availability,
+                   bar_width, label=f'{channel} Timely Availability [%]',
+                   color="blue")
+            # The percent availability of the days with latencies
+            if len(percent_availability) == len(days):
+                ax.bar(number_of_days_as_array + width_between_ticks,
+                       percent_availability,
+                       bar_width, label=f'{channel} Percent Availability [%]',
+                       color="green")
+            for bars in ax.containers:
+                ax.bar_label(bars)
+            legend = ax.legend(bbox_to_anchor=(1.1, 1),
+                               loc='upper right', fontsize="10")
+            # Show the grid
+            ax.set_axisbelow(True)
+            ax.grid(visible=True, which='both',
+                    axis='both', linewidth=0.5)
+            ax.set_ylim(ymin=0, ymax=100)
 
         fig.tight_layout()  # Important for the plot labels to not overlap
         if not os.path.isdir('./stationvalidation_output/'):
             os.mkdir('./stationvalidation_output/')
         plt.savefig(
-            f'./stationvalidation_output/{filename}',
+            spec.filename,
             bbox_extra_artists=(legend,),
             bbox_inches='tight')
         plt.close()
-    else:
-        logging.warning(
-            "Skipping Timely Availability. Please double check the latency\
- files")
@@ -0,0 +1,196 @@
+'''
+A module that contains the stages of the validation of a station, as run by
+stationverification for a single station and by batchverification for a
+batch of stations.
+
+The latency and ISPAQ stages are independent of each other, and the report
+stage, which checks the SOH channels, plots the metrics and writes the
+report, uses the results of both.
+'''
+import logging
+import queue
+
+from stationverification.utilities.cleanup_directory import (
+    cleanup_directory, get_validation_output_directory)
+from stationverification.utilities.fetch_arguments import UserInput
+from stationverification.utilities.generate_latency_results import \
+    generate_latency_results
+from stationverification.utilities.generate_plots import (
+    PlotParameters, get_metric_plot_specs)
+from stationverification.utilities.generate_report import gather_stats, report
+from stationverification.utilities.handle_running_ispaq_command import \
+    handle_running_ispaq_command
+from stationverification.utilities.latency_store import LatencyStore
+from stationverification.utilities.plot_renderer import render_plots
+from stationverification.utilities.timely_availability_plot import \
+    timely_availability_plot_spec
+from stationverification.utilities.upload_results_to_s3 import \
+    upload_results_to_s3
+
+
+def run_latency_stage(user_inputs: UserInput) -> str:
+    '''
+    Reads the latency files of the station, writing the latency plots and
+    the CSV of failed latencies
+
+    Returns
+    -------
+    str
+        The directory of the LatencyStore of the latencies, to be deleted
+        once done with
+
+    Raises
+    ------
+    FileNotFoundError
+        If no latencies were found for the station
+    '''
+    latency_store_directory: queue.Queue = queue.Queue()
+    generate_latency_results(user_inputs.typeofinstrument,
+                             user_inputs.network,
+                             user_inputs.station,
+                             user_inputs.startdate,
+                             user_inputs.enddate,
+                             user_inputs.latencyFiles,
+                             user_inputs.thresholds.getfloat(
+                                 'thresholds', 'data_timeliness', fallback=3),
+                             user_inputs.location,
+                             latency_store_directory,
+                             user_inputs.latency_workers,
+                             user_inputs.latency_cache,
+                             user_inputs.plot_workers)
+    # Nothing is put on the queue when no latencies were found, the error
+    # being only logged by generate_latency_results
+    try:
+        return latency_store_directory.get_nowait()
+    except queue.Empty:
+        raise FileNotFoundError(
+            f'No latencies found for {user_inputs.network}.\
+{user_inputs.station} in {user_inputs.latencyFiles}')
+
+
+def run_ispaq_stage(user_inputs: UserInput):
+    '''
+    Runs ISPAQ for the station, writing its outputs to ./ispaq_outputs
+    '''
+    handle_running_ispaq_command(
+        user_inputs.ispaqloc,
+        user_inputs.metrics,
+        user_inputs.startdate,
+        user_inputs.enddate,
+        user_inputs.pfile,
+        user_inputs.pdfinterval,
+        user_inputs.miniseedarchive,
+        user_inputs.network,
+        user_inputs.station,
+        user_inputs.location,
+        user_inputs.station_url,
+        user_inputs.stationconf,
+        user_inputs.ispaq_workers,
+        user_inputs.ispaq_shard_days,
+        user_inputs.metadata_cache,
+        user_inputs.station_resp_only,
+    )
+
+
+def get_snlc(user_inputs: UserInput) -> str:
+    '''
+    Returns the name of the station in the ISPAQ output files
+    '''
+    if user_inputs.stationconf is None:
+        if user_inputs.location is None:
+            return f'{user_inputs.network}.{user_inputs.station}.x.Hxx'
+        return f'{user_inputs.network}.\
+{user_inputs.station}.{user_inputs.location}.Hxx'
+    return f'{user_inputs.station}'
+
+
+def run_report_stage(user_inputs: UserInput, latency_store_directory: str):
+    '''
+    Plots the ISPAQ metrics and the timely availability, checks the SOH
+    channels, writes the report, and moves the outputs to the output
+    directory, deleting the LatencyStore of the latency stage
+    '''
+    latency_store = LatencyStore(latency_store_directory)
+    try:
+        # Read the files generated from ISPAQ and populate the dictionary
+        # object
+        stationMetricData = gather_stats(
+            snlc=get_snlc(user_inputs),
+            start=user_inputs.startdate,
+            stop=user_inputs.enddate,
+            metrics=user_inputs.metrics)
+
+        # The plots of all the channels are drawn together, on a pool of
+        # plot_workers processes
+        plot_specs = []
+        for channel in stationMetricData.get_channels(
+            network=user_inputs.network,
+            station=user_inputs.station
+        ):
+            plot_specs.extend(get_metric_plot_specs(
+                PlotParameters(network=user_inputs.network,
+                               station=user_inputs.station,
+                               location=user_inputs.location,
+                               channel=channel,
+                               stationMetricData=stationMetricData,
+                               start=user_inputs.startdate,
+                               stop=user_inputs.enddate)
+            ))
+        timely_availability_spec = timely_availability_plot_spec(
+            latencies=latency_store.latencies(
+                columns=['channel', 'start_time', 'data_latency']),
+            stationMetricData=stationMetricData,
+            station=user_inputs.station,
+            startdate=user_inputs.startdate,
+            enddate=user_inputs.enddate,
+            network=user_inputs.network,
+            timely_threshold=user_inputs.thresholds
+            .getfloat('thresholds',
+                      'data_timeliness',
+                      fallback=3),
+            location=user_inputs.location
+        )
+        if timely_availability_spec is not None:
+            plot_specs.append(timely_availability_spec)
+        logging.info(f"Generating {len(plot_specs)} plots..")
+        render_plots(plot_specs, workers=user_inputs.plot_workers)
+        logging.info("Generating report..")
+
+        report(
+            combined_latency_dataframe_for_all_days_dataframe=latency_store.latencies(  # noqa
+                columns=['network', 'station', 'channel', 'data_latency']),
+            typeofinstrument=user_inputs.typeofinstrument,
+            network=user_inputs.network,
+            station=user_inputs.station,
+            location=user_inputs.location,
+            stationmetricdata=stationMetricData,
+            start=user_inputs.startdate,
+            end=user_inputs.enddate,
+            thresholds=user_inputs.thresholds,
+            soharchive=user_inputs.soharchive,
+            soh_workers=user_inputs.soh_workers,
+        )
+    finally:
+        latency_store.delete()
+
+    # Delete temporary files and links and package the output in a tarball
+    logging.info("Cleaning up directory..")
+    cleanup_directory(
+        network=user_inputs.network,
+        station=user_inputs.station,
+        startdate=user_inputs.startdate,
+        enddate=user_inputs.enddate,
+        outputdir=user_inputs.outputdir)
+
+    if user_inputs.uploadresultstos3 is True:
+        # The directory the outputs were moved to by cleanup_directory
+        validation_output_directory = get_validation_output_directory(
+            outputdir=user_inputs.outputdir,
+            network=user_inputs.network,
+            station=user_inputs.station,
+            startdate=user_inputs.startdate,
+            enddate=user_inputs.enddate)
+        upload_results_to_s3(
+            path_of_folder_to_upload=validation_output_directory,
+            bucketName=user_inputs.bucketName,
+            s3directory=user_inputs.s3directory)
@@ -0,0 +1,73 @@
+# flake8:noqa
+import os
+import pickle
+
+import matplotlib.pyplot as plt
+
+from stationverification.utilities.generate_report import gather_stats
+from stationverification.utilities.generate_plots import PlotParameters, \
+    get_metric_plot_specs
+from stationverification.utilities.plot_renderer import render_plots
+
+
+def get_specs(gather_stats_parameters):
+    stationMetricData = gather_stats(
+        snlc=gather_stats_parameters.snlc,
+        start=gather_stats_parameters.startdate,
+        stop=gather_stats_parameters.enddate,
+        metrics=gather_stats_parameters.metrics,
+        ispaq_output_directory=gather_stats_parameters.ispaq_output_directory)
+    specs = []
+    for channel in stationMetricData.get_channels(
+            network=gather_stats_parameters.network,
+            station=gather_stats_parameters.station):
+        specs.extend(get_metric_plot_specs(
+            PlotParameters(network=gather_stats_parameters.network,
+                           station=gather_stats_parameters.station,
+                           channel=channel,
+                           location=None,
+                           stationMetricData=stationMetricData,
+                           start=gather_stats_parameters.startdate,
+                           stop=gather_stats_parameters.enddate)))
+    return specs
+
+
+def test_metric_plot_specs(gather_stats_parameters):
+    specs = get_specs(gather_stats_parameters)
+    assert len(specs) == 21
+    assert 'stationvalidation_output/QW.QCC02..HNZ.2022-04-01_2022-04-03.max_gap.png' in \
+        [spec.filename for spec in specs]
+    # The specs are sent to the processes drawing them
+    for spec in specs:
+        unpickled = pickle.loads(pickle.dumps(spec))
+        assert unpickled.filename == spec.filename
+        assert unpickled.render is spec.render
+
+
+def test_render_plots_on_a_pool(gather_stats_parameters, tmp_path,
+                                monkeypatch):
+    specs = get_specs(gather_stats_parameters)
+    monkeypatch.chdir(tmp_path)
+    render_plots(specs, workers=2)
+    assert sorted(os.listdir('stationvalidation_output')) == \
+        sorted(os.path.basename(spec.filename) for spec in specs)
+
+
+def test_render_plots_keeps_the_backend(gather_stats_parameters, tmp_path,
+                                        monkeypatch):
+    specs = get_specs(gather_stats_parameters)
+    monkeypatch.chdir(tmp_path)
+    backend = plt.get_backend()
+    plt.switch_backend('svg')
+    try:
+        figure = plt.figure()
+        # The plots drawn in the current process leave its backend and its
+        # figures as they are
+        render_plots(specs[:2], workers=1)
+        assert plt.get_backend() == 'svg'
+        assert plt.fignum_exists(figure.number)
+        plt.close(figure)
+    finally:
+        plt.switch_backend(backend)
+    assert sorted(os.listdir('stationvalidation_output')) == \
+        sorted(os.path.basename(spec.filename) for spec in specs[:2])
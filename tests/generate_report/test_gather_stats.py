@@ -1,4 +1,7 @@
-from stationverification.utilities.generate_report import gather_stats
+import glob
+
+import pandas as pd
+from stationverification.utilities.generate_report import StationMetricData, gather_stats
 
 
 def test_gather_stats(gather_stats_parameters):
@@ -13,3 +16,49 @@ def test_gather_stats(gather_stats_parameters):
     assert 'QCC02' in smd.get_stations('QW')
     assert 'pct_above_nhnm' in smd.get_metricNames()
     assert 'num_gaps' in smd.get_metricNames()
+
+
+def test_station_metric_data_lookups(gather_stats_parameters):
+    smd = gather_stats(
+        start=gather_stats_parameters.startdate,
+        stop=gather_stats_parameters.enddate,
+        snlc=gather_stats_parameters.snlc,
+        metrics=gather_stats_parameters.metrics,
+        ispaq_output_directory=gather_stats_parameters.ispaq_output_directory,
+    )
+    results = smd.results
+    assert sorted(smd.get_channels('QW', 'QCC02')) == sorted(set(results.channel))
+    assert smd.get_channels('QW', 'non_existent') == []
+    for channel in smd.get_channels('QW', 'QCC02'):
+        # The values looked up in the index are those of the rows of the channel, in order
+        assert smd.get_values('num_gaps', network='QW', station='QCC02', channel=channel) == \
+            list(results[(results.metricName == 'num_gaps') & (results.channel == channel)].value)
+    assert smd.get_values('num_gaps', network='QW', station='QCC02', channel='non_existent') == []
+
+
+def test_station_metric_data_load(gather_stats_parameters):
+    files = sorted(glob.glob(f'{gather_stats_parameters.ispaq_output_directory}/csv/*_2022-04-03_*.csv'))
+    loaded = StationMetricData()
+    loaded.load(files)
+    populated = StationMetricData()
+    for file in files:
+        populated.populate(file)
+    # The files loaded at once hold the rows of the files populated one by one
+    pd.testing.assert_frame_equal(loaded.results, populated.results)
+    assert isinstance(loaded.results.channel.dtype, pd.CategoricalDtype)
+    assert loaded.results.value.notna().all()
+
+
+def test_station_metric_data_select(gather_stats_parameters):
+    smd = gather_stats(
+        start=gather_stats_parameters.startdate,
+        stop=gather_stats_parameters.enddate,
+        snlc=gather_stats_parameters.snlc,
+        metrics=gather_stats_parameters.metrics,
+        ispaq_output_directory=gather_stats_parameters.ispaq_output_directory,
+    )
+    selected = smd.select('QW', 'QCC02')
+    results = smd.results
+    pd.testing.assert_frame_equal(selected.results, results[(results.network == 'QW') & (results.station == 'QCC02')])
+    assert selected.get_channels('QW', 'QCC02') == smd.get_channels('QW', 'QCC02')
+    assert smd.select('QW', 'non_existent').results.empty
@@ -154,6 +154,11 @@ def latency_test_files_nanometrics_negative_latency() -> list:
     return ['tests/latency/test_data/sample_nanometrics_latency_data_6.json']
 
 
+@ pytest.fixture(scope="session")
+def latency_test_file_nanometrics_multiple_stations() -> list:
+    return ['tests/latency/test_data/sample_nanometrics_latency_data_7.json']
+
+
 @ pytest.fixture(scope="session")
 def latency_test_files_timely_availability() -> list:
     return ['tests/latency/test_data/sample_nanometrics_latency_data_1.json']
@@ -1,8 +1,32 @@
 # flake8:noqa
-from stationverification.utilities.calculate_total_availability_for_nanometrics import calculate_total_availability_for_nanometrics
+from stationverification.utilities.calculate_total_availability_for_nanometrics import calculate_total_availability_for_nanometrics, calculate_total_availability_from_daily_percent_availability
+from stationverification.utilities.get_latencies_from_apollo import get_latencies_and_availability_from_apollo
 
 
 def test_calculate_total_availability_for_nanometrics(latency_test_files_nanometrics: list):
     total_availability = calculate_total_availability_for_nanometrics(
         latency_test_files_nanometrics)
     assert total_availability == 26.96
+
+
+def test_calculate_total_availability_for_nanometrics_station(latency_test_file_nanometrics_multiple_stations: list):
+    files = latency_test_file_nanometrics_multiple_stations
+    # Only the channels of the station are averaged, the ids being matched
+    # exactly
+    assert calculate_total_availability_for_nanometrics(files, network='QW', station='QCC02') == \
+        calculate_total_availability_from_daily_percent_availability(
+            [get_latencies_and_availability_from_apollo(files=files, network='QW', station='QCC02')[3][0]])
+    assert calculate_total_availability_for_nanometrics(files, network='QW', station='QCC04') == 0
+
+
+def test_calculate_total_availability_from_daily_percent_availability(latency_parameters_nanometrics, latency_test_files_nanometrics: list):
+    combined_latency_dataframe_for_all_days_dataframe,\
+        array_of_daily_latency_objects_max_latency_only,\
+        array_of_daily_latency_objects_all_latencies,\
+        array_of_daily_percent_availability = get_latencies_and_availability_from_apollo(
+            files=latency_test_files_nanometrics,
+            network=latency_parameters_nanometrics.network,
+            station=latency_parameters_nanometrics.station)
+    assert len(array_of_daily_percent_availability) == 3
+    assert calculate_total_availability_from_daily_percent_availability(
+        array_of_daily_percent_availability) == 26.96
@@ -1,7 +1,7 @@
 # flake8=noqa
 import subprocess
 import pytest
-from stationverification.utilities.get_latencies_from_apollo import get_latencies_from_apollo
+from stationverification.utilities.get_latencies_from_apollo import get_latencies_from_apollo, get_latencies_and_availability_from_apollo
 from stationverification.utilities import exceptions
 
 
@@ -26,3 +26,39 @@ def test_get_latencies_from_apollo(latency_parameters_nanometrics,
             files=latency_test_file_nanometrics_bad_file,
             network=latency_parameters_nanometrics.network,
             station=latency_parameters_nanometrics.station)
+
+
+def test_get_latencies_from_apollo_packets(latency_parameters_nanometrics,
+                                           latency_test_file_nanometrics_over_3_packets,
+                                           latency_test_files_nanometrics_negative_latency):
+    combined_latency_dataframe_for_all_days_dataframe, \
+        array_of_daily_latency_objects_max_latency_only,\
+        array_of_daily_latency_objects_all_latencies = get_latencies_from_apollo(
+            files=latency_test_file_nanometrics_over_3_packets +
+            latency_test_files_nanometrics_negative_latency,
+            network=latency_parameters_nanometrics.network,
+            station=latency_parameters_nanometrics.station)
+
+    # 5 packets: max, min and the average for the 3 remaining packets
+    assert combined_latency_dataframe_for_all_days_dataframe.loc[
+        "QW.QCC02.HNZ.2022-04-03T00:00:00.000000000Z.average3"].data_latency == 3
+    assert len(array_of_daily_latency_objects_max_latency_only[0]) == 3
+    assert len(array_of_daily_latency_objects_all_latencies[0]) == 13
+    # Latencies of -1 are dropped
+    assert len(array_of_daily_latency_objects_all_latencies[1]) == 1
+
+
+def test_get_latencies_from_apollo_multiple_stations(latency_parameters_nanometrics,
+                                                     latency_test_file_nanometrics_multiple_stations):
+    combined_latency_dataframe_for_all_days_dataframe, \
+        array_of_daily_latency_objects_max_latency_only,\
+        array_of_daily_latency_objects_all_latencies,\
+        array_of_daily_percent_availability = get_latencies_and_availability_from_apollo(
+            files=latency_test_file_nanometrics_multiple_stations,
+            network=latency_parameters_nanometrics.network,
+            station=latency_parameters_nanometrics.station)
+
+    # QW.QCC021 and QW.QCC03 are skipped
+    assert list(combined_latency_dataframe_for_all_days_dataframe.channel) == [
+        "HNZ", "HNZ", "HNZ"]
+    assert array_of_daily_percent_availability == [{"QW.QCC02.00.HNZ": 75}]
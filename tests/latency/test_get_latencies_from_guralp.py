@@ -0,0 +1,17 @@
+# flake8:noqa
+from datetime import date
+from stationverification.utilities.get_latencies_from_guralp import get_latencies_from_guralp
+
+
+def test_get_latencies_from_guralp(latency_parameters_guralp, latency_test_files_guralp):
+    combined_latency_dataframe_for_all_days_dataframe, \
+        array_of_daily_latency_objects = get_latencies_from_guralp(
+            files=latency_test_files_guralp,
+            startdate=latency_parameters_guralp.startdate,
+            enddate=date(2022, 3, 4))
+
+    assert len(combined_latency_dataframe_for_all_days_dataframe) == 30
+    assert round(combined_latency_dataframe_for_all_days_dataframe.iloc[0].data_latency, 2) == 8.26
+    # One dataframe per day of the validation period, even without latencies
+    assert [len(latencies) for latencies in array_of_daily_latency_objects] == [15, 15, 0]
+    assert set(array_of_daily_latency_objects[0].channel) == {"HNE", "HNN", "HNZ"}
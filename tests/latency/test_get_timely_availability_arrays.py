@@ -0,0 +1,60 @@
+# flake8:noqa
+from datetime import date
+
+import pandas as pd
+from stationverification.utilities.get_timely_availability_arrays import \
+    get_timely_availability_arrays, get_timely_availability_matrix
+from stationverification.utilities.latency_store import LatencyStore
+
+
+def get_latencies() -> pd.DataFrame:
+    return pd.DataFrame({
+        'network': 'QW',
+        'station': 'QCC02',
+        'channel': ['HHZ', 'HHN', 'HHE', 'HHZ', 'HHN', 'HHN', 'ENZ'],
+        'startTime': ['2022-04-01T00:00:00.000000000Z',
+                      '2022-04-01T00:00:01.000000000Z',
+                      '2022-04-01T12:00:00.000000000Z',
+                      '2022-04-01T23:59:59.000000000Z',
+                      '2022-04-03T00:00:00.000000000Z',
+                      '2022-04-03T01:00:00.000000000Z',
+                      '2022-04-03T02:00:00.000000000Z'],
+        'data_latency': [1.0, 2.5, 4.0, 3.5, 3.0, 0.5, 10.0]})
+
+
+def test_get_timely_availability_matrix():
+    latencies = get_latencies()
+    matrix = get_timely_availability_matrix(latencies, threshold=3)
+    # The channels are sorted by band then in the N, E, Z order
+    assert list(matrix.columns) == ['ENZ', 'HHN', 'HHE', 'HHZ']
+    # Only the days with latencies are included
+    assert list(matrix.index) == [date(2022, 4, 1), date(2022, 4, 3)]
+    assert matrix.loc[date(2022, 4, 1)].tolist() == [0.0, 100.0, 0.0, 50.0]
+    assert matrix.loc[date(2022, 4, 3)].tolist() == [0.0, 100.0, 0.0, 0.0]
+
+    # The same matrix from daily dataframes, or from the store
+    daily_latencies = [latencies.iloc[:4], latencies.iloc[4:]]
+    assert get_timely_availability_matrix(daily_latencies, threshold=3).equals(matrix)
+    latency_store = LatencyStore.create(latencies=latencies)
+    try:
+        assert get_timely_availability_matrix(
+            latency_store.latencies(columns=['channel', 'start_time', 'data_latency']),
+            threshold=3).equals(matrix)
+    finally:
+        latency_store.delete()
+
+    assert get_timely_availability_matrix(
+        latencies, threshold=3, channels=['HHZ', 'HNZ']).loc[
+            date(2022, 4, 1)].tolist() == [50.0, 0.0]
+    assert get_timely_availability_matrix([], threshold=3).empty
+
+
+def test_get_timely_availability_arrays():
+    latencies = get_latencies()
+    latencies['channel'] = latencies.channel.str.replace('HH', 'HN')
+    HNN, HNE, HNZ, days = get_timely_availability_arrays(
+        [latencies.iloc[:4], latencies.iloc[4:]], threshold=3)
+    assert HNN == [100.0, 100.0]
+    assert HNE == [0.0, 0.0]
+    assert HNZ == [50.0, 0.0]
+    assert days == [date(2022, 4, 1), date(2022, 4, 3)]
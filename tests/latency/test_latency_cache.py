@@ -0,0 +1,81 @@
+# flake8:noqa
+import os
+import shutil
+from datetime import date
+
+import pandas as pd
+from stationverification.utilities import get_latencies_from_apollo
+from stationverification.utilities.get_latencies_from_apollo import get_latencies_and_availability_from_apollo
+from stationverification.utilities.get_latencies_from_guralp import get_latencies_from_guralp
+from stationverification.utilities.latency_cache import LatencyCache
+
+
+def decode_apollo_latency_file(file, network, station):
+    raise AssertionError(f'{file} was decoded instead of read from the cache')
+
+
+def test_latency_cache_apollo(tmp_path, monkeypatch, latency_parameters_nanometrics, latency_test_files_nanometrics):
+    cache = LatencyCache(directory=str(tmp_path / 'cache'), max_size=1024 ** 3)
+    files = []
+    for file in latency_test_files_nanometrics:
+        files.append(str(tmp_path / os.path.basename(file)))
+        shutil.copy(file, files[-1])
+
+    uncached = get_latencies_and_availability_from_apollo(
+        files=files,
+        network=latency_parameters_nanometrics.network,
+        station=latency_parameters_nanometrics.station)
+    first_run = get_latencies_and_availability_from_apollo(
+        files=files,
+        network=latency_parameters_nanometrics.network,
+        station=latency_parameters_nanometrics.station,
+        cache=cache)
+    assert len(os.listdir(cache.directory)) == len(files)
+    # The second run reads every day from the cache, decoding no file
+    with monkeypatch.context() as patch:
+        patch.setattr(get_latencies_from_apollo, 'decode_apollo_latency_file', decode_apollo_latency_file)
+        second_run = get_latencies_and_availability_from_apollo(
+            files=files,
+            network=latency_parameters_nanometrics.network,
+            station=latency_parameters_nanometrics.station,
+            cache=cache)
+
+    for latencies in (first_run, second_run):
+        pd.testing.assert_frame_equal(latencies[0], uncached[0])
+        for daily_latencies, uncached_daily_latencies in zip(latencies[2], uncached[2]):
+            pd.testing.assert_frame_equal(daily_latencies, uncached_daily_latencies)
+        assert latencies[3] == uncached[3]
+
+    # A changed file is read again, under a new key
+    os.utime(files[0], ns=(0, 0))
+    get_latencies_and_availability_from_apollo(
+        files=files,
+        network=latency_parameters_nanometrics.network,
+        station=latency_parameters_nanometrics.station,
+        cache=cache)
+    assert len(os.listdir(cache.directory)) == len(files) + 1
+
+
+def test_latency_cache_guralp(tmp_path, latency_parameters_guralp, latency_test_files_guralp):
+    cache = LatencyCache(directory=str(tmp_path), max_size=1024 ** 3)
+    uncached, uncached_daily = get_latencies_from_guralp(
+        files=latency_test_files_guralp,
+        startdate=latency_parameters_guralp.startdate,
+        enddate=date(2022, 3, 4))
+    for _ in range(2):
+        cached, cached_daily = get_latencies_from_guralp(
+            files=latency_test_files_guralp,
+            startdate=latency_parameters_guralp.startdate,
+            enddate=date(2022, 3, 4),
+            cache=cache)
+        pd.testing.assert_frame_equal(cached, uncached)
+        assert [len(latencies) for latencies in cached_daily] == \
+            [len(latencies) for latencies in uncached_daily]
+    assert len(os.listdir(tmp_path)) == len(latency_test_files_guralp)
+
+
+def test_latency_cache_eviction(tmp_path, latency_test_files_guralp):
+    cache = LatencyCache(directory=str(tmp_path), max_size=0)
+    cache.read(lambda file: ({'data_latency': [1.]}, {}), latency_test_files_guralp[0])
+    # Over its maximum size, the cache holds no entry
+    assert os.listdir(tmp_path) == []
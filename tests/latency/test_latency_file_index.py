@@ -0,0 +1,45 @@
+# flake8:noqa
+import os
+from datetime import date
+
+from stationverification.utilities.latency_file_index import get_latency_files_by_day, scan_directory
+
+
+def test_get_latency_files_by_day(latency_parameters_guralp):
+    files_by_day = get_latency_files_by_day(typeofinstrument=latency_parameters_guralp.type_of_instrument,
+                                            network=latency_parameters_guralp.network,
+                                            station=latency_parameters_guralp.station,
+                                            path=latency_parameters_guralp.path,
+                                            startdate=latency_parameters_guralp.startdate,
+                                            enddate=date(2022, 3, 4))
+    assert list(files_by_day) == [date(2022, 3, 1), date(2022, 3, 2), date(2022, 3, 3)]
+    assert files_by_day[date(2022, 3, 1)] == [
+        'tests/latency/test_data/guralp/archive/latency/2022/03/01/QW_QCN08_0N_HNE_2022_060.csv',
+        'tests/latency/test_data/guralp/archive/latency/2022/03/01/QW_QCN08_0N_HNN_2022_060.csv',
+        'tests/latency/test_data/guralp/archive/latency/2022/03/01/QW_QCN08_0N_HNZ_2022_060.csv']
+    assert files_by_day[date(2022, 3, 3)] == []
+
+
+def test_get_latency_files_by_day_listing(tmp_path):
+    day_directory = tmp_path / '2022' / '04' / '01'
+    day_directory.mkdir(parents=True)
+    (day_directory / 'QW.QCC02.2022.091.json').write_text('{}')
+    (day_directory / 'QW.QCC0[2].2022.091.json').write_text('{}')
+
+    def find_files(station):
+        return get_latency_files_by_day(typeofinstrument='APOLLO', network='QW', station=station,
+                                        path=str(tmp_path), startdate=date(2022, 4, 1),
+                                        enddate=date(2022, 4, 2))[date(2022, 4, 1)]
+
+    # The codes are matched as they are, not as shell patterns
+    assert find_files('QCC0[2]') == [f'{day_directory}/QW.QCC0[2].2022.091.json']
+    assert find_files('QCC02') == [f'{day_directory}/QW.QCC02.2022.091.json']
+    assert find_files('QCC03') == []
+    # A directory is listed once, until files are added to it
+    os.utime(day_directory, (0, 0))
+    find_files('QCC02')
+    listings = scan_directory.cache_info().misses
+    find_files('QCC02')
+    assert scan_directory.cache_info().misses == listings
+    (day_directory / 'QW.QCC03.2022.091.json').write_text('{}')
+    assert find_files('QCC03') == [f'{day_directory}/QW.QCC03.2022.091.json']
@@ -49,3 +49,38 @@ def test_latency_line_plot(latency_parameters_nanometrics, latency_test_files_na
         assert False
     subprocess.getoutput(
         "rm -rf 'stationvalidation_output'")
+
+
+def test_latency_line_plot_specs(latency_parameters_nanometrics, latency_test_files_nanometrics, tmp_path, monkeypatch):
+    from stationverification.utilities.latency_line_plot import \
+        latency_line_plot_specs
+    from stationverification.utilities.plot_renderer import render_plot
+    _, array_of_daily_latency_objects_max_latency_only, _ = get_latencies(
+        typeofinstrument=latency_parameters_nanometrics.type_of_instrument,
+        files=latency_test_files_nanometrics,
+        network=latency_parameters_nanometrics.network,
+        station=latency_parameters_nanometrics.station,
+        startdate=latency_parameters_nanometrics.startdate,
+        enddate=latency_parameters_nanometrics.enddate)
+    array_of_daily_latency_dataframes = \
+        convert_array_of_latency_objects_into_array_of_dataframes(
+            array_of_latencies=array_of_daily_latency_objects_max_latency_only)
+    specs = latency_line_plot_specs(
+        latencies=array_of_daily_latency_dataframes,
+        station=latency_parameters_nanometrics.station,
+        network=latency_parameters_nanometrics.network,
+        timely_threshold=latency_parameters_nanometrics.timely_threshold,
+        chunks=2)
+    # The days are split in chunks of consecutive days
+    assert [len(spec['days']) for spec in specs] == [2, 1]
+    start_times, data_latency = specs[0]['days'][0]['channels'][1]
+    assert start_times.dtype == 'datetime64[ns]'
+    assert len(start_times) == len(data_latency)
+
+    # The days of a chunk are drawn on a single figure
+    monkeypatch.chdir(tmp_path)
+    render_plot(specs[0])
+    assert sorted(path.name for path in
+                  (tmp_path / 'stationvalidation_output').iterdir()) == [
+        'QW.QCC02...2022-04-01.latency_line_plot.png',
+        'QW.QCC02...2022-04-02.latency_line_plot.png']
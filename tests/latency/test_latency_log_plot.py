@@ -17,7 +17,9 @@ def test_latency_log_plot(latency_parameters_nanometrics,
         "rm -rf 'stationvalidation_output'")
     # Multiple days, Nanometric data
     total_availability = calculate_total_availability_for_nanometrics(
-        latency_test_files_nanometrics)
+        latency_test_files_nanometrics,
+        network=latency_parameters_nanometrics.network,
+        station=latency_parameters_nanometrics.station)
     combined_latency_dataframe_for_all_days_dataframe,\
         array_of_daily_latency_objects_max_latency_only,\
         array_of_daily_latency_objects_all_latencies = get_latencies(
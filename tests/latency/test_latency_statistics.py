@@ -0,0 +1,57 @@
+# flake8:noqa
+from datetime import date
+
+import numpy as np
+from stationverification.utilities.get_latencies_from_guralp import get_latencies_from_guralp
+from stationverification.utilities.latency_statistics import LATENCY_BINS, LatencyStatistics
+from stationverification.utilities.latency_store import LatencyStore
+
+
+def test_latency_statistics():
+    rng = np.random.default_rng(0)
+    latencies = rng.gamma(2, 1, 10000)
+    statistics = LatencyStatistics.from_values(latencies)
+    assert statistics.count == 10000
+    assert np.isclose(statistics.mean, latencies.mean())
+    assert np.isclose(statistics.std, np.std(latencies))
+    assert list(statistics.histogram) == list(np.histogram(latencies, LATENCY_BINS)[0])
+
+    # The statistics of the parts merge into those of the whole
+    merged = LatencyStatistics()
+    for part in np.array_split(latencies, [10, 2500, 2501, 7000]):
+        merged.add(part)
+    assert merged.count == statistics.count
+    assert np.isclose(merged.mean, statistics.mean)
+    assert np.isclose(merged.variance, statistics.variance)
+    assert list(merged.histogram) == list(statistics.histogram)
+
+    empty = LatencyStatistics.from_values([])
+    assert empty.count == 0 and np.isnan(empty.mean)
+    merged.merge(empty)
+    assert merged.count == statistics.count
+
+
+def test_latency_store_statistics(latency_parameters_guralp, latency_test_files_guralp):
+    combined_latency_dataframe_for_all_days_dataframe, _ = \
+        get_latencies_from_guralp(
+            files=latency_test_files_guralp,
+            startdate=latency_parameters_guralp.startdate,
+            enddate=date(2022, 3, 4))
+    latency_store = LatencyStore.create(latencies=combined_latency_dataframe_for_all_days_dataframe)
+    try:
+        for day, channel in [(None, None), (date(2022, 3, 1), None),
+                             (None, 'HNZ'), (date(2022, 3, 2), 'HNE')]:
+            latencies = latency_store.latencies(day=day).data_latency \
+                if channel is None else latency_store.latencies(
+                    day=day, channel=channel).data_latency \
+                if day is not None else \
+                combined_latency_dataframe_for_all_days_dataframe[
+                    combined_latency_dataframe_for_all_days_dataframe.channel == channel].data_latency
+            statistics = latency_store.statistics(day=day, channel=channel)
+            assert statistics.count == len(latencies)
+            assert np.isclose(statistics.mean, latencies.mean())
+            assert np.isclose(statistics.std, np.std(latencies))
+            assert list(statistics.histogram) == list(np.histogram(latencies, LATENCY_BINS)[0])
+        assert latency_store.statistics(day=date(2022, 3, 3)).count == 0
+    finally:
+        latency_store.delete()
@@ -0,0 +1,55 @@
+# flake8:noqa
+import os
+from datetime import date
+
+import numpy as np
+from stationverification.utilities.get_latencies_from_apollo import get_latencies_from_apollo
+from stationverification.utilities.get_latencies_from_guralp import get_latencies_from_guralp
+from stationverification.utilities.latency_store import LatencyStore
+
+
+def test_latency_store_apollo(tmp_path, latency_parameters_nanometrics, latency_test_file_nanometrics_over_3_packets):
+    combined_latency_dataframe_for_all_days_dataframe, \
+        array_of_daily_latency_objects_max_latency_only,\
+        array_of_daily_latency_objects_all_latencies = get_latencies_from_apollo(
+            files=latency_test_file_nanometrics_over_3_packets,
+            network=latency_parameters_nanometrics.network,
+            station=latency_parameters_nanometrics.station)
+    latency_store = LatencyStore.create(
+        latencies=combined_latency_dataframe_for_all_days_dataframe,
+        packet=combined_latency_dataframe_for_all_days_dataframe.index.str.rsplit('.', n=1).str[-1],
+        directory=str(tmp_path))
+
+    assert latency_store.days == [date(2022, 4, 3)]
+    latencies = latency_store.latencies()
+    assert len(latencies) == len(combined_latency_dataframe_for_all_days_dataframe)
+    assert latencies.data_latency.mean() == combined_latency_dataframe_for_all_days_dataframe.data_latency.mean()
+    assert len(latency_store.latencies(max_only=True)) == len(array_of_daily_latency_objects_max_latency_only[0])
+    # The latencies of a channel on a day are a view of the store
+    HNE_latencies = latency_store.latencies(day=date(2022, 4, 3), channel='HNE', columns=['channel', 'data_latency'])
+    assert set(HNE_latencies.channel) == {'HNE'}
+    assert np.shares_memory(HNE_latencies.data_latency.values, latency_store.arrays['data_latency'])
+    assert list(latency_store.latencies(day=date(2022, 4, 3), channel='HNE').startTime) == list(
+        combined_latency_dataframe_for_all_days_dataframe[
+            combined_latency_dataframe_for_all_days_dataframe.channel == 'HNE'].startTime)
+    assert latency_store.latencies(day=date(2022, 4, 4)).empty
+
+    # Another process opens the store from its directory
+    assert LatencyStore(latency_store.directory).latencies(above=3).data_latency.min() > 3
+    latency_store.delete()
+    assert not os.path.exists(str(tmp_path))
+
+
+def test_latency_store_guralp(latency_parameters_guralp, latency_test_files_guralp):
+    combined_latency_dataframe_for_all_days_dataframe, \
+        array_of_daily_latency_objects = get_latencies_from_guralp(
+            files=latency_test_files_guralp,
+            startdate=latency_parameters_guralp.startdate,
+            enddate=date(2022, 3, 4))
+    latency_store = LatencyStore.create(latencies=combined_latency_dataframe_for_all_days_dataframe)
+
+    # Days without latencies are left out
+    assert [len(latencies) for latencies in latency_store.daily_latencies(max_only=True)] == [15, 15]
+    assert list(latency_store.latencies(day=date(2022, 3, 1)).data_latency) == \
+        list(array_of_daily_latency_objects[0].data_latency)
+    latency_store.delete()
@@ -0,0 +1,30 @@
+# flake8:noqa
+import math
+import pandas as pd
+from stationverification.utilities.parse_guralp_data_latency import parse_guralp_data_latency
+
+
+def test_parse_guralp_data_latency():
+    data_latency = parse_guralp_data_latency(
+        expressions=pd.Series(["=269/100+6.6", "=269/100-0.6", "=269/100",
+                               "=2.69+6.6", "#VALUE!", None]),
+        network_latency=pd.Series([6.6, 0.6, 6.6, 6.6, 6.6, 6.6]))
+    assert round(data_latency[0], 2) == 9.29
+    # Negative offset
+    assert round(data_latency[1], 2) == 2.09
+    # Without an offset, the network latency is added
+    assert round(data_latency[2], 2) == 9.29
+    # Without a denominator
+    assert round(data_latency[3], 2) == 9.29
+    assert math.isnan(data_latency[4])
+    assert math.isnan(data_latency[5])
+
+
+def test_parse_guralp_data_latency_zero_denominator():
+    data_latency = parse_guralp_data_latency(
+        expressions=pd.Series(["=269/0+6.6", "=269/0", "=269/100"]),
+        network_latency=pd.Series([6.6, 6.6, 6.6]))
+    # A zero denominator gives NaN, with or without an offset
+    assert math.isnan(data_latency[0])
+    assert math.isnan(data_latency[1])
+    assert round(data_latency[2], 2) == 9.29
@@ -0,0 +1,88 @@
+# flake8: noqa
+# This script benchmarks the reading of Guralp latency CSV files, comparing
+# read_guralp_latency_file with the previous read_csv + str.extract parsing
+# of the "data latency" column, on generated Fortimus daily files.
+#
+# usage: python -m tests.latency.test_scripts.benchmark_guralp_latency_parser \
+#     [rows_per_file] [repeats]
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from stationverification.utilities.get_latencies_from_guralp import \
+    read_guralp_latency_file
+
+
+def write_fortimus_daily_file(path: str, rows: int):
+    '''
+    Writes a Guralp latency file of the given number of rows, one row per
+    second being the upper bound of a Fortimus daily file
+    '''
+    generator = np.random.default_rng(0)
+    timestamps = pd.date_range('2022-03-01', periods=rows,
+                               freq=f'{86400 / rows}s')
+    network_latency = np.round(generator.uniform(0.5, 4, rows), 1)
+    data_latency = generator.integers(100, 900, rows)
+    pd.DataFrame({
+        'timestamp': timestamps.strftime('%Y/%m/%d %H:%M:%S.%f'),
+        'channel': 'QW.QCN08.0N.HNE',
+        'network latency': network_latency,
+        'data latency': [f'={latency}/100+{offset}' for latency, offset in
+                         zip(data_latency, network_latency)],
+    }).to_csv(path, index=False)
+
+
+def read_guralp_latency_file_with_extract(file: str) -> pd.DataFrame:
+    # The previous parsing, kept for comparison
+    current_file_dataframe = pd.read_csv(file)
+    current_file_dataframe[['network', 'station', "location", 'channel']] = \
+        current_file_dataframe['channel'].str.split('.', expand=True)
+    current_file_dataframe.rename(
+        columns={"network latency": "network_latency",
+                 "data latency": "data_latency",
+                 "timestamp": "startTime"}, inplace=True)
+    current_file_dataframe[['data_latency']] = \
+        current_file_dataframe['data_latency'].str.extract(
+        '=(.*)/').astype(float)/100
+    current_file_dataframe['data_latency'] = \
+        current_file_dataframe['network_latency'] + \
+        current_file_dataframe['data_latency']
+    return current_file_dataframe[[
+        'network', 'station', 'channel', 'startTime', 'data_latency']]
+
+
+def benchmark(reader, file: str, rows: int, repeats: int):
+    elapsed = min(timed(reader, file) for _ in range(repeats))
+    tracemalloc.start()
+    latencies = reader(file)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del latencies
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    print(f'{reader.__name__}: {rows / elapsed:,.0f} rows/s, '
+          f'peak {peak / 2 ** 20:.1f} MiB, '
+          f'{blocks:,} allocations held by the result')
+
+
+def timed(reader, file: str) -> float:
+    start = time.perf_counter()
+    reader(file)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 86400
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.NamedTemporaryFile(suffix='.csv') as file:
+        write_fortimus_daily_file(file.name, rows)
+        pd.testing.assert_series_equal(
+            read_guralp_latency_file(file.name).data_latency,
+            read_guralp_latency_file_with_extract(file.name).data_latency)
+        for reader in (read_guralp_latency_file_with_extract,
+                       read_guralp_latency_file):
+            benchmark(reader, file.name, rows, repeats)
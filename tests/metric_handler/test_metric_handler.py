@@ -2,7 +2,8 @@
 
 import pytest
 
-from stationverification.utilities.metric_handler import metric_handler, check_metric_exists
+from stationverification.utilities.metric_handler import metric_handler, check_metric_exists, evaluate_metrics, \
+    get_metric_limits
 from stationverification.utilities import exceptions
 
 
@@ -405,3 +406,27 @@ def test_check_timing_quality(testdata: dict):
     assert result.result is False
     assert result.details == [
         'Timing quality 30% on 2021-01-01', 'Timing quality 30% on 2021-01-03']
+
+
+def test_evaluate_metrics(testdata: dict):
+    '''
+    Test that the values of several channels and metrics checked at once
+    give the results of metric_handler
+    '''
+    values = {'HNE': {'num_gaps': testdata["data"][1], 'percent_availability': testdata["data"][5]},
+              'HNN': {'num_gaps': testdata["data"][0], 'num_spikes': testdata["data"][1]},
+              'HNZ': {}}
+    results = evaluate_metrics(values, testdata["start"],
+                               get_metric_limits(['num_gaps', 'percent_availability', 'num_spikes'],
+                                                 testdata["config"]))
+    for channel in values:
+        assert list(results[channel]) == list(values[channel])
+        for metric in values[channel]:
+            assert results[channel][metric] == metric_handler(
+                metric, values[channel][metric], testdata["start"], testdata["config"])
+    assert results['HNE']['num_gaps'].details == ['11 gaps detected on 2021-01-01',
+                                                  '11 gaps detected on 2021-01-03',
+                                                  '12 gaps detected on 2021-01-05']
+
+    with pytest.raises(exceptions.MetricHandlerError):
+        evaluate_metrics({'HNE': {'nonexisting_metric': [0]}}, testdata["start"], {'nonexisting_metric': 0})
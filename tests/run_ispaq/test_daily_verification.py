@@ -0,0 +1,33 @@
+# flake8:noqa
+from datetime import date
+
+from stationverification import ISPAQ_PREF
+from stationverification.utilities.daily_verification import FLEET_ALIAS, get_daily_report_directory, \
+    is_station_day_completed, prepare_fleet_preference_file
+
+
+def test_prepare_fleet_preference_file(tmp_path):
+    preffile = prepare_fleet_preference_file(pfile=ISPAQ_PREF,
+                                             stations=[('QW', 'QCC02'), ('QW', 'QCN08')],
+                                             miniseedarchive='/archive/miniseed',
+                                             station_xml='/data/stations.xml',
+                                             resp_dir='/data/resp_files',
+                                             tempfolder=str(tmp_path))
+    with open(preffile) as preferences:
+        lines = [line.strip() for line in preferences]
+    assert f'{FLEET_ALIAS}: QW.QCC02.*.H??, QW.QCN08.*.H??' in lines
+    assert 'station_url:  /data/stations.xml' in lines
+    assert 'resp_dir:  /data/resp_files' in lines
+    # The outputs of ISPAQ are written to the temporary folder
+    assert f'csv_dir: {tmp_path}/csv/' in lines
+
+
+def test_is_station_day_completed(tmp_path):
+    day = date(2022, 4, 3)
+    assert not is_station_day_completed(str(tmp_path), 'QW', 'QCC02', day)
+    directory = tmp_path / 'QW' / 'QCC02' / '2022-04-03'
+    assert get_daily_report_directory(str(tmp_path), 'QW', 'QCC02', day) == str(directory)
+    directory.mkdir(parents=True)
+    (directory / 'QW.QCC02...2022-04-03.validation_results.json').write_text('{}')
+    assert is_station_day_completed(str(tmp_path), 'QW', 'QCC02', day)
+    assert not is_station_day_completed(str(tmp_path), 'QW', 'QCC02', date(2022, 4, 4))
@@ -0,0 +1,71 @@
+# flake8:noqa
+import os
+import sys
+from datetime import date
+
+from stationverification import ISPAQ_PREF
+from stationverification.utilities.generate_report import gather_stats
+from stationverification.utilities.ispaq_shards import run_ispaq_shards, split_window
+
+# Writes the outputs ISPAQ would write for the days of its period, to the directories of its preference file
+FAKE_ISPAQ = '''
+import argparse, datetime, os
+parser = argparse.ArgumentParser()
+for option in ['-M', '-S', '-P', '--starttime', '--endtime', '--pdf_interval']:
+    parser.add_argument(option)
+args = parser.parse_args()
+preferences = {}
+for line in open(args.P):
+    key, _, value = line.partition(':')
+    preferences.setdefault(key.strip(), value.split('#')[0].strip())
+metrics = [name.strip() for name in preferences[args.M].split(',')]
+start = datetime.date.fromisoformat(args.starttime)
+end = datetime.date.fromisoformat(args.endtime)
+days = [start + datetime.timedelta(days=day) for day in range((end - start).days)]
+dates = f'{start}' if len(days) == 1 else f'{start}_{days[-1]}'
+snlc = args.S.replace('*', 'x').replace('?', 'x')
+if 'num_gaps' in metrics:
+    os.makedirs(preferences['csv_dir'], exist_ok=True)
+    with open(f"{preferences['csv_dir']}/{args.M}_{snlc}_{dates}_simpleMetrics.csv", 'w') as csv:
+        csv.write('target,start,end,metricName,value\\n')
+        for day in days:
+            csv.write(f'QW.QCC02..HNZ.D,{day},{day + datetime.timedelta(days=1)},num_gaps,{day.day}\\n')
+if 'psd_corrected' in metrics:
+    os.makedirs(f"{preferences['psd_dir']}/QW/QCC02", exist_ok=True)
+    for day in days:
+        open(f"{preferences['psd_dir']}/QW/QCC02/QW.QCC02..HNZ.D_{day}_PSDCorrected.csv", 'w').close()
+if 'pdf' in metrics:
+    os.makedirs(f"{preferences['pdf_dir']}/QW/QCC02", exist_ok=True)
+    psds = len(os.listdir(f"{preferences['psd_dir']}/QW/QCC02"))
+    open(f"{preferences['pdf_dir']}/QW/QCC02/QW.QCC02..HNZ.D_{dates}_{psds}_PDF.png", 'w').close()
+with open('ISPAQ_TRANSCRIPT.log', 'w') as transcript:
+    transcript.write(f'{args.M} {args.starttime} {args.endtime}\\n')
+'''
+
+
+def test_split_window():
+    assert split_window(date(2022, 4, 1), date(2022, 4, 6), 2) == [
+        (date(2022, 4, 1), date(2022, 4, 3)), (date(2022, 4, 3), date(2022, 4, 5)),
+        (date(2022, 4, 5), date(2022, 4, 6))]
+    assert split_window(date(2022, 4, 1), date(2022, 4, 2), 0) == [(date(2022, 4, 1), date(2022, 4, 2))]
+
+
+def test_run_ispaq_shards(tmp_path, monkeypatch):
+    ispaq = tmp_path / 'run_ispaq.py'
+    ispaq.write_text(FAKE_ISPAQ)
+    pfile = os.path.abspath(ISPAQ_PREF)
+    monkeypatch.chdir(tmp_path)
+    run_ispaq_shards(ispaqloc=f'{sys.executable} {ispaq}', metrics='eew_test',
+                     startdate=date(2022, 4, 1), enddate=date(2022, 4, 6), pfile=pfile,
+                     options="-S 'QW.QCC02.*.H??' --pdf_interval aggregated", workers=3, shard_days=2)
+
+    # The csv files of the shards are merged into those of the whole period
+    assert os.listdir('ispaq_outputs/csv') == ['eew_test_QW.QCC02.x.Hxx_2022-04-01_2022-04-05_simpleMetrics.csv']
+    smd = gather_stats(start=date(2022, 4, 1), stop=date(2022, 4, 6), snlc='QW.QCC02.x.Hxx', metrics='eew_test')
+    assert smd.get_values('num_gaps', network='QW', station='QCC02', channel='HNZ') == [1, 2, 3, 4, 5]
+    assert len(os.listdir('ispaq_outputs/PSDs/QW/QCC02')) == 5
+    # The PDFs are computed once, over the whole period, from the PSDs of the shards
+    assert os.listdir('ispaq_outputs/PDFs/QW/QCC02') == ['QW.QCC02..HNZ.D_2022-04-01_2022-04-05_5_PDF.png']
+    with open('ISPAQ_TRANSCRIPT.log') as transcript:
+        assert len(transcript.readlines()) == 4
+    assert sorted(os.listdir('.')) == ['ISPAQ_TRANSCRIPT.log', 'ispaq_outputs', 'run_ispaq.py']
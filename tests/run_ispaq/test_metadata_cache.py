@@ -0,0 +1,56 @@
+# flake8:noqa
+import os
+import shutil
+
+import obspy
+import pytest
+
+from stationverification.utilities import metadata_cache
+from stationverification.utilities.exceptions import MetadataConversionError
+from stationverification.utilities.metadata_cache import MetadataCache, write_resp_files
+
+# A dataless SEED of two stations, from the test data of obspy
+DATALESS = os.path.join(os.path.dirname(obspy.__file__), 'io', 'xseed', 'tests', 'data', 'dataless.seed.BW_FURT')
+
+
+def test_metadata_cache(tmp_path, monkeypatch):
+    conversions = []
+
+    def convert_to_dataless(station_xml, dataless):
+        conversions.append(station_xml)
+        with open(dataless, 'w') as dataless_file:
+            dataless_file.write(open(station_xml).read())
+
+    def write_resp_files(dataless, directory, network=None, station=None):
+        os.makedirs(directory)
+        open(f'{directory}/RESP.{network}.{station}', 'w').close()
+
+    monkeypatch.setattr(metadata_cache, 'convert_to_dataless', convert_to_dataless)
+    monkeypatch.setattr(metadata_cache, 'write_resp_files', write_resp_files)
+    station_xml = tmp_path / 'QW.xml'
+    station_xml.write_text('<FDSNStationXML/>')
+    cache = MetadataCache(str(tmp_path / 'cache'))
+
+    resp_dir = cache.get_resp_directory(str(station_xml))
+    assert os.listdir(resp_dir) == ['RESP.None.None']
+    # The stationXML is converted once, the RESP files of a station being written from the same dataless SEED
+    assert cache.get_resp_directory(str(station_xml)) == resp_dir
+    station_resp_dir = cache.get_resp_directory(str(station_xml), network='QW', station='QCC02')
+    assert os.listdir(station_resp_dir) == ['RESP.QW.QCC02']
+    assert conversions == [str(station_xml)]
+    # A changed stationXML is converted again
+    station_xml.write_text('<FDSNStationXML></FDSNStationXML>')
+    assert cache.get_resp_directory(str(station_xml)) != resp_dir
+    assert len(conversions) == 2
+    assert not [name for name in os.listdir(tmp_path / 'cache') if name.endswith('.tmp')]
+
+
+@pytest.mark.skipif(not os.path.isfile(DATALESS), reason='The test data of obspy is not installed')
+def test_write_resp_files(tmp_path):
+    write_resp_files(DATALESS, str(tmp_path / 'all'))
+    write_resp_files(DATALESS, str(tmp_path / 'station'), network='BW', station='FURT')
+    station_files = sorted(os.listdir(tmp_path / 'station'))
+    assert station_files and all(name.startswith('RESP.BW.FURT.') for name in station_files)
+    assert station_files == sorted(name for name in os.listdir(tmp_path / 'all') if name.startswith('RESP.BW.FURT.'))
+    with pytest.raises(MetadataConversionError):
+        write_resp_files(DATALESS, str(tmp_path / 'other'), network='QW', station='QCC02')
@@ -9,7 +9,7 @@ import numpy.ma as ma
 from typing import List
 from datetime import date
 
-from stationverification.utilities import exceptions, sohmetrics
+from stationverification.utilities import exceptions, soh_records, sohmetrics
 
 
 def test_getsohfiles(sohcriteria: dict):
@@ -33,6 +33,37 @@ def test_getsohfiles(sohcriteria: dict):
     assert testresults_files_not_found == []
 
 
+def test_getsohfiles_by_channel(sohcriteria: dict, tmp_path):
+    testresults_files_found = sohmetrics.getsohfiles_by_channel(
+        network=sohcriteria["network"],
+        station=sohcriteria["station"],
+        channels=["LCE", "GST", "LCQ", "GNS"],
+        startdate=sohcriteria["startdate"],
+        enddate=date(2022, 4, 3),
+        directory=sohcriteria["directory"])
+    assert testresults_files_found == {
+        channel: [f'tests/data/apollo/archive/soh/2022/04/01/QW.QCC02..{channel}.2022.091']
+        for channel in ["LCE", "GST", "LCQ", "GNS"]}
+
+    # The files of the location are preferred to the files without location
+    day_directory = tmp_path / '2022' / '04' / '01'
+    day_directory.mkdir(parents=True)
+    for name in ['QW.QCC02..LCQ.2022.091', 'QW.QCC02.00.LCQ.2022.091', 'QW.QCC02..GNS.2022.091']:
+        (day_directory / name).write_bytes(b'')
+    testresults_files_found = sohmetrics.getsohfiles_by_channel(
+        network=sohcriteria["network"],
+        station=sohcriteria["station"],
+        location='00',
+        channels=["LCQ", "GNS", "GST"],
+        startdate=sohcriteria["startdate"],
+        enddate=sohcriteria["enddate"],
+        directory=str(tmp_path))
+    assert testresults_files_found == {
+        'LCQ': [f'{day_directory}/QW.QCC02.00.LCQ.2022.091'],
+        'GNS': [f'{day_directory}/QW.QCC02..GNS.2022.091'],
+        'GST': []}
+
+
 def test_get_list_of_streams_from_list_of_files(example_files: List[str]):
     list_of_streams = sohmetrics.get_list_of_streams_from_list_of_files(
         example_files)
@@ -45,6 +76,84 @@ def test_get_list_of_streams_from_list_of_files(example_files: List[str]):
             [])
 
 
+def test_read_soh_channel_data(example_files: List[str]):
+    soh_channel_data = sohmetrics.read_soh_channel_data(example_files)
+    assert soh_channel_data.day_bounds == [0, 3, 6, 12]
+    assert [list(data) for data in soh_channel_data.get_days()] == \
+        [[1, 2, 3], [5, 6, 7], [1, 2, 3, 5, 6, 7]]
+
+    with pytest.raises(exceptions.StreamError):
+        sohmetrics.read_soh_channel_data([])
+
+
+def test_read_soh_channels_data(example_files: List[str]):
+    soh_channels_data = sohmetrics.read_soh_channels_data(
+        {'LCE': example_files, 'GST': example_files[::-1], 'LCQ': []}, workers=2)
+    # The days of each channel are gathered in the order of its files
+    assert [list(data) for data in sohmetrics.pick_soh_channel_data(soh_channels_data, 'LCE').get_days()] == \
+        [[1, 2, 3], [5, 6, 7], [1, 2, 3, 5, 6, 7]]
+    assert [list(data) for data in sohmetrics.pick_soh_channel_data(soh_channels_data, 'GST').get_days()] == \
+        [[1, 2, 3, 5, 6, 7], [5, 6, 7], [1, 2, 3]]
+    # A channel that could not be read only skips its own metrics
+    with pytest.raises(exceptions.StreamError):
+        sohmetrics.pick_soh_channel_data(soh_channels_data, 'LCQ')
+
+
+@pytest.mark.parametrize('encoding,dtype', [('STEIM1', np.int32), ('STEIM2', np.int32), ('INT16', np.int16),
+                                            ('FLOAT64', np.float64)])
+def test_read_soh_day(tmp_path, stream_with_gaps: obspy.Stream, encoding: str, dtype):
+    file = str(tmp_path / 'LCE.mseed')
+    stream = stream_with_gaps.copy()
+    for trace in stream:
+        trace.data = trace.data.astype(dtype)
+    stream.write(file, format='MSEED', encoding=encoding, reclen=256)
+    merged = sohmetrics.get_stream_data_of_merged_streams(obspy.read(file))
+
+    # The records are read without obspy, as merged by obspy
+    data = sohmetrics.read_soh_day_data(file)
+    assert data.dtype == merged.dtype
+    assert np.array_equal(ma.getdata(data), ma.getdata(merged), equal_nan=True)
+    assert np.array_equal(ma.getmaskarray(data), ma.getmaskarray(merged))
+    assert sohmetrics.read_soh_day_stats(file) == sohmetrics.get_soh_stats(
+        sohmetrics.get_soh_channel_data([merged]))
+
+
+def test_read_soh_day_overlaps(tmp_path, stream_without_gaps: obspy.Stream):
+    file = str(tmp_path / 'LCE.mseed')
+    stream = stream_without_gaps.copy()
+    stream[0].data = stream[0].data.astype(np.int32)
+    overlapping = stream.copy()
+    overlapping[0].data = overlapping[0].data + 1
+    (stream + overlapping).write(file, format='MSEED')
+    # The overlaps are left to obspy to merge
+    with pytest.raises(exceptions.MSeedRecordError):
+        soh_records.merge_soh_records(soh_records.scan_soh_records(file))
+    assert list(sohmetrics.read_soh_day_data(file)) == \
+        list(sohmetrics.get_stream_data_of_merged_streams(obspy.read(file)))
+
+
+
+def test_read_soh_day_truncated(tmp_path):
+    file = str(tmp_path / 'LCQ.mseed')
+    with open('tests/data/apollo/archive/soh/2022/04/01/QW.QCC02..LCQ.2022.091', 'rb') as mseed_file:
+        # The file is cut off within the blockettes of its first record
+        data = mseed_file.read(50)
+    with open(file, 'wb') as truncated_file:
+        truncated_file.write(data)
+    with pytest.raises(exceptions.MSeedRecordError):
+        soh_records.scan_soh_records(file)
+
+def test_get_soh_stats(list_of_streams_clock_locked: List[obspy.Stream]):
+    stats = sohmetrics.get_soh_stats(
+        sohmetrics.as_soh_channel_data(list_of_streams_clock_locked))
+    # Masked samples are left out of the average, minimum and maximum
+    assert stats.averages == [float(np.average(ma.array([1, 1.5, 1.8, 30, 40], mask=[0, 0, 0, 0, 1]))),
+                              float(np.average([1, 1.4, 1.7, 1.78, 70, 80]))]
+    assert stats.minimums == [1, 1]
+    assert stats.maximums == [30, 80]
+    assert stats.counts_below == [3, 4]
+
+
 def test_getstats(stream_with_gaps: obspy.Stream):
     '''
     Gathers statistics from a SOH miniseed file
@@ -154,6 +263,22 @@ def test_check_timing_quality(
     assert results.results == [20.0, 70.0, 17.0]
 
 
+
+def test_check_timing_quality_output_directory(
+        list_of_streams_timing_quality: List[obspy.Stream], tmp_path):
+    output_directory = tmp_path / 'QW' / 'QCC02' / '2021-01-01'
+    sohmetrics.check_timing_quality(
+        list_of_streams=list_of_streams_timing_quality,
+        threshold=70.0,
+        startdate=date(2021, 1, 1),
+        enddate=date(2021, 1, 4),
+        network="QW",
+        station="QCC02",
+        output_directory=str(output_directory))
+
+    assert [plot.name for plot in output_directory.iterdir()] == \
+        ['QW.QCC02...2021-01-01_2021-01-03.timing_quality.png']
+
 def test_check_number_of_satellites(list_of_streams: List[obspy.Stream],
                                     passing_threshold: float = 20.0,
                                     failing_threshold: float = 30.0,
@@ -0,0 +1,80 @@
+# flake8:noqa
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+from datetime import date
+
+import pytest
+
+from stationverification.utilities import batch_runner
+from stationverification.utilities.batch_runner import StageScheduler, get_station_inputs, read_station_list, run_batch
+from stationverification.utilities.fetch_arguments import UserInput
+
+
+def test_stage_scheduler():
+    running = {'ispaq': 0, 'report': 0}
+    peaks = {'ispaq': 0, 'report': 0}
+    lock = threading.Lock()
+
+    def task(stage):
+        with lock:
+            running[stage] += 1
+            peaks[stage] = max(peaks[stage], running[stage])
+        time.sleep(0.02)
+        with lock:
+            running[stage] -= 1
+        return stage
+
+    # The stages are limited, not the pool, which runs all the tasks at once
+    with ThreadPoolExecutor(max_workers=8) as executor, \
+            ThreadPoolExecutor(max_workers=8) as stations:
+        scheduler = StageScheduler(executor, {'ispaq': 1, 'report': 2})
+        futures = [stations.submit(lambda stage: scheduler.submit(stage, task, stage).result(), stage)
+                   for stage in ['ispaq', 'report'] * 4]
+        assert [future.result() for future in futures] == ['ispaq', 'report'] * 4
+    assert peaks == {'ispaq': 1, 'report': 2}
+
+
+def test_read_station_list(tmp_path):
+    station_list = tmp_path / 'stations.txt'
+    station_list.write_text('# Deployment\nQW.QCC02\n\n  QW.QCN08.00 \n')
+    assert read_station_list(str(station_list)) == ['QW.QCC02', 'QW.QCN08.00']
+
+
+def test_get_station_inputs(tmp_path):
+    user_inputs = UserInput(network=None, station=None, location='00', outputdir='output',
+                            pfile=str(tmp_path), station_url='http://fdsn')
+    station_inputs = get_station_inputs(user_inputs, 'QW.QCN08')
+    assert (station_inputs.network, station_inputs.station, station_inputs.location) == ('QW', 'QCN08', '00')
+    assert get_station_inputs(user_inputs, 'QW.QCN08.01').location == '01'
+    # The paths are made absolute, as the stages run in other directories
+    assert station_inputs.outputdir.startswith('/')
+    assert station_inputs.station_url == 'http://fdsn'
+    with pytest.raises(ValueError):
+        get_station_inputs(user_inputs, 'QCN08')
+
+
+def skip_ispaq_stage(user_inputs):
+    pass
+
+
+def test_run_batch_without_latency_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_runner, 'run_ispaq_stage', skip_ispaq_stage)
+    latency_archive = tmp_path / 'latency'
+    latency_archive.mkdir()
+    user_inputs = UserInput(network=None, station=None, location=None,
+                            typeofinstrument='GURALP',
+                            startdate=date(2022, 3, 1), enddate=date(2022, 3, 2),
+                            latencyFiles=str(latency_archive),
+                            thresholds=ConfigParser(), outputdir=str(tmp_path / 'output'),
+                            latency_workers=1, latency_cache=None, plot_workers=1)
+    # The station without latencies is reported as failed rather than
+    # blocking the batch
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = executor.submit(
+            run_batch, user_inputs, ['QW.QCN08'], 2,
+            {'latency': 1, 'ispaq': 1, 'report': 1},
+            str(tmp_path / 'batch')).result(timeout=120)
+    assert list(results) == ['QW.QCN08']
+    assert 'No latencies found for QW.QCN08' in results['QW.QCN08']
@@ -0,0 +1,17 @@
+# flake8:noqa
+from datetime import date
+
+from stationverification.utilities.cleanup_directory import get_validation_output_directory
+
+
+def test_get_validation_output_directory():
+    # A single day
+    assert get_validation_output_directory(
+        outputdir='output', network='QW', station='QCC02',
+        startdate=date(2022, 4, 1), enddate=date(2022, 4, 2)) == \
+        'output/QW/QCC02/2022-04-01'
+    # Several days, named after the last day validated
+    assert get_validation_output_directory(
+        outputdir='output', network='QW', station='QCC02',
+        startdate=date(2022, 4, 1), enddate=date(2022, 4, 4)) == \
+        'output/QW/QCC02/2022-04-01-2022-04-03'
@@ -0,0 +1,50 @@
+# flake8:noqa
+import numpy as np
+
+from stationverification.utilities.decimate_min_max import decimate_min_max
+
+
+def test_decimate_min_max_short_line():
+    x = np.arange(10)
+    y = np.arange(10.0)
+    decimated_x, decimated_y = decimate_min_max(x, y, buckets=5)
+    assert decimated_x is x
+    assert decimated_y is y
+
+
+def test_decimate_min_max():
+    rng = np.random.default_rng(0)
+    x = np.datetime64('2022-04-01T00:00:00', 'ns') + \
+        np.arange(86400 * 4) * np.timedelta64(250, 'ms')
+    y = rng.uniform(0, 2, len(x))
+    # A few latencies above the threshold, one of them alone in its bucket
+    exceedances = [1000, 1001, 50000, 345599]
+    y[exceedances] = [5.0, 7.5, 3.2, 9.0]
+
+    decimated_x, decimated_y = decimate_min_max(x, y, buckets=1000)
+    assert len(decimated_y) <= 4 * 1000
+    assert decimated_x.dtype == x.dtype
+    # The points are kept in their order, with the ends of the line
+    assert np.all(np.diff(decimated_x.astype(np.int64)) > 0)
+    assert decimated_x[0] == x[0] and decimated_x[-1] == x[-1]
+    # The max and min of each bucket are kept
+    assert decimated_y.max() == 9.0
+    assert decimated_y.min() == y.min()
+    assert set(decimated_y[decimated_y > 3]) == {7.5, 3.2, 9.0}
+    # Every kept point is a point of the line
+    kept = np.searchsorted(x, decimated_x)
+    assert np.array_equal(y[kept], decimated_y)
+
+
+def test_decimate_min_max_nan():
+    x = np.arange(1000.0)
+    y = np.ones(len(x))
+    # A latency that could not be parsed next to an exceedance, and a
+    # bucket holding no latency at all
+    y[[500, 501]] = [np.nan, 9.0]
+    y[990:] = np.nan
+
+    decimated_x, decimated_y = decimate_min_max(x, y, buckets=10)
+    assert 9.0 in decimated_y
+    assert 501.0 in decimated_x
+    assert np.nanmin(decimated_y) == 1.0
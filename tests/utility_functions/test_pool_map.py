@@ -0,0 +1,9 @@
+# flake8:noqa
+from stationverification.utilities.pool_map import pool_map
+
+
+def test_pool_map():
+    # Results keep the order of the items, in the current process or not
+    assert pool_map(abs, [-3, 2, -1]) == [3, 2, 1]
+    assert pool_map(abs, [-3, 2, -1], workers=2) == [3, 2, 1]
+    assert pool_map(abs, [], workers=2) == []